@@ -6,6 +6,7 @@ import numpy as np
 from collections import OrderedDict
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
+from modules.runFile import readTransients, readHysteresis, h5py
 
 data = {}
 normHysteresis_all = {}
@@ -17,6 +18,10 @@ AllData = {}
 PumpProbeData = {}
 Information = {}
 TeslaDict = {}
+HysteresisColumns = ['# #Voltage (V)', ' Balanced Pumped',
+                     ' Balanced Umpumed', ' referenceDiode closed',
+                     ' referenceDiode', ' Diode+ Pumped', ' Diode+ Unpumped',
+                     ' Diode- Pumped', ' Diode- Unpumped']
 
 
 class DataAnalysisMOKE:
@@ -39,10 +44,17 @@ class DataAnalysisMOKE:
         finds all hysteresis measurements (if they exist): static and
         time resolved
         saves all of the data in dictionaries
+        if the run was saved as HDF5 file ("TimeStamp.h5"), it is read
+        instead of the text files
         :return: data in dictionaries
         """
 
         readFromPath = str(self.root) + "\\" + str(self.filename)
+        runFileName = readFromPath + "\\" + str(self.filename) + ".h5"
+        if h5py is not None and os.path.isfile(runFileName):
+            self.readRunFile(runFileName)
+            return
+
         rootdir = Path(readFromPath)
         AllData_List = [
             f for f in rootdir.resolve().glob('**/**/**/' +
@@ -106,6 +118,27 @@ class DataAnalysisMOKE:
                 timeHysteresis[idx] = 0
 
 
+    def readRunFile(self, runFileName):
+        """
+        read all transients and hysteresis of one measurement series from
+        the HDF5 file of the run, same dictionaries as readData
+        :param runFileName: path of "TimeStamp.h5"
+        """
+
+        for idx, transient in enumerate(readTransients(runFileName)):
+            Information[idx] = {}
+            Information[idx]['Fluence'] = transient['Fluence']
+            Information[idx]['Voltage'] = transient['Voltage']
+            data[idx] = pd.DataFrame(transient['AllData_Reduced'])
+
+            hysteresis = readHysteresis(runFileName, transient['Fluence'])
+            timeHysteresis[idx] = {}
+            for idx2, delay in enumerate(hysteresis):
+                timeHysteresis[idx][idx2] = \
+                    pd.DataFrame(hysteresis[delay], columns=HysteresisColumns)
+                if delay == '6.666666666666686':
+                    normHysteresis_all[idx] = timeHysteresis[idx][idx2]
+
     def readLastTimeZero():
         """
         read t0 from the MeasurementParameterList
@@ -220,8 +253,9 @@ class DataAnalysisMOKE:
             else:
                 Information[key]['t0'] = t0
 
-            # remove index column
-            del value['Unnamed: 0']
+            # remove index column (only in data read from text files)
+            if 'Unnamed: 0' in value:
+                del value['Unnamed: 0']
 
             # calculate a time axis with coorected Zero and insert column
             # in dataframe
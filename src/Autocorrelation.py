@@ -34,6 +34,7 @@ from nidaqmx.constants import AcquisitionType, TaskMode, Slope,DigitalWidthUnits
 #from pickle import dumps
 from weakref import WeakKeyDictionary
 from XPS_ import XPS
+from StageCommunication_V2 import StageCommunication as StageCommunication_V2
 import cProfile
 import scipy.signal as scisig # to return idxs of relative extrema
 # # # # # # import methods for GUI implementation # # # # # # # #
@@ -61,9 +62,14 @@ MeasureParams       = {'Averages': 1, 'samples_per_channel': 2}
 StageParams_ps      = {'Offset': -5.20765*mm_to_ps, 'Range': 0.05, 'StepWidth': 0.0001} # offset was determined by SINGLECHANNEL in LabView which already considered the lightway ( faktor 2 )
 Stage_SpeedParams   = {'Velocity': 100. , 'Acceleration': 0}
 assumed_pulse_shape = 'gauss' # initially 'gauss' will be assumed
+bFlyScan = False  # True: stage moves continuously, XPS latches the position for every laser shot (laser trigger on TRIG IN of XPS and PFI0 of the card)
+FlyScanParams = {'LaserRate': 1000., 'MarginShots': 200}
 
-class StageCommunication():
+class StageCommunication(StageCommunication_V2):
+    # fly scan methods (prepareFlyScan, startFlyScan, finishFlyScan) are inherited from StageCommunication_V2
 
+    def __init__(self):
+        super().__init__('Group3', 'Pos')
 
     def connectStage(self):
 
@@ -121,6 +127,10 @@ class AC_Measure_thread(QObject):
          increment_2 = float(StageParams_mm['StepWidth'])
          iterations  =  int( (endpos - startpos) / increment_2)
          print("Stage will be moved between {0} mm and {1} mm with an increment of {2} mm (iterations: {3})".format(StageParams_mm['StartPoint'], StageParams_mm['EndPoint'], StageParams_mm['StepWidth'], iterations))  
+         if bFlyScan:
+             self.flyProcedure(startpos, endpos, increment_2)
+             self.finished.emit()
+             return
          self.Stage.moveStage(startpos) # start from left bound of stage movement range
          incr = +1 * increment_2        # start with movement to the right
          moveRight = True
@@ -166,6 +176,50 @@ class AC_Measure_thread(QObject):
          print("Measurethread has been finished...")
      
         
+     def flyProcedure(self, startpos, endpos, increment):
+         # fly scan: one continuous move per pass, every laser shot is assigned to the bin of its latched position afterwards
+         edges = np.arange(startpos - increment / 2, endpos + increment, increment)
+         centers = (edges[1:] + edges[:-1]) / 2
+         velocity = increment * FlyScanParams['LaserRate'] / MeasureParams['samples_per_channel']  # samples_per_channel shots per bin
+         counter = 1
+         bounds = (startpos, endpos)
+         while counter <= self.counter_bound and self.alive:
+             print("Fly scan {0} from {1} mm to {2} mm with {3} mm/s".format(counter, bounds[0], bounds[1], velocity))
+             duration = self.Stage.prepareFlyScan(bounds[0], bounds[1], velocity)
+             if duration <= 0:
+                 print("Fly scan aborted: stage can not be prepared")
+                 break
+             shots = int(duration * FlyScanParams['LaserRate'])
+             signal, offset, move = self.ReadValuesFly(shots)
+             errorCode = move.result()
+             positions = self.Stage.finishFlyScan()
+             if errorCode != 0:
+                 print("Fly scan aborted: stage not moved (error {0})".format(errorCode))
+                 break
+             n = min(len(positions), len(signal) - offset)
+             binIdx = np.digitize(positions[:n], edges) - 1
+             valid = (binIdx >= 0) & (binIdx < len(centers))
+             count = np.bincount(binIdx[valid], minlength=len(centers))
+             sums = np.bincount(binIdx[valid], weights=signal[offset:offset + n][valid], minlength=len(centers))
+             filled = count > 0
+             self.position.emit(list(sums[filled] / count[filled]), list(centers[filled] - StageParams_mm['Offset']))
+             bounds = bounds[::-1]  # measure on the way back
+             counter += 1
+         print("Measurethread has been finished...")
+
+     def ReadValuesFly(self, shots):
+         # read every laser shot (PFI0) during the fly scan, offset: shots acquired until the position gathering started
+         # (startFlyScan returns when the gathering event of the XPS is running)
+         samples = shots + FlyScanParams['MarginShots']
+         with nidaqmx.Task() as task:
+            task.ai_channels.add_ai_voltage_chan(self.channel)
+            task.timing.cfg_samp_clk_timing(1000, source="PFI0", sample_mode=AcquisitionType.CONTINUOUS, samps_per_chan=samples)
+            task.start()
+            move = self.Stage.startFlyScan(shots)
+            offset = task.in_stream.total_samp_per_chan_acquired
+            data = np.asarray(task.read(number_of_samples_per_channel=samples, timeout=samples / 1000. + 10.))
+         return data, offset, move
+
      def ReadValues(self) :
          # actual samples
          smplsperchan = MeasureParams['samples_per_channel'] #int(str(self.SplPerChanEdit.text()))
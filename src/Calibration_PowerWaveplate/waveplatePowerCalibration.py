@@ -178,8 +178,8 @@ def measurement():
 
         # Move Waveplate to angle
         print('Move to Angle: ', val)
-        Waveplate.moveStage(val)
-        stage = Waveplate.getCurrPos()
+        Waveplate.moveStage_absolute(val)
+        stage = Waveplate.getStatus()['Position']
 
         # readData
         data = MeasurementCard.ReadValues_ai(MeasurementTask, LoopParams)
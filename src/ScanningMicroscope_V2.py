@@ -32,6 +32,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 from XPS_ import XPS
 from MEMeasurementCard import MECard
+from phaseTimer import timer
 Stage_SpeedParams={'Velocity':'20', 'Acceleration':'20'}
 import serial
 import os
@@ -342,10 +343,12 @@ class MyWindow(QMainWindow):
     def Scan(self):
         self.GoToWaveExtInput()
         self.StopScanButton = False
+        timer.reset()
                 
         for j in range(len(self.y_Points)):
             print(' ')
-            self.MoveStageYAbsInt(str(round(self.y_Points[j]/1000,4)))
+            with timer.phase('Stage move'):
+                self.MoveStageYAbsInt(str(round(self.y_Points[j]/1000,4)))
             print('Set Y-position = ' , round(self.y_Points[j],2))
             self.getCurrentPosition_Y()
             print('Real Y-position = ' , float(self.StageY.currentPosition)*1000)
@@ -355,9 +358,12 @@ class MyWindow(QMainWindow):
                 break
             
             for i in range(len(self.x_Points)):
-                self.MoveStageXAbsInt(str(round(self.x_Points[i]/1000,4)))
-                time.sleep(200/1000)
-                QtGui.QApplication.processEvents()
+                with timer.phase('Stage move'):
+                    self.MoveStageXAbsInt(str(round(self.x_Points[i]/1000,4)))
+                with timer.phase('Settle'):
+                    time.sleep(200/1000)
+                with timer.phase('GUI'):
+                    QtGui.QApplication.processEvents()
                 
                 # The card does not have an integration time but only reads the 
                 # voltage value at the moment of the question. Thus an average
@@ -365,12 +371,15 @@ class MyWindow(QMainWindow):
                 # times
                 int_time = int(self.Input_IntegrationTimeScan.text())
                 sig=0
-                for k in range(int_time):
-                    sig =+  self.AICard.measure()                     
+                with timer.phase('DAQ read'):
+                    for k in range(int_time):
+                        sig =+  self.AICard.measure()                     
                 self.image_data[i,j] = sig/int_time
                 print(self.image_data[i,j])
-                self.updateImageView()
-                self.getCurrentPosition_X()
+                with timer.phase('Render'):
+                    self.updateImageView()
+                with timer.phase('Position'):
+                    self.getCurrentPosition_X()
                                 
                 print('Set X-position = ' , round(self.x_Points[i],2))
                 print('Real X-position = ' , float(self.StageX.currentPosition)*1000)
@@ -381,7 +390,9 @@ class MyWindow(QMainWindow):
                 
         data = np.column_stack((self.x_Points,self.image_data))
         data = np.column_stack((np.append(0,self.y_Points),data.transpose()))       
-        np.savetxt('temp_Scan.csv',data,delimiter=',')
+        with timer.phase('Save'):
+            np.savetxt('temp_Scan.csv',data,delimiter=',')
+        print(timer.report())
                 
     def plotImageView(self):
         self.ImageDataWidget.setImage(self.image_data, autoRange=False,autoLevels=False )
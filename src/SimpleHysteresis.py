@@ -51,7 +51,16 @@ Parameters = {'MeasurementPoints': 22,
               'loopfield': 2.,
               'Amplitude': 2.,
               'timeZero': -1,
-              'Power': -1}
+              'Power': -1,
+              'SettleShots': 20}
+
+# if variable is True: the Analog Input Task runs continuously and the newest
+# values are taken from a ring buffer instead of restarting the triggered task
+# for every read
+bStreaming = True
+# if variable is True: the complete Hysteresis is written as one hardware timed
+# waveform and read synchronously instead of setting the voltage step by step
+bHysteresisSweep = True
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
@@ -263,6 +272,9 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
         self.measurementCard.reset_device("Dev2")
         self.writingTask = self.measurementCard.create_Task_ao0("Dev1/ao0")
         self.readingTask = self.measurementCard.create_Task_ai("Dev2/ai0:7")
+        if bStreaming:
+            self.streamBuffer = self.measurementCard.startStreaming_ai(
+                self.readingTask, Parameters)
         self.card_ini = 1
 
     def cardClosing(self):
@@ -271,6 +283,9 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
         """
         if self.card_ini == 0:
             return
+        if bStreaming:
+            self.measurementCard.stopStreaming_ai(self.readingTask,
+                                                  self.streamBuffer)
         self.measurementCard.CloseTask(self.writingTask)
         self.measurementCard.CloseTask(self.readingTask)
         self.card_ini = 0
@@ -306,6 +321,20 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
             if ans:
                 print("Problem with shutter!")
 
+    def readMeasurementCard(self):
+        """
+        Read Parameters['MeasurementPoints'] values for all channels of the
+        reading Task. In streaming mode the newest values are taken from the
+        ring buffer of the running task, else the triggered task is started and
+        stopped for the read.
+        :return: data (channels x MeasurementPoints)
+        """
+
+        if bStreaming:
+            return self.measurementCard.ReadValues_ai_stream(
+                self.streamBuffer, Parameters)
+        return self.measurementCard.ReadValues_ai(self.readingTask, Parameters)
+
     def moveShutter(self, value):
         """
         move shutter to position 0 (closed) or 1 (open)
@@ -489,43 +518,10 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
             self.statusReport("stage: " + str(lightDelay))
             self.createMeasurementArray()
 
-            for i in range(len(self.resultList[:, 0])):
-                try:
-                    self.measurementCard.WriteValues(self.writingTask,
-                                                     self.resultList[i, 0])
-                except DaqError:
-                    self.timer.stop()
-                    break
-
-                attempt = 1
-
-                while attempt:
-                    # this while loop catches a hickup in the laser trigger
-                    # causing tho measure an uneven number of choped and
-                    # unchoped values
-
-                    # read data
-                    data = self.measurementCard.ReadValues_ai(self.readingTask,
-                                                              Parameters)
-                    Diode = data[0]
-                    Chopper = data[3]
-                    singleDiodeRef = data[6]
-
-                    choplist, unchoplist = \
-                        utilities.sortAfterChopper(Diode, Chopper)
-                    refChop, refUnchop = \
-                        utilities.sortAfterChopper(singleDiodeRef, Chopper)
-
-                    if np.size(choplist) == np.size(unchoplist):
-                        attempt = 0
-
-                self.resultList[i, 1] = np.mean(choplist)
-                self.resultList[i, 2] = np.mean(unchoplist)
-                self.resultList[i, 3] = np.mean(refChop)
-                self.resultList[i, 4] = np.mean(refUnchop)
-
-                self.update_HysteresePlot()
-                QtGui.QApplication.processEvents()
+            if bHysteresisSweep:
+                self.measureHysteresisSweep()
+            else:
+                self.measureHysteresisSteps()
 
             # Analysis
             Amp = self.calculateMOKENormalization()
@@ -538,6 +534,85 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
         self.cardClosing()
         self.stage.closeStage()
 
+    def measureHysteresisSteps(self):
+        """
+        Measure the Hysteresis step by step: set the voltage, read the values
+        and sort them after the chopper for every value of the resultList.
+        :return: self.resultList
+        """
+
+        for i in range(len(self.resultList[:, 0])):
+            try:
+                self.measurementCard.WriteValues(self.writingTask,
+                                                 self.resultList[i, 0])
+            except DaqError:
+                self.timer.stop()
+                return
+
+            attempt = 1
+
+            while attempt:
+                # this while loop catches a hickup in the laser trigger
+                # causing tho measure an uneven number of choped and
+                # unchoped values
+
+                # read data
+                # channels: 0 Diode, 3 Chopper, 6 single reference Diode
+                data = self.readMeasurementCard()
+                ChopperStats, attempt = \
+                    utilities.sortAfterChopperAllChannels(data, 3)
+
+            chop = ChopperStats['Chop']
+            unchop = ChopperStats['UnChop']
+            self.resultList[i, 1] = chop[0]
+            self.resultList[i, 2] = unchop[0]
+            self.resultList[i, 3] = chop[6]
+            self.resultList[i, 4] = unchop[6]
+
+            self.update_HysteresePlot()
+            QtGui.QApplication.processEvents()
+
+    def measureHysteresisSweep(self):
+        """
+        Measure the complete Hysteresis in one hardware timed sweep: the
+        voltages of the resultList are written as one waveform, each value is
+        held for SettleShots + MeasurementPoints laser shots while the
+        Analog Input is read synchronously. The first SettleShots of every
+        value are discarded (settling of the magnet).
+        :return: self.resultList
+        """
+
+        settle = int(Parameters['SettleShots'])
+        shots = settle + Parameters['MeasurementPoints']
+
+        def showStep(idx, block):
+            ChopperStats, attempt = \
+                utilities.sortAfterChopperAllChannels(block[:, settle:], 3)
+            self.resultList[idx, 1:3] = [ChopperStats['Chop'][0],
+                                         ChopperStats['UnChop'][0]]
+            self.update_HysteresePlot()
+            QtGui.QApplication.processEvents()
+
+        if bStreaming:
+            self.measurementCard.stopStreaming_ai(self.readingTask,
+                                                  self.streamBuffer)
+        data = self.measurementCard.MeasureSweep(
+            self.writingTask, self.readingTask, self.resultList[:, 0], shots,
+            callback=showStep)
+        if bStreaming:
+            self.streamBuffer = self.measurementCard.startStreaming_ai(
+                self.readingTask, Parameters)
+
+        # data: channels x field steps x shots
+        # channels: 0 Diode, 3 Chopper, 6 single reference Diode
+        ChopperStats, attempt = \
+            utilities.sortAfterChopperAllChannels(data[:, :, settle:], 3)
+        chop = ChopperStats['Chop']
+        unchop = ChopperStats['UnChop']
+        self.resultList[:, 1:5] = np.column_stack(
+            [chop[0], unchop[0], chop[6], unchop[6]])
+        self.update_HysteresePlot()
+
     def updateGUI(self):
         """
         updates progress bar and painting of Hysteresis measurement
@@ -72,7 +72,7 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
         fluence = Fluence()
         angle, reference = fluence.calculateWaveplateAngle(
             float(self.txt_power.toPlainText()))
-        self.Waveplate.moveStage_absolute([angle])
+        self.Waveplate.moveStage_absolute(angle)
         self.moveShutter(False)
 
     def initializeCard(self):
@@ -114,8 +114,7 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
                 currRef - (currRef * 0.01)) < ref:
             currRef = self.measureReference()
 
-            self.Waveplate.moveStage(float(self.Waveplate.getCurrPos()) +
-                                     (direction * 0.025))
+            self.Waveplate.moveStage_relative(direction * 0.025)
             self.statusReport('Current referenceDiode: '+str(currRef) +
                               ', Goal referenceDiode: '+str(ref))
             self.statusReport('Current Waveplate Angle: ' +
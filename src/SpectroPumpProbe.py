@@ -41,6 +41,7 @@ import pyqtgraph.exporters as exporters
 # Imports of own modules
 from modules.StageCommunication_V2 import StageCommunication
 from modules.OceanOpticsCommunication_V1 import OOSpectrometer
+from modules.phaseTimer import timer
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
@@ -295,17 +296,21 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
         wavenumber = self.initialize_Arrays()
         self.StartMeasurement = True
         self.Loop = 1
+        timer.reset()
 
         if self.SaveButton.isChecked():
             self.createFolder()
             self.saveToMeasurementParameterList()
+            timer.openTrace('Timing.txt')
 
         while self.Loop < self.loopValue:
             self.Stage_idx = 0
 
             for Stagemove in self.stageVector_mm:
-                QtGui.QApplication.processEvents()
-                self.stage.moveStage(Stagemove)
+                with timer.phase('GUI'):
+                    QtGui.QApplication.processEvents()
+                with timer.phase('Stage move'):
+                    self.stage.moveStage(Stagemove)
                 self.Pos_ps = self.stage.calcLightWay(Stagemove)
                 dataAverageRepeats = np.zeros((1, wavenumber))
                 self.statusReport("Loop: " + str(self.Loop) +
@@ -314,19 +319,22 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
                 self.Repeat_Measurements = 0
 
                 while self.Repeat_Measurements < self.repeat:
-                    dat = self.spectro.getSpectrum()
+                    with timer.phase('Spectrum'):
+                        dat = self.spectro.getSpectrum()
                     data = dat[NumberOfPixelsToSkip:]
                     dataAverageRepeats = dataAverageRepeats + data
                     self.currentSpectra[:, 1] = self.currentSpectra[:, 1] + data
-                    QtGui.QApplication.processEvents()
+                    with timer.phase('GUI'):
+                        QtGui.QApplication.processEvents()
                     self.progresscount = self.progresscount+1
                     self.Repeat_Measurements = self.Repeat_Measurements+1
 
                 data = dataAverageRepeats/self.repeat
                 self.currentSpectra[:, 1] = data
                 self.calculate_Progress()
-                self.update_liveSpectra()
-                self.update_spectra2D()
+                with timer.phase('Render'):
+                    self.update_liveSpectra()
+                    self.update_spectra2D()
 
                 self.allSpectra[self.Stage_idx, 2:] = data
                 self.allSpectra[self.Stage_idx, 0] = self.Pos_ps
@@ -348,12 +356,14 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
 
             if self.SaveButton.isChecked():
                 self.SaveData()
+            print(timer.report())
 
         self.statusReport("Finished Measurement")
         self.timer.stop()
 
         if self.SaveButton.isChecked():
             self.SaveData()
+        timer.closeTrace()
 
     def createFolder(self):
         """
@@ -374,6 +384,7 @@ class MyWindow(PyQt5.QtWidgets.QMainWindow):
                 os.makedirs("N:\\FROG\FROG_Measurements\\" + self.timeStamp)
                 os.chdir("N:\\FROG\FROG_Measurements\\" + self.timeStamp)
 
+    @timer.timed('Save')
     def SaveData(self):
         """
         Save Data:
@@ -0,0 +1,561 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+benchmarkDataReduction.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Benchmarks of the data reduction with synthetic data of realistic size
+(syntheticData.py):
+
+- sorting after the chopper (6 channels x 200 - 20000 samples)
+- loop average of the pump-probe values (500 delays x 20 loops)
+- MOKE signal and averaged hysteresis of AnalysisMOKE20
+- Gaussian fits of the beam stabilization (1024 x 1280 frames)
+- averaging of the spectra in SpectroPumpProbe
+
+Every group has one current implementation (the one used in the
+measurement) and the faster candidates (candidates.py). The result of every
+candidate is compared with the current one, the time is given relative to
+it. Run from the src\\benchmarks folder:
+
+    python benchmarkDataReduction.py [group ...]
+
+Every result is appended to "benchmarkResults.txt" (one JSON line with
+commit, computer, versions and times). A time more than
+BenchmarkParams['Tolerance'] slower than the last result of the same
+benchmark on the same computer is reported as REGRESSION.
+Benchmarks of modules that can not be imported on this computer (hardware
+libraries, GUI, pandas, scipy) are skipped.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+BenchmarkFolder = os.path.dirname(os.path.abspath(__file__))
+SourceFolder = os.path.dirname(BenchmarkFolder)
+for folder in (SourceFolder, os.path.join(SourceFolder, 'modules')):
+    if folder not in sys.path:
+        sys.path.append(folder)
+
+import syntheticData
+import candidates
+
+# Benchmark Settings
+# MinTime: minimal time of one measurement in s (the function is repeated
+# until it is reached), Runs: number of measurements (median and minimum
+# are reported), Tolerance: relative slow down reported as regression
+BenchmarkParams = {'MinTime': 0.1, 'Runs': 5, 'Tolerance': 0.2}
+ResultFile = os.path.join(BenchmarkFolder, 'benchmarkResults.txt')
+SampleSizes = [200, 2000, 20000]
+Delays = 500
+Loops = 20
+
+# if variable is True: results are appended to ResultFile
+bRecord = True
+
+Benchmarks = []
+
+
+def benchmark(group, name, sizes=(None,), bCurrent=False, rtol=1e-9):
+    """
+    Register a benchmark. The decorated function prepares the data of one
+    size and returns the function that is timed (its return value is
+    compared with the current implementation of the group).
+    :param group: name of the group (function that is benchmarked)
+    :param name: name of the implementation
+    :param sizes: sizes the benchmark is run with
+    :param bCurrent: implementation used in the measurement (reference)
+    :param rtol: relative tolerance of the comparison with the current
+    implementation
+    """
+
+    def decorator(setup):
+        Benchmarks.append({'group': group, 'name': name, 'sizes': sizes,
+                           'setup': setup, 'bCurrent': bCurrent,
+                           'rtol': rtol})
+        return setup
+    return decorator
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Sort after Chopper ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+@benchmark('sortAfterChopper', 'sortAfterChopperAllChannels', SampleSizes,
+           bCurrent=True)
+def sortAllChannels(samples):
+    import utilities
+
+    data = syntheticData.cardBlock(samples)
+
+    def run():
+        ChopperStats, Sanity = utilities.sortAfterChopperAllChannels(data, 3)
+        return ChopperStats
+    return run
+
+
+@benchmark('sortAfterChopper', 'sortAfterChopper per channel', SampleSizes)
+def sortPerChannel(samples):
+    import utilities
+
+    data = syntheticData.cardBlock(samples)
+
+    def run():
+        values = [utilities.sortAfterChopper(channel, data[3])
+                  for channel in data]
+        return {'Chop': np.array([value[0] for value in values]),
+                'UnChop': np.array([value[1] for value in values])}
+    return run
+
+
+@benchmark('sortAfterChopper', 'sortAfterChopperDot', SampleSizes)
+def sortDot(samples):
+    data = syntheticData.cardBlock(samples)
+
+    def run():
+        ChopperStats, Sanity = candidates.sortAfterChopperDot(data, 3)
+        return ChopperStats
+    return run
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Pump-Probe Loop Average ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def pumpProbeValues(delays, seed=0):
+    """
+    Chopped and unchopped values of every diode and field direction
+    :return: dictionary with the names of MokeExperiment (arrays)
+    """
+
+    random = np.random.RandomState(seed)
+    values = {}
+    for polarity in candidates.PPArrays.values():
+        for name, chop, unchop in polarity:
+            values[chop] = 1. + 0.01 * random.randn(delays)
+            values[unchop] = 1. + 0.01 * random.randn(delays)
+    return values
+
+
+# names of the pump-probe arrays (PP_Plus, MinusDiode_PP_Plus, ...)
+PPNames = [name for polarity in candidates.PPArrays.values()
+           for name, chop, unchop in polarity]
+
+
+def pumpProbeResult(arrays):
+    return {name: np.array(arrays[name]) for name in PPNames}
+
+
+@benchmark('calculatePPAverageLoop', 'MokeExperiment', [(Delays, Loops)],
+           bCurrent=True)
+def ppAverageCurrent(size):
+    import mokeExperiment
+
+    delays, loops = size
+    params = mokeExperiment.MokeParameters()
+    params.LoopParams['Loops'] = loops
+    experiment = mokeExperiment.MokeExperiment(params)
+    experiment.stageVector_mm = np.zeros(delays)
+    experiment.createSaveFrame()
+    experiment.initializeTransientArrays()
+    for name, value in pumpProbeValues(delays).items():
+        setattr(experiment, name, list(value))
+
+    def run():
+        for name in PPNames:
+            getattr(experiment, name)[:, 1] = 0.
+            experiment.PPStatistics[name].reset()
+        for Loop in range(1, loops + 1):
+            for Polarity_Field in (1, -1):
+                for Stage_idx in range(delays):
+                    experiment.Stage_idx = Stage_idx
+                    experiment.Stage_idx2 = delays - 1 - Stage_idx
+                    experiment.calculatePPAverageLoop(Polarity_Field)
+        return pumpProbeResult(vars(experiment))
+    return run
+
+
+@benchmark('calculatePPAverageLoop', 'calculatePPAverageLoopAllDelays',
+           [(Delays, Loops)])
+def ppAverageAllDelays(size):
+    from runningStatistics import RunningStatistics
+
+    delays, loops = size
+    arrays = pumpProbeValues(delays)
+    statistics = {}
+    for name in PPNames:
+        arrays[name] = np.zeros((delays, 2))
+        statistics[name] = RunningStatistics(delays)
+
+    def run():
+        for name in PPNames:
+            arrays[name][:, 1] = 0.
+            statistics[name].reset()
+        for Loop in range(1, loops + 1):
+            for Polarity_Field in (1, -1):
+                candidates.calculatePPAverageLoopAllDelays(
+                    arrays, statistics, Polarity_Field)
+        return pumpProbeResult(arrays)
+    return run
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) AnalysisMOKE20 ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def analysis():
+    """
+    :return: AnalysisMOKE20 module and a DataAnalysisMOKE without folders
+    """
+
+    import AnalysisMOKE20
+
+    return AnalysisMOKE20, AnalysisMOKE20.DataAnalysisMOKE.__new__(
+        AnalysisMOKE20.DataAnalysisMOKE)
+
+
+@benchmark('MOKE', 'DataAnalysisMOKE.MOKE', [(Delays, Loops)], bCurrent=True)
+def mokeCurrent(size):
+    import pandas as pd
+
+    AnalysisMOKE20, dataAnalysis = analysis()
+    frame = pd.DataFrame(syntheticData.allDataReduced(*size),
+                         columns=syntheticData.AllDataColumns)
+
+    def run():
+        AnalysisMOKE20.Information[0] = {}
+        # MOKE prints the key of every measurement and changes the frame
+        with contextlib.redirect_stdout(io.StringIO()):
+            MOKE_Data, Data_Average = dataAnalysis.MOKE({0: frame.copy()},
+                                                        t0=0.)
+        return (MOKE_Data[0].index.values,
+                MOKE_Data[0]['Diodesignal'].values)
+    return run
+
+
+@benchmark('MOKE', 'mokeAverage', [(Delays, Loops)])
+def mokeBinned(size):
+    columns = syntheticData.allDataReduced(*size)
+
+    def run():
+        return candidates.mokeAverage(columns, t0=0.)
+    return run
+
+
+@benchmark('averageHysteresis', 'DataAnalysisMOKE.averageHysteresis',
+           bCurrent=True)
+def hysteresisCurrent(size):
+    import pandas as pd
+
+    AnalysisMOKE20, dataAnalysis = analysis()
+    frame = pd.DataFrame(syntheticData.hysteresisSweep())
+
+    def run():
+        # the averaged values are not returned (no comparison)
+        AnalysisMOKE20.normHysteresis_all = {0: frame}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dataAnalysis.averageHysteresis()
+    return run
+
+
+@benchmark('averageHysteresis', 'averageHysteresisBinned')
+def hysteresisBinned(size):
+    data = syntheticData.hysteresisSweep()
+
+    def run():
+        return candidates.averageHysteresisBinned(data)
+    return run
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 5) Beam Stabilization ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def absoluteSigma(fits):
+    """
+    The sign of the fitted width is arbitrary (FWHM uses abs)
+    """
+
+    fits = np.array(fits, dtype=np.float64)
+    fits[:, 2] = np.abs(fits[:, 2])
+    return fits
+
+
+@benchmark('Gaussian fit', 'Beamstabilization_V2 fitGauss', [(1024, 1280)],
+           bCurrent=True, rtol=1e-4)
+def gaussCurrent(size):
+    import Beamstabilization_V2
+
+    worker = Beamstabilization_V2.Worker()
+    frame = syntheticData.cameraFrame(*size)
+
+    def run():
+        # sums and fits of updateMirrorDictionary
+        sumY = np.sum(frame, axis=1)
+        sumX = np.sum(frame, axis=0)
+        return absoluteSigma([worker.fitGauss(sumY, [10000, 0.001, 200]),
+                              worker.fitGauss(sumX, [10000, 0.001, 200])])
+    return run
+
+
+@benchmark('Gaussian fit', 'beamProfileFit', [(1024, 1280)], rtol=1e-4)
+def gaussStarted(size):
+    frame = syntheticData.cameraFrame(*size)
+
+    def run():
+        return absoluteSigma(candidates.beamProfileFit(frame))
+    return run
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 6) SpectroPumpProbe ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def spectroLoop(averagedSpectra, currentSpectra, spectraOfDelay, Loop):
+    """
+    Averaging of the measurement loop of SpectroPumpProbe (copy without
+    stage, spectrometer and GUI, the loop can not be imported without them)
+    """
+
+    repeat = len(spectraOfDelay(0))
+    wavenumber = currentSpectra.shape[0]
+    for Stage_idx in range(len(averagedSpectra)):
+        dataAverageRepeats = np.zeros((1, wavenumber))
+        spectraOfStage = spectraOfDelay(Stage_idx)
+        Repeat_Measurements = 0
+        while Repeat_Measurements < repeat:
+            data = spectraOfStage[Repeat_Measurements]
+            dataAverageRepeats = dataAverageRepeats + data
+            currentSpectra[:, 1] = currentSpectra[:, 1] + data
+            Repeat_Measurements = Repeat_Measurements + 1
+
+        data = dataAverageRepeats / repeat
+        currentSpectra[:, 1] = data
+
+        if Loop == 1:
+            averagedSpectra[Stage_idx, 1:] = data
+        else:
+            dataav = (averagedSpectra[Stage_idx, 1:] + data) / 2
+            averagedSpectra[Stage_idx, 1:] = dataav
+
+
+def spectroBenchmark(size, averageLoop):
+    """
+    :param size: delays, repeats, pixels
+    :param averageLoop: function averaging the spectra of one loop
+    :return: run function (second loop of a measurement)
+    """
+
+    delays, repeats, pixels = size
+    # spectra of 8 delays, repeated for all delays (memory)
+    pool = [syntheticData.spectra(repeats, pixels, seed)
+            for seed in range(8)]
+    averagedSpectra = np.zeros((delays, 1 + pixels))
+    currentSpectra = np.zeros((pixels, 2))
+
+    def run():
+        averagedSpectra[:, 1:] = 1000.
+        averageLoop(averagedSpectra, currentSpectra,
+                    lambda Stage_idx: pool[Stage_idx % len(pool)], 2)
+        return averagedSpectra.copy()
+    return run
+
+
+@benchmark('SpectroPumpProbe averaging', 'SpectroPumpProbe loop',
+           [(Delays, 30, 2048)], bCurrent=True)
+def spectroCurrent(size):
+    return spectroBenchmark(size, spectroLoop)
+
+
+@benchmark('SpectroPumpProbe averaging', 'averageSpectra',
+           [(Delays, 30, 2048)])
+def spectroMean(size):
+    return spectroBenchmark(size, candidates.averageSpectra)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 7) Timing, Comparison and Results ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def measure(run):
+    """
+    Time a function: it is repeated until one measurement takes at least
+    MinTime, Runs measurements are made.
+    :param run: function without parameters
+    :return: result of the first call, median and minimal time of one call
+    in s, number of calls per measurement
+    """
+
+    result = run()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        duration = time.perf_counter() - start
+        if duration >= BenchmarkParams['MinTime']:
+            break
+        number *= max(2, int(BenchmarkParams['MinTime'] / max(duration,
+                                                             1e-9)))
+
+    durations = [duration / number]
+    for _ in range(BenchmarkParams['Runs'] - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        durations.append((time.perf_counter() - start) / number)
+    return result, float(np.median(durations)), min(durations), number
+
+
+def isClose(result, reference, rtol):
+    """
+    Compare the results of two implementations (arrays, lists or
+    dictionaries, only the keys of both dictionaries are compared)
+    :return: True, if all values are equal within rtol
+    """
+
+    if isinstance(result, dict) and isinstance(reference, dict):
+        keys = set(result) & set(reference)
+        return bool(keys) and all(isClose(result[key], reference[key], rtol)
+                                  for key in keys)
+    if isinstance(result, (list, tuple)) and \
+            isinstance(reference, (list, tuple)):
+        return len(result) == len(reference) and \
+            all(isClose(a, b, rtol) for a, b in zip(result, reference))
+    result = np.asarray(result, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    return result.shape == reference.shape and \
+        bool(np.allclose(result, reference, rtol=rtol, atol=0.,
+                         equal_nan=True))
+
+
+def gitCommit():
+    """
+    :return: short hash of the checked out commit ('' without git)
+    """
+
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BenchmarkFolder,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def readResults():
+    """
+    :return: dictionary (computer, group, name, size) -> last result
+    """
+
+    results = {}
+    if not os.path.exists(ResultFile):
+        return results
+    with open(ResultFile) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            results[(entry['computer'], entry['group'], entry['name'],
+                     entry['size'])] = entry
+    return results
+
+
+def runBenchmarks(groups=None):
+    """
+    Run all benchmarks (of the groups), print the table and append the
+    results to ResultFile.
+    :param groups: list of group names (None: all groups)
+    :return: list of the results (dictionaries)
+    """
+
+    previous = readResults()
+    environment = {'time': time.strftime('%Y%m%d_%H%M%S'),
+                   'commit': gitCommit(), 'computer': platform.node(),
+                   'python': platform.python_version(),
+                   'numpy': np.__version__}
+
+    print('{:<40}{:<18}{:>10}{:>10}{:>9}  {:<10}{}'.format(
+        'Benchmark', 'Size', 'Median ms', 'Min ms', 'Speedup', 'Check',
+        'Last'))
+    results = []
+    for group in dict.fromkeys(entry['group'] for entry in Benchmarks):
+        if groups and group not in groups:
+            continue
+        print(group)
+        members = sorted([entry for entry in Benchmarks
+                          if entry['group'] == group],
+                         key=lambda entry: not entry['bCurrent'])
+        for size in members[0]['sizes']:
+            sizeName = 'x'.join(str(value) for value in np.ravel(size)) \
+                if size is not None else '-'
+            reference = None
+            for entry in members:
+                name = '  ' + entry['name']
+                try:
+                    run = entry['setup'](size)
+                    result, median, minimum, number = measure(run)
+                except ImportError as error:
+                    print('{:<40}{:<18}skipped ({})'.format(
+                        name[:39], sizeName, error))
+                    continue
+                except Exception as error:
+                    print('{:<40}{:<18}error ({}: {})'.format(
+                        name[:39], sizeName, type(error).__name__, error))
+                    continue
+
+                if entry['bCurrent']:
+                    reference = {'median': median, 'result': result}
+                    speedup, check = '1.00', ''
+                elif reference is not None:
+                    speedup = '{:.2f}'.format(reference['median'] / median)
+                    if result is None or reference['result'] is None:
+                        check = ''
+                    elif isClose(result, reference['result'], entry['rtol']):
+                        check = 'ok'
+                    else:
+                        check = 'DIFFERENT'
+                else:
+                    speedup, check = '', ''
+
+                record = dict(environment, group=group, name=entry['name'],
+                              size=sizeName, median=median, min=minimum,
+                              number=number)
+                last = previous.get((record['computer'], group,
+                                     entry['name'], sizeName))
+                change = ''
+                if last:
+                    relative = median / last['median'] - 1
+                    change = '{:+.0%}'.format(relative)
+                    if relative > BenchmarkParams['Tolerance']:
+                        change = 'REGRESSION ' + change + ' (' + \
+                            last['commit'] + ')'
+
+                print('{:<40}{:<18}{:>10.3f}{:>10.3f}{:>9}  {:<10}{}'.format(
+                    name[:39], sizeName, 1e3 * median, 1e3 * minimum,
+                    speedup, check, change))
+                results.append(record)
+
+    if bRecord and results:
+        with open(ResultFile, 'a') as f:
+            for record in results:
+                f.write(json.dumps(record) + '\n')
+    return results
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 8) Main ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def main():
+    """
+    main entry point. This gets called when it is not imported as a module.
+    The groups to run can be given as arguments (default: all groups).
+    """
+
+    runBenchmarks(sys.argv[1:] or None)
+
+
+if __name__ == '__main__':
+    main()
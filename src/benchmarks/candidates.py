@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+candidates.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Faster implementations of the data reduction, benchmarked against the
+current implementations in benchmarkDataReduction.py. Every candidate
+returns the same values as the implementation it replaces (checked by the
+benchmark), so it can be moved into the measurement code once it is faster
+on the measurement computer.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import numpy as np
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Sort after Chopper ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def sortAfterChopperDot(data, chopperChannel, threshold=2.):
+    """
+    Same result as utilities.sortAfterChopperAllChannels, the sums of the
+    chopped and unchopped values are calculated as one matrix product with
+    the masks (no temporary array of the size of data per mask). The values
+    are shifted by the mean of every channel before the squares are summed,
+    so the variance does not lose precision.
+    :param data: array (channels x samples) or (channels x blocks x samples)
+    :param chopperChannel: index of the chopper channel in data
+    :param threshold: chopper voltage separating chopped and unchopped
+    :return: ChopperStats, Sanity
+    """
+
+    data = np.asarray(data, dtype=np.float64)
+    chopper = data[chopperChannel]
+    masks = np.stack((chopper < threshold, chopper > threshold),
+                     axis=-1).astype(np.float64)
+
+    shifted = data - data.mean(axis=-1, keepdims=True)
+    count = masks.sum(axis=-2)
+    sums = np.matmul(shifted, masks)
+    squares = np.matmul(shifted * shifted, masks)
+
+    ChopperStats = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / count
+        variance = (squares - count * mean * mean) / (count - 1)
+        error = np.sqrt(np.maximum(variance, 0.) / count)
+    mean += data.mean(axis=-1, keepdims=True)
+
+    count = count.astype(np.int64)
+    for idx, name in enumerate(('Chop', 'UnChop')):
+        ChopperStats[name] = mean[..., idx]
+        ChopperStats[name + 'Error'] = error[..., idx]
+        ChopperStats[name + 'Count'] = count[..., idx]
+
+    Sanity = int(np.any(ChopperStats['ChopCount'] == 0) or
+                 np.any(ChopperStats['ChopCount'] !=
+                        ChopperStats['UnChopCount']))
+    return ChopperStats, Sanity
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Pump-Probe Loop Average ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# (PP array, chopped, unchopped) for each polarity, names of MokeExperiment
+PPArrays = {1: [('PP_Plus', 'diffDiodeChopPlus', 'diffDiodeUnChopPlus'),
+                ('MinusDiode_PP_Plus', 'MinusDiodeChop_plus',
+                 'MinusDiodeUnChop_plus'),
+                ('PlusDiode_PP_Plus', 'PlusDiodeChop_plus',
+                 'PlusDiodeUnChop_plus'),
+                ('RefDiode_PP_Plus', 'RefDiodeChop_plus',
+                 'RefDiodeUnChop_plus')],
+            -1: [('PP_Minus', 'diffDiodeChopMinus', 'diffDiodeUnChopMinus'),
+                 ('MinusDiode_PP_Minus', 'MinusDiodeChop_minus',
+                  'MinusDiodeUnChop_minus'),
+                 ('PlusDiode_PP_Minus', 'PlusDiodeChop_minus',
+                  'PlusDiodeUnChop_minus'),
+                 ('RefDiode_PP_Minus', 'RefDiodeChop_minus',
+                  'RefDiodeUnChop_minus')]}
+
+
+def calculatePPAverageLoopAllDelays(arrays, statistics, Polarity_Field):
+    """
+    MokeExperiment.calculatePPAverageLoop for all delays of a scan in one
+    step (after the last delay of the magnetic field direction). The values
+    of the negative field are measured on the return way of the stage, they
+    are added in reversed order.
+    :param arrays: dictionary of the arrays of MokeExperiment (PP arrays and
+    the chopped and unchopped values as arrays)
+    :param statistics: dictionary of RunningStatistics (PPStatistics)
+    :param Polarity_Field: direction of the magnetic field
+    """
+
+    for name, chop, unchop in PPArrays[1 if Polarity_Field > 0 else -1]:
+        value = arrays[chop] - arrays[unchop]
+        if Polarity_Field < 0:
+            value = value[::-1]
+        statistics[name].addAll(value)
+        arrays[name][:, 1] = statistics[name].mean
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) Analysis ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def mokeAverage(columns, t0=0.):
+    """
+    MOKE signal of AnalysisMOKE20.DataAnalysisMOKE.MOKE (MOKE_Average
+    'Diodesignal') without pandas: the values of every stage position are
+    averaged over all loops with np.bincount.
+    :param columns: dictionary of the columns of AllData_Reduced
+    :param t0: timeZero in ps
+    :return: stage positions - t0 (ascending), MOKE signal
+    """
+
+    position = np.asarray(columns['StagePosition'], dtype=np.float64) - t0
+    positions, index = np.unique(position, return_inverse=True)
+    signal = np.asarray(columns['Diodesignal'], dtype=np.float64)
+    chop = np.asarray(columns['Chopper']) > 0
+    plus = np.asarray(columns['MagneticField']) > 0
+
+    def average(select):
+        return (np.bincount(index[select], signal[select], len(positions)) /
+                np.bincount(index[select], minlength=len(positions)))
+
+    moke = (average(chop & plus) - average(~chop & plus)) - \
+        (average(chop & ~plus) - average(~chop & ~plus))
+    return positions, moke
+
+
+def averageHysteresisBinned(data):
+    """
+    Averaged hysteresis of AnalysisMOKE20.DataAnalysisMOKE.averageHysteresis
+    (results array), the mean of every voltage on the increasing and
+    decreasing branch is calculated with np.bincount instead of one mask per
+    voltage.
+    :param data: array of a hysteresis file (Voltage, Balanced Pumped,
+    Balanced Unpumped, ...)
+    :return: results (voltages x 6): voltage, pumped increasing, pumped
+    decreasing, unpumped increasing, unpumped decreasing, pumped increasing
+    (without offset)
+    """
+
+    data = np.array(data, dtype=np.float64)
+    data[:, 0] = np.round(data[:, 0], 6)
+    data1 = data[50:, :]
+
+    step = np.diff(data1[:, 0])
+    data1 = data1[1:, :]
+    currents, index = np.unique(data1[:, 0], return_inverse=True)
+    results = np.zeros((np.size(currents), 6))
+    results[:, 0] = currents
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for column, select in ((1, step > 0), (2, step < 0)):
+            count = np.bincount(index[select], minlength=len(currents))
+            for channel in (1, 2):
+                results[:, column + 2 * (channel - 1)] = np.bincount(
+                    index[select], data1[select, channel],
+                    len(currents)) / count
+    results[:, 5] = results[:, 1]
+
+    offset = np.mean(np.append(results[~np.isnan(results[:, 1]), 1],
+                               results[~np.isnan(results[:, 2]), 2]))
+    results[:, 1:5] -= offset
+    return results
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 5) Beam Stabilization ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def gaus(x, a, x0, sigma):
+    return a * np.exp(-(x - x0) ** 2 / (2 * sigma ** 2))
+
+
+def gaussMoments(profile):
+    """
+    Start values of the Gaussian fit from the profile: maximum, position of
+    the maximum and the width at half maximum (x axis as in fitGauss of the
+    beam stabilization: np.linspace(0, len, len))
+    :param profile: sum of the frame along one axis
+    :return: [a, x0, sigma]
+    """
+
+    profile = np.asarray(profile, dtype=np.float64)
+    x = np.linspace(0, len(profile), len(profile))
+    peak = np.argmax(profile)
+    above = np.nonzero(profile >= profile[peak] / 2.)[0]
+    sigma = max(x[above[-1]] - x[above[0]], 1.) / 2.354
+    return [profile[peak], x[peak], sigma]
+
+
+def fitGaussStarted(profile):
+    """
+    Gaussian fit of the beam stabilization (same model and data) started
+    at the values of gaussMoments, so the fit needs only a few iterations.
+    :param profile: sum of the frame along one axis
+    :return: [a, x0, sigma]
+    """
+
+    from scipy.optimize import curve_fit
+
+    x = np.linspace(0, len(profile), len(profile))
+    popt, pcov = curve_fit(gaus, x, profile, p0=gaussMoments(profile))
+    return popt
+
+
+def beamProfileFit(frame):
+    """
+    Sums and Gaussian fits of a camera frame as in updateMirrorDictionary
+    of the beam stabilization, with fitGaussStarted
+    :param frame: camera frame
+    :return: fit of SumY, fit of SumX
+    """
+
+    return (fitGaussStarted(np.sum(frame, axis=1)),
+            fitGaussStarted(np.sum(frame, axis=0)))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 6) Spectra ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def averageSpectra(averagedSpectra, currentSpectra, spectraOfDelay, Loop):
+    """
+    Averaging of the spectra of SpectroPumpProbe for all delays of one
+    loop: the repeats are averaged with one np.mean, the loop average is
+    calculated in place.
+    :param averagedSpectra: array (delays x 1 + pixels)
+    :param currentSpectra: array (pixels x 2), live spectrum
+    :param spectraOfDelay: function(Stage_idx) returning the spectra of a
+    delay (repeats x pixels)
+    :param Loop: current loop (starting with 1)
+    """
+
+    for Stage_idx in range(len(averagedSpectra)):
+        data = np.mean(spectraOfDelay(Stage_idx), axis=0)
+        currentSpectra[:, 1] = data
+        row = averagedSpectra[Stage_idx, 1:]
+        if Loop == 1:
+            row[:] = data
+        else:
+            row += data
+            row *= 0.5
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+syntheticData.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Generators for synthetic data of realistic size and layout for the
+benchmarks of the data reduction (benchmarkDataReduction.py):
+
+- blocks of the NI card (6 channels x samples, channel order of
+  ReadValues_ai)
+- the reduced values of a transient ("AllData_Reduced", loops x delays x
+  magnetic field directions x chopper states)
+- a hysteresis sweep (columns of the saved hysteresis files)
+- camera frames of the beam stabilization (Gaussian beam on a Basler chip)
+- spectra of the Ocean Optics spectrometer
+
+All generators take a seed, the same seed always returns the same data.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import numpy as np
+
+# Columns of AllData_Reduced as read by AnalysisMOKE20
+AllDataColumns = ['Diodesignal', 'MinusDiode', 'PlusDiode', 'ReferenzDiode',
+                  'Chopper', 'Background', 'StagePosition', 'Loops',
+                  'MagneticField']
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Measurement Card ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def cardBlock(samples, seed=0):
+    """
+    One block of the NI card, one value per laser shot. Channels: 0 balanced
+    Diode, 1 Diode-, 2 Magnetic Field, 3 Chopper (0 V chopped, 5 V
+    unchopped, alternating), 4 Diode+, 5 reference Diode
+    :param samples: number of values per channel (200 - 20000)
+    :param seed: seed of the random numbers
+    :return: array (6 x samples)
+    """
+
+    random = np.random.RandomState(seed)
+    chopper = np.zeros(samples)
+    chopper[1::2] = 5.
+    pumped = chopper < 2
+
+    data = np.empty((6, samples))
+    data[1] = 2. + 0.01 * random.randn(samples) - 0.002 * pumped
+    data[4] = 2. + 0.01 * random.randn(samples) + 0.002 * pumped
+    data[0] = data[4] - data[1] + 0.001 * random.randn(samples)
+    data[2] = 1. + 0.001 * random.randn(samples)
+    data[3] = chopper + 0.01 * random.randn(samples)
+    data[5] = 1.5 + 0.01 * random.randn(samples)
+    return data
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Transient ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def transientSignal(stageVector_ps, timeZero=0., tau=1.):
+    """
+    Demagnetization (step at timeZero with exponential recovery)
+    :param stageVector_ps: delays in ps
+    :return: array of the pump induced change (0 before timeZero)
+    """
+
+    delay = np.asarray(stageVector_ps, dtype=np.float64) - timeZero
+    signal = np.zeros(len(delay))
+    after = delay >= 0
+    signal[after] = -0.01 * (0.3 + 0.7 * np.exp(-delay[after] / tau))
+    return signal
+
+
+def allDataReduced(delays=500, loops=20, seed=0):
+    """
+    Reduced values of a transient in the order they are measured: for every
+    loop the positive field with the delays in ascending order, then the
+    negative field with the delays in descending order (measured on the
+    return way of the stage), for every delay the chopped and the unchopped
+    value.
+    :param delays: number of stage positions
+    :param loops: number of loops
+    :param seed: seed of the random numbers
+    :return: dictionary of AllDataColumns (arrays of
+    loops x 2 x delays x 2 rows)
+    """
+
+    random = np.random.RandomState(seed)
+    stageVector_ps = np.linspace(-5., 45., delays)
+    signal = transientSignal(stageVector_ps)
+
+    rows = loops * 2 * delays * 2
+    columns = {name: np.empty(rows) for name in AllDataColumns}
+    row = 0
+    for loop in range(1, loops + 1):
+        for field in (1., -1.):
+            order = slice(None) if field > 0 else slice(None, None, -1)
+            n = 2 * delays
+            part = slice(row, row + n)
+            chopper = np.tile([1., 0.], delays)
+            pumped = np.repeat(signal[order], 2) * chopper
+            columns['Diodesignal'][part] = \
+                field * (0.05 + pumped) + 0.001 * random.randn(n)
+            columns['MinusDiode'][part] = 2. + 0.01 * random.randn(n)
+            columns['PlusDiode'][part] = 2. + 0.01 * random.randn(n)
+            columns['ReferenzDiode'][part] = 1.5 + 0.01 * random.randn(n)
+            columns['Chopper'][part] = chopper
+            columns['Background'][part] = 0.
+            columns['StagePosition'][part] = \
+                np.repeat(stageVector_ps[order], 2)
+            columns['Loops'][part] = loop
+            columns['MagneticField'][part] = \
+                field * (1. + 0.001 * random.randn(n))
+            row += n
+    return columns
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) Hysteresis ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def hysteresisSweep(amplitude=5., stepWidth=0.05, loops=5, seed=0):
+    """
+    Hysteresis measured with a triangular voltage sweep 0 -> amplitude ->
+    -amplitude -> amplitude, the loops following each other. Columns as in
+    the saved hysteresis files (Voltage, Balanced Pumped, Balanced Unpumped,
+    referenceDiode closed, referenceDiode, Diode+ Pumped, Diode+ Unpumped,
+    Diode- Pumped, Diode- Unpumped)
+    :param amplitude: maximal voltage in V
+    :param stepWidth: voltage step in V
+    :param loops: number of loops
+    :param seed: seed of the random numbers
+    :return: array (points x 9)
+    """
+
+    random = np.random.RandomState(seed)
+    steps = int(round(amplitude / stepWidth))
+    up = np.arange(-steps, steps + 1) * stepWidth
+    voltage = np.concatenate(
+        [np.arange(0, steps) * stepWidth] +
+        [np.concatenate((up[::-1][:-1], up[:-1])) for _ in range(loops)] +
+        [up[-1:]])
+
+    # branch of the magnetization: down on the decreasing voltage
+    decreasing = np.append(False, np.diff(voltage) < 0)
+    coercive = np.where(decreasing, -0.5, 0.5) * amplitude
+    magnetization = np.tanh((voltage - coercive) / (0.1 * amplitude))
+
+    data = np.empty((len(voltage), 9))
+    data[:, 0] = voltage
+    data[:, 1] = 0.05 * magnetization + 0.001 * random.randn(len(voltage))
+    data[:, 2] = 0.06 * magnetization + 0.001 * random.randn(len(voltage))
+    data[:, 3:] = 1.5 + 0.01 * random.randn(len(voltage), 6)
+    return data
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 5) Camera and Spectrometer ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def cameraFrame(height=1024, width=1280, center=None, sigma=(80., 100.),
+                seed=0):
+    """
+    Frame of a Basler camera with a Gaussian beam, background and noise
+    :param height, width: size of the chip in pixels
+    :param center: (y, x) of the beam in pixels (default: middle of the chip)
+    :param sigma: (y, x) width of the beam in pixels
+    :param seed: seed of the random numbers
+    :return: array (height x width), 12 bit counts
+    """
+
+    random = np.random.RandomState(seed)
+    if center is None:
+        center = (height / 2. + 17.3, width / 2. - 23.7)
+    y = np.exp(-(np.arange(height) - center[0]) ** 2 / (2 * sigma[0] ** 2))
+    x = np.exp(-(np.arange(width) - center[1]) ** 2 / (2 * sigma[1] ** 2))
+    frame = 20. + 3000. * np.outer(y, x) + \
+        3. * random.randn(height, width)
+    return np.clip(np.round(frame), 0, 4095).astype(np.uint16)
+
+
+def spectra(repeats=30, pixels=2048, seed=0):
+    """
+    Spectra of the Ocean Optics spectrometer measured at one delay
+    :param repeats: number of spectra (MeasureParameters['Average'])
+    :param pixels: pixels of the spectrometer
+    :param seed: seed of the random numbers
+    :return: array (repeats x pixels) in counts
+    """
+
+    random = np.random.RandomState(seed)
+    wavelength = np.linspace(-1., 1., pixels)
+    spectrum = 1000. + 30000. * np.exp(-wavelength ** 2 / 0.05)
+    return spectrum + 30. * random.randn(repeats, pixels)
@@ -18,20 +18,122 @@ Python Package nidaqmx is provided by National Instruments
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 # ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-import nidaqmx
-from nidaqmx.constants import AcquisitionType
+try:
+    import nidaqmx
+    from nidaqmx.constants import AcquisitionType, SampleTimingType
+    from nidaqmx.errors import DaqError
+    from nidaqmx.stream_readers import AnalogMultiChannelReader
+except ImportError:
+    # without the NI driver only the Debug class and the simulated card
+    # (simulation.py) can be used
+    nidaqmx = None
+
+    class DaqError(Exception):
+        pass
 import numpy as np
+import threading
 import time as t
 from colorama import Style, Fore
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-# ~~~ 2) Class NIDAQ Communication ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Ring Buffer for continuous Acquisition ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RingBuffer_ai:
+    """
+    Preallocated ring buffer for a continuously running Analog Input Task.
+    The samples of all channels are stored in an array of shape
+    (channels, length). The buffer is filled from the every-N-samples callback
+    of nidaqmx (running in a thread of the driver) and read from the
+    measurement loop, therefore every access is protected by a lock.
+    """
+
+    def __init__(self, channels, length, samplesPerCallback):
+        """
+        :param channels: number of channels in the Task
+        :param length: number of samples per channel kept in the buffer
+        :param samplesPerCallback: number of samples read in each callback
+        """
+
+        self.buffer = np.zeros((channels, length), dtype=np.float64)
+        self.block = np.zeros((channels, samplesPerCallback), dtype=np.float64)
+        self.length = length
+        self.samplesPerCallback = samplesPerCallback
+        self.writeIdx = 0
+        self.totalSamples = 0
+        self.readout = np.zeros((channels, 0), dtype=np.float64)
+        self.reader = None
+        self.condition = threading.Condition()
+
+    def append(self, block):
+        """
+        Copy a block of new samples (channels x n) behind the newest entry.
+        If the end of the buffer is reached, writing continues at the start.
+        :param block: new samples
+        """
+
+        n = block.shape[1]
+        with self.condition:
+            if n > self.length:
+                block = block[:, -self.length:]
+                self.writeIdx = (self.writeIdx + n - self.length) % self.length
+            end = self.writeIdx + block.shape[1]
+            if end <= self.length:
+                self.buffer[:, self.writeIdx:end] = block
+            else:
+                first = self.length - self.writeIdx
+                self.buffer[:, self.writeIdx:] = block[:, :first]
+                self.buffer[:, :end - self.length] = block[:, first:]
+            self.writeIdx = end % self.length
+            self.totalSamples += n
+            self.condition.notify_all()
+
+    def newest(self, n):
+        """
+        Copy the newest n samples per channel in the order they were acquired
+        into the preallocated readout array. The readout array is reused and
+        overwritten by the next call.
+        :param n: number of samples per channel
+        :return: data (channels x n)
+        """
+
+        if self.readout.shape[1] != n:
+            self.readout = np.zeros((self.buffer.shape[0], n),
+                                    dtype=np.float64)
+        with self.condition:
+            start = self.writeIdx - n
+            if start >= 0:
+                self.readout[:] = self.buffer[:, start:self.writeIdx]
+            else:
+                self.readout[:, :-start] = self.buffer[:, start:]
+                self.readout[:, -start:] = self.buffer[:, :self.writeIdx]
+        return self.readout
+
+    def waitForSamples(self, n, timeout):
+        """
+        Block until n samples were acquired after the call.
+        :param n: number of new samples per channel
+        :param timeout: maximum waiting time in s
+        :return: True if the samples arrived in time
+        """
+
+        with self.condition:
+            goal = self.totalSamples + n
+            return self.condition.wait_for(
+                lambda: self.totalSamples >= goal, timeout)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Class NIDAQ Communication ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 class NI_CardCommunication:
     """
     Main Class Handeling the Communication between NIDAQ Measurement Cards.
     """
 
+    def __init__(self):
+        # stream reader and preallocated read array for each Analog Input
+        # Task, created with the first read of the task
+        self.readBuffers = {}
+
     def reset_device(self, Device):
         """
         Resets the device.
@@ -65,7 +167,7 @@ class NI_CardCommunication:
                 1000, sample_mode=AcquisitionType.CONTINUOUS)
         return task
 
-    def create_Task_ao0(self, chan, bTrig=True):
+    def create_Task_ao0(self, chan, bTrig=True, bOnDemand=False):
         """
         Create a Task which writes to Analog Output Channels
         :param chan: channels to include in the task. Can be a collection of
@@ -73,6 +175,9 @@ class NI_CardCommunication:
         :param bTrig: determines if measurement is supposed to be triggered by
         Trigger Input of DAQ card (PFI0) - here triggered by Laser, shifted by
         500µs
+        :param bOnDemand: no sample clock is configured, every write updates
+        the output immediately. The task has no buffer which could overflow
+        and can be kept open for the whole measurement.
         :return: Task
         """
 
@@ -80,6 +185,8 @@ class NI_CardCommunication:
         task.ao_channels.add_ao_voltage_chan(
             str(chan), min_val=-10, max_val=10,
             units=nidaqmx.constants.VoltageUnits.VOLTS)
+        if bOnDemand:
+            return task
         if bTrig:
             task.timing.cfg_samp_clk_timing(
             1000, source="PFI0", sample_mode=AcquisitionType.CONTINUOUS,
@@ -112,17 +219,204 @@ class NI_CardCommunication:
         """
         Read values for channels collected in task. The number of samples to be
         read are determined by the dictionary LoopParams['MeasurementPoints']
-        values
+        values.
+        The values are read with a stream reader directly into a preallocated
+        array that is reused for every read of the task (no new lists are
+        created), so the returned array is overwritten by the next read.
         :param task:
         :param LoopParams: number of points to measure
-        :return: data (list for each channel, length of measurementPoints)
+        :return: data (array channels x measurementPoints)
         """
 
-        data = task.read(
-            number_of_samples_per_channel=LoopParams['MeasurementPoints'])
+        N = LoopParams['MeasurementPoints']
+        reader, data = self.readBuffers.get(task.name, (None, None))
+        if reader is None or data.shape[1] != N:
+            reader = AnalogMultiChannelReader(task.in_stream)
+            data = np.zeros((task.number_of_channels, N), dtype=np.float64)
+            self.readBuffers[task.name] = (reader, data)
+
+        reader.read_many_sample(data, number_of_samples_per_channel=N)
         task.stop()
         return data
-        
+
+    def startStreaming_ai(self, task, LoopParams, bufferLength=10000,
+                          samplesPerCallback=20):
+        """
+        Start the Analog Input Task in streaming mode: the task keeps running
+        and every samplesPerCallback samples the new values are copied into a
+        preallocated ring buffer. The start trigger is therefore only awaited
+        once and not for every read.
+        :param task: Analog Input Task created by create_Task_ai
+        :param LoopParams: number of points to measure, the buffer holds at
+        least four reads
+        :param bufferLength: number of samples per channel in the ring buffer
+        :param samplesPerCallback: samples read from the driver in each
+        callback, determines the latency of ReadValues_ai_stream
+        :return: ringBuffer
+        """
+
+        length = max(bufferLength, 4*LoopParams['MeasurementPoints'])
+        ringBuffer = RingBuffer_ai(task.number_of_channels, length,
+                                   samplesPerCallback)
+        ringBuffer.reader = AnalogMultiChannelReader(task.in_stream)
+
+        def callback(task_handle, event_type, number_of_samples,
+                     callback_data):
+            ringBuffer.reader.read_many_sample(
+                ringBuffer.block, number_of_samples_per_channel=
+                ringBuffer.samplesPerCallback, timeout=0)
+            ringBuffer.append(ringBuffer.block)
+            return 0
+
+        task.register_every_n_samples_acquired_into_buffer_event(
+            samplesPerCallback, callback)
+        task.start()
+        return ringBuffer
+
+    def ReadValues_ai_stream(self, ringBuffer, LoopParams, timeout=10.):
+        """
+        Read values for all channels of a streaming task. Waits until
+        LoopParams['MeasurementPoints'] new values were acquired after the
+        call and returns them, the task is not stopped.
+        :param ringBuffer: returned by startStreaming_ai
+        :param LoopParams: number of points to measure
+        :param timeout: maximum waiting time in s (no laser trigger)
+        :return: data (array for each channel, length of measurementPoints)
+        """
+
+        N = LoopParams['MeasurementPoints']
+        if not ringBuffer.waitForSamples(N, timeout):
+            raise TimeoutError('No new samples in ring buffer, '
+                               'check trigger of measurement card!')
+        return ringBuffer.newest(N)
+
+    def stopStreaming_ai(self, task, ringBuffer):
+        """
+        Stop a streaming task and remove the callback. The task can be used
+        with ReadValues_ai afterwards.
+        :param task: Analog Input Task in streaming mode
+        :param ringBuffer: returned by startStreaming_ai
+        """
+
+        task.stop()
+        task.register_every_n_samples_acquired_into_buffer_event(
+            ringBuffer.samplesPerCallback, None)
+
+    def configureLaserTiming(self, task, sample_mode, samples,
+                             startTrigger="PFI0"):
+        """
+        Use the laser trigger (PFI0) as sample clock and start trigger of a
+        task.
+        :param task: Analog Input or Output Task
+        :param sample_mode: AcquisitionType.CONTINUOUS or FINITE
+        :param samples: buffer size (continuous) or number of samples (finite)
+        :param startTrigger: terminal of the start trigger
+        """
+
+        task.timing.cfg_samp_clk_timing(
+            1000, source="PFI0", sample_mode=sample_mode,
+            active_edge=nidaqmx.constants.Edge.RISING, samps_per_chan=samples)
+        task.triggers.start_trigger.cfg_dig_edge_start_trig(startTrigger)
+
+    def MeasureSweep(self, writingTask, readingTask, values, samplesPerValue,
+                     callback=None, startTrigger="PFI0"):
+        """
+        Write a complete sequence of values (f.e. the voltages of a hysteresis)
+        as one hardware timed waveform and read the Analog Input synchronously.
+        Both tasks are clocked by the laser, every value is held for
+        samplesPerValue laser shots. The tasks are only started once for the
+        whole sweep instead of once for every value.
+
+        Both tasks wait for the start trigger on their own PFI0 input. If the
+        cards are connected by RTSI, startTrigger="/Dev1/ao/StartTrigger"
+        starts the input exactly with the output, otherwise the first shots of
+        every value should be discarded by the caller.
+
+        Afterwards both tasks are set back to continuous timing (on demand
+        timing for an on demand output task) and can be used with WriteValues
+        and ReadValues_ai again.
+
+        :param writingTask: Analog Output Task (magnet)
+        :param readingTask: Analog Input Task, must not be streaming
+        :param values: values to write (V)
+        :param samplesPerValue: laser shots for every value
+        :param callback: called as callback(idx, block) after the block
+        (channels x samplesPerValue) of value idx was read
+        :param startTrigger: terminal of the start trigger for the input
+        :return: data (array channels x values x samplesPerValue)
+        """
+
+        bOnDemand = self.isOnDemand(writingTask)
+        waveform = self.Write_Waveform_36V6A(values, samplesPerValue)
+        steps = len(values)
+        N = steps * samplesPerValue
+        data = np.zeros((steps, readingTask.number_of_channels,
+                         samplesPerValue), dtype=np.float64)
+        reader = AnalogMultiChannelReader(readingTask.in_stream)
+
+        self.configureLaserTiming(readingTask, AcquisitionType.FINITE, N,
+                                  startTrigger)
+        self.configureLaserTiming(writingTask, AcquisitionType.FINITE, N)
+        try:
+            writingTask.write(waveform, auto_start=False)
+            readingTask.start()
+            writingTask.start()
+            for idx in range(steps):
+                reader.read_many_sample(
+                    data[idx], number_of_samples_per_channel=samplesPerValue,
+                    timeout=10.)
+                if callback:
+                    callback(idx, data[idx])
+            writingTask.wait_until_done(timeout=10.)
+        finally:
+            writingTask.stop()
+            readingTask.stop()
+            self.configureLaserTiming(readingTask, AcquisitionType.CONTINUOUS,
+                                      1000)
+            if bOnDemand:
+                writingTask.timing.samp_timing_type = \
+                    SampleTimingType.ON_DEMAND
+            else:
+                self.configureLaserTiming(
+                    writingTask, AcquisitionType.CONTINUOUS, 1000)
+
+        return data.transpose(1, 0, 2)
+
+    def MeasureFlyScan(self, readingTask, samples, startMotion):
+        """
+        Read a fixed number of laser shots while the stage moves continuously
+        (fly scan). The task is started first, startMotion is called when the
+        acquisition is running (f.e. it starts the position gathering of the
+        stage) and the number of shots acquired when startMotion returned
+        (the gathering is running) is returned, so the shots can be assigned
+        to the gathered positions. The uncertainty of this offset is the
+        latency of the reply to the start of the gathering (about one shot).
+
+        :param readingTask: Analog Input Task, must not be streaming
+        :param samples: number of laser shots to read
+        :param startMotion: function without arguments
+        :return: data (array channels x samples), offset
+        """
+
+        reader = AnalogMultiChannelReader(readingTask.in_stream)
+        data = np.zeros((readingTask.number_of_channels, samples),
+                        dtype=np.float64)
+        self.configureLaserTiming(readingTask, AcquisitionType.CONTINUOUS,
+                                  samples)
+        try:
+            readingTask.start()
+            startMotion()
+            offset = readingTask.in_stream.total_samp_per_chan_acquired
+            reader.read_many_sample(
+                data, number_of_samples_per_channel=samples,
+                timeout=samples/1000. + 10.)
+        finally:
+            readingTask.stop()
+            self.configureLaserTiming(readingTask, AcquisitionType.CONTINUOUS,
+                                      1000)
+
+        return data, offset
+
     def WriteDigitalValue(self, value, task):
         """
         write a value to the specified task
@@ -131,17 +425,31 @@ class NI_CardCommunication:
         """
 
         task.write(value, auto_start=True)
-        
+
+    def isOnDemand(self, task):
+        """
+        Check if a task uses on demand timing (no sample clock).
+        :param task:
+        :return: True for on demand timing
+        """
+
+        return task.timing.samp_timing_type == SampleTimingType.ON_DEMAND
+
     def WriteValues(self, task, value):
         """
         write a value to the specified task. Depending on the used power supply
         the calculation for the real value that is written to reach the
         goal value needs to be exchanged.
+        For on demand tasks a single sample is written, the output keeps the
+        value until the next write.
 
         :param value: value to write
         :param task: channels to write to
         """
 
+        if self.isOnDemand(task):
+            task.write(self.Write_Single_36V6A(value), auto_start=True)
+            return
         data_Write = self.Write_Constant_36V6A(value)
         task.write(data_Write, auto_start=True)
         task.stop()
@@ -221,6 +529,28 @@ class NI_CardCommunication:
         """
 
         return [value/0.6070497802]*1000
+
+    def Write_Single_36V6A(self, value):
+        """
+        Calculates the sample for the 36V - 6A Kepco Power Supply for an on
+        demand task.
+        :param value:
+        :return: single value
+        """
+
+        return value/0.6070497802
+
+    def Write_Waveform_36V6A(self, values, samplesPerValue):
+        """
+        Calculates the samples for the 36V - 6A Kepco Power Supply for a
+        sequence of values, every value is held for samplesPerValue samples.
+        :param values: sequence of values
+        :param samplesPerValue: number of samples for each value
+        :return: array with samples for the complete sequence
+        """
+
+        return np.repeat(np.asarray(values, dtype=np.float64)/0.6070497802,
+                         samplesPerValue)
         
     def Write_Zero(self):
         """
@@ -239,11 +569,208 @@ class NI_CardCommunication:
         :param task: task to close
         """
 
+        self.readBuffers.pop(task.name, None)
         task.close()
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-# ~~~ 2) Debug Class NI_CardCommunication ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) Task Manager ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class NI_TaskManager:
+    """
+    Keeps the Analog Input and Analog Output Task open for a complete
+    measurement series instead of resetting the devices and creating new tasks
+    for every measurement. The output task uses on demand timing, so no buffer
+    can overflow when many voltages are written.
+    The devices are only reset and the tasks recreated if a DaqError occurs.
+    Works with NI_CardCommunication and NI_CardCommunication_Debug.
+    """
+
+    def __init__(self, card, readingChannels, writingChannel, devices,
+                 bStreaming=True, settleTime=0.5):
+        """
+        :param card: NI_CardCommunication instance
+        :param readingChannels: Analog Input Channels, f.e. "Dev2/ai0:5"
+        :param writingChannel: Analog Output Channel, f.e. "Dev1/ao0"
+        :param devices: devices to reset, f.e. ["Dev1", "Dev2"]
+        :param bStreaming: run the input task continuously into a ring buffer
+        :param settleTime: time in s the magnetic field needs after the
+        output is written again by recover
+        """
+
+        self.card = card
+        self.readingChannels = readingChannels
+        self.writingChannel = writingChannel
+        self.devices = devices
+        self.bStreaming = bStreaming
+        self.readingTask = None
+        self.writingTask = None
+        self.ringBuffer = None
+        self.LoopParams = None
+        self.bOpen = False
+        # last value written to the output task, set again after a reset
+        self.lastValue = None
+        self.settleTime = settleTime
+
+    def open(self, LoopParams):
+        """
+        Reset the devices and create the tasks. Does nothing if the tasks are
+        already open.
+        :param LoopParams: number of points to measure
+        """
+
+        self.LoopParams = LoopParams
+        if self.bOpen:
+            return
+        for device in self.devices:
+            self.card.reset_device(device)
+        self.readingTask = self.card.create_Task_ai(self.readingChannels)
+        self.writingTask = self.card.create_Task_ao0(self.writingChannel,
+                                                     bOnDemand=True)
+        self.bOpen = True
+        self.startStreaming()
+
+    def startStreaming(self):
+        """
+        Start the ring buffer acquisition of the input task (streaming mode
+        only, if it is not already running).
+        """
+
+        if self.bStreaming and self.bOpen and self.ringBuffer is None:
+            self.ringBuffer = self.card.startStreaming_ai(self.readingTask,
+                                                          self.LoopParams)
+
+    def stopStreaming(self):
+        """
+        Stop the ring buffer acquisition of the input task.
+        """
+
+        if self.ringBuffer is not None:
+            ringBuffer, self.ringBuffer = self.ringBuffer, None
+            self.card.stopStreaming_ai(self.readingTask, ringBuffer)
+
+    def close(self):
+        """
+        Close both tasks.
+        """
+
+        if not self.bOpen:
+            return
+        self.bOpen = False
+        try:
+            self.stopStreaming()
+        finally:
+            self.card.CloseTask(self.writingTask)
+            self.card.CloseTask(self.readingTask)
+
+    def recover(self, error):
+        """
+        Reset the devices and recreate the tasks after a DaqError. The reset
+        sets the output to 0 V: the last value is written again and the
+        magnetic field can settle, so the next read measures with the same
+        field as before the error. If the value can not be written, the
+        DaqError is raised.
+        :param error: DaqError that occured
+        """
+
+        print(f'{Fore.RED}DAQ Error, resetting devices:{Style.RESET_ALL} ' +
+              str(error))
+        try:
+            self.close()
+        except DaqError:
+            pass
+        self.open(self.LoopParams)
+        if self.lastValue is not None:
+            self.card.WriteValues(self.writingTask, self.lastValue)
+            t.sleep(self.settleTime)
+
+    def read(self, LoopParams=None):
+        """
+        Read values for all channels of the input task. A DaqError is answered
+        with a device reset (the output is written again, see recover) and
+        the read is repeated once.
+        :param LoopParams: number of points to measure, defaults to the
+        LoopParams given to open
+        :return: data (array channels x measurementPoints)
+        """
+
+        if LoopParams is None:
+            LoopParams = self.LoopParams
+        try:
+            return self.readOnce(LoopParams)
+        except DaqError as error:
+            self.recover(error)
+            return self.readOnce(LoopParams)
+
+    def readOnce(self, LoopParams):
+        """
+        Read values for all channels of the input task without error handling.
+        :param LoopParams: number of points to measure
+        :return: data (array channels x measurementPoints)
+        """
+
+        if self.bStreaming:
+            return self.card.ReadValues_ai_stream(self.ringBuffer, LoopParams)
+        return self.card.ReadValues_ai(self.readingTask, LoopParams)
+
+    def write(self, value):
+        """
+        Write a value to the output task. A DaqError is answered with a device
+        reset and the write is repeated once.
+        :param value: value to write
+        """
+
+        try:
+            self.card.WriteValues(self.writingTask, value)
+        except DaqError as error:
+            self.recover(error)
+            self.card.WriteValues(self.writingTask, value)
+        self.lastValue = value
+
+    def sweep(self, values, samplesPerValue, callback=None):
+        """
+        Hardware timed sweep with MeasureSweep. Streaming is stopped for the
+        sweep and started again afterwards.
+        :param values: values to write
+        :param samplesPerValue: laser shots for every value
+        :param callback: called as callback(idx, block) for every value
+        :return: data (array channels x values x samplesPerValue)
+        """
+
+        self.stopStreaming()
+        try:
+            data = self.card.MeasureSweep(self.writingTask, self.readingTask,
+                                          values, samplesPerValue, callback)
+        except DaqError as error:
+            self.recover(error)
+            raise
+        finally:
+            self.startStreaming()
+        # the output keeps the last value of the sweep
+        self.lastValue = values[-1]
+        return data
+
+    def flyScan(self, samples, startMotion):
+        """
+        Read laser shots during a fly scan with MeasureFlyScan. Streaming is
+        stopped for the scan and started again afterwards.
+        :param samples: number of laser shots to read
+        :param startMotion: function starting the stage
+        :return: data (array channels x samples), offset
+        """
+
+        self.stopStreaming()
+        try:
+            return self.card.MeasureFlyScan(self.readingTask, samples,
+                                            startMotion)
+        except DaqError as error:
+            self.recover(error)
+            raise
+        finally:
+            self.startStreaming()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 5) Debug Class NI_CardCommunication ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 class NI_CardCommunication_Debug:
     """
     Debug class for NiDAQ. Methods are mirrord to call them without Hardware
@@ -256,12 +783,12 @@ class NI_CardCommunication_Debug:
     def reset_device(self, Device):
         print(f'{Fore.GREEN}Device{Style.RESET_ALL} '+str(Device)+' Reseted!')
 
-    def create_Task_ai(self, chan):
+    def create_Task_ai(self, chan, bTrig=True):
         print(f'{Fore.GREEN}Analog In Task created for Channel:'
               f'{Style.RESET_ALL} '+str(chan))
         return 0
 
-    def create_Task_ao0(self, chan):
+    def create_Task_ao0(self, chan, bTrig=True, bOnDemand=False):
         print(f'{Fore.GREEN}Analog OutTask created for Channel:'
               f'{Style.RESET_ALL} ' + str(chan))
         return 0
@@ -282,6 +809,37 @@ class NI_CardCommunication_Debug:
         data = data.transpose()
         return data
 
+    def startStreaming_ai(self, task, LoopParams, bufferLength=10000,
+                          samplesPerCallback=20):
+        print(f'{Fore.GREEN}Analog In Task started streaming{Style.RESET_ALL}')
+        length = max(bufferLength, 4*LoopParams['MeasurementPoints'])
+        return RingBuffer_ai(6, length, samplesPerCallback)
+
+    def ReadValues_ai_stream(self, ringBuffer, LoopParams, timeout=10.):
+        return self.ReadValues_ai(0, LoopParams)
+
+    def stopStreaming_ai(self, task, ringBuffer):
+        print(f'{Fore.GREEN}Analog In Task stopped streaming{Style.RESET_ALL}')
+
+    def MeasureSweep(self, writingTask, readingTask, values, samplesPerValue,
+                     callback=None, startTrigger="PFI0"):
+        print(f'{Fore.GREEN}NI Card wrote AO sweep of length: ' +
+              str(len(values)))
+        LoopParams = {'MeasurementPoints': samplesPerValue}
+        data = np.zeros((len(values), 6, samplesPerValue))
+        for idx in range(len(values)):
+            data[idx] = self.ReadValues_ai(readingTask, LoopParams)
+            if callback:
+                callback(idx, data[idx])
+        return data.transpose(1, 0, 2)
+
+    def MeasureFlyScan(self, readingTask, samples, startMotion):
+        print(f'{Fore.GREEN}NI Card read fly scan of length: ' +
+              str(samples))
+        startMotion()
+        LoopParams = {'MeasurementPoints': samples - samples % 2}
+        return self.ReadValues_ai(readingTask, LoopParams), 0
+
     def WriteDigitalValue(self, value, task):
         print(f'{Fore.GREEN}NI Card wrote digital value: '+str(value))
 
@@ -336,7 +894,7 @@ class NI_CardCommunication_Debug:
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
-# ~~~ 3) Main Entry Point ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 6) Main Entry Point ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 def main():
     """
     main entry point. This gets called when it is not imported as a module.
@@ -18,6 +18,7 @@ stages. The low-level interface XPS() is provided by Newport.
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 # ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 from XPS.XPS_ import XPS
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
 import sys
 from colorama import Style, Fore
@@ -25,6 +26,13 @@ from colorama import Style, Fore
 # globale Variablen
 StageParams_mm = {}
 Offset_mm = 75
+# timeout of the socket to the XPS [s], the XPS answers a move when it is
+# finished: longer moves (search for home, fly scan) extend it for the move
+Timeout = 20
+HomeTimeout = 120
+# number of gathered positions read from the XPS with one command (the
+# length of a reply of the XPS is limited, finishFlyScan)
+GatheringChunk = 500
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 # ~~~ 2) Class Stage Communication ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
@@ -44,6 +52,11 @@ class StageCommunication():
 
         self.groupname = groupname
         self.positionername = '.'+str(positionername)
+        # single worker thread for moves started with moveStage_async
+        self.moveExecutor = None
+        # last commanded (and confirmed by the XPS) position in mm, None if
+        # it is not known and needs to be asked from the XPS
+        self.position = None
     
     def connectStage(self):
         """
@@ -54,7 +67,8 @@ class StageCommunication():
         """
 
         self.myxps = XPS()
-        self.socketId = self.myxps.TCP_ConnectToServer(b'10.10.1.2', 5001, 20)
+        self.socketId = self.myxps.TCP_ConnectToServer(b'10.10.1.2', 5001,
+                                                      Timeout)
         XPS.TCP_ConnectToServer
         if self.socketId == -1:
             print('Connection to XPS failed, check IP & Port')
@@ -71,72 +85,316 @@ class StageCommunication():
         Search for Home
         """
 
-        [errorCode, returnString] =\
-            self.myxps.GroupHomeSearch(self.socketId, self.group)
+        [errorCode, returnString] = self.callWithTimeout(
+            HomeTimeout, self.myxps.GroupHomeSearch, self.socketId,
+            self.group)
+        self.position = None
+
+    def callWithTimeout(self, timeout, function, *args):
+        """
+        Call a command of the XPS with a longer timeout of the socket than
+        Timeout (f.e. a move, which is answered when it is finished).
+        :param timeout: timeout for this command [s]
+        :param function: function of the XPS interface (or of this class)
+        :return: return value of function
+        """
+
+        self.myxps.TCP_SetTimeout(self.socketId, timeout)
+        try:
+            return function(*args)
+        finally:
+            self.myxps.TCP_SetTimeout(self.socketId, Timeout)
 
     def moveStage_absolute(self, value):
         """
         Move stage about an absolute value. This step is moved independent from
         the current Position.
         Steps to move = value
+        The XPS answers when the move is finished, then the position is kept
+        as cached position.
         :param value: absolute move value [mm]
+        :return: error code of the XPS (0: moved)
         """
 
         [errorCode, returnString] = \
             self.myxps.GroupMoveAbsolute(self.socketId, self.positioner, [value])
         if errorCode != 0:
             print("Error: ", returnString)
+            self.position = None
+        else:
+            self.position = float(value)
+        return errorCode
 
-    def moveStage(self, RelativeMoveX):
+    def moveStage_relative(self, value):
         """
-        Move Stage relative to current position. The current Position is called
-        and the movement necessary to reach the new position is calculated by:
-        StepsToMove = RelativeMoveX - currentPosition
-        :param RelativeMoveX [mm]
+        Move stage about a value relative to the current position without
+        asking for the current position first (one exchange with the XPS).
+        :param value: relative move value [mm]
         """
 
-        [errorCode, currentPosition] = \
-            self.myxps.GroupPositionCurrentGet(self.socketId,
-                                               self.positioner, 1)
+        [errorCode, returnString] = \
+            self.myxps.GroupMoveRelative(self.socketId, self.positioner,
+                                         [value])
         if errorCode != 0:
             print("Error: ", returnString)
+            self.position = None
+        elif self.position is not None:
+            self.position += float(value)
+
+    def moveStage(self, RelativeMoveX):
+        """
+        Move Stage to the position RelativeMoveX. The move is done with one
+        absolute move, the current position is not asked first (no rounding
+        drift from summed up relative moves).
+        :param RelativeMoveX [mm]
+        """
 
         try:
-            self.myxps.GroupMoveRelative(
-            self.socketId, self.positioner,
-            [(float(RelativeMoveX) - float(currentPosition))])
+            self.moveStage_absolute(float(RelativeMoveX))
         except ValueError:
             pass
 
+    def moveStage_async(self, RelativeMoveX):
+        """
+        Start moveStage in a worker thread and return immediately, so the
+        measured data can be processed while the stage is moving. Moves are
+        executed one after the other in the order they were started. No other
+        command should be send to the stage until the move is finished.
+        :param RelativeMoveX [mm]
+        :return: Future, result() blocks until the stage reached the position
+        """
+
+        if self.moveExecutor is None:
+            self.moveExecutor = ThreadPoolExecutor(max_workers=1)
+        return self.moveExecutor.submit(self.moveStage, RelativeMoveX)
+
+    def prepareFlyScan(self, start, end, velocity):
+        """
+        Prepare a fly scan: the stage moves continuously with constant
+        velocity from start to end while the XPS latches the position for
+        every pulse on the TRIG IN input (laser trigger). The stage is moved
+        in front of start, so it has reached the velocity at start, and the
+        external gathering of the positions is configured. At the end of the
+        travel range the run-up is shortened to the travel limits (the stage
+        still accelerates at the first delays, the latched positions stay
+        correct).
+        :param start: first position of the scan [mm]
+        :param end: last position of the scan [mm]
+        :param velocity: velocity during the scan [mm/s]
+        :return: duration of the scan [s], 0 if the scan can not be done
+        """
+
+        positioner = self.positioner.decode()
+        self.flyParams = self.myxps.PositionerSGammaParametersGet(
+            self.socketId, positioner)
+        if self.flyParams[0] != 0:
+            print("Error: ", self.flyParams[1])
+            return 0
+        [errorCode, oldVelocity, acceleration, minJerk, maxJerk] = \
+            self.flyParams
+        limits = self.myxps.PositionerUserTravelLimitsGet(self.socketId,
+                                                          positioner)
+        if limits[0] != 0:
+            print("Error: ", limits[1])
+            return 0
+        [errorCode, minimum, maximum] = limits
+        if min(start, end) < minimum or max(start, end) > maximum:
+            print("Error: fly scan from", start, "mm to", end,
+                  "mm outside of the travel limits", minimum, "mm to",
+                  maximum, "mm")
+            return 0
+
+        direction = np.sign(end - start)
+        runUp = velocity**2/(2*acceleration) + velocity*maxJerk
+        flyStart = float(np.clip(start - direction*runUp, minimum, maximum))
+        self.flyEnd = float(np.clip(end + direction*runUp, minimum, maximum))
+        if self.moveStage_absolute(flyStart) != 0:
+            return 0
+        [errorCode, returnString] = self.myxps.PositionerSGammaParametersSet(
+            self.socketId, positioner, velocity, acceleration, minJerk,
+            maxJerk)
+        if errorCode != 0:
+            print("Error: ", returnString)
+            return 0
+        [errorCode, returnString] = \
+            self.myxps.GatheringExternalConfigurationSet(
+                self.socketId, [positioner + '.ExternalLatchPosition'])
+        if errorCode != 0:
+            print("Error: ", returnString)
+            self.myxps.PositionerSGammaParametersSet(
+                self.socketId, positioner, oldVelocity, acceleration,
+                minJerk, maxJerk)
+            return 0
+
+        self.flyDuration = abs(self.flyEnd - flyStart)/velocity + \
+            2*velocity/acceleration
+        return self.flyDuration
+
+    def startFlyScan(self, shots):
+        """
+        Start the external gathering of the positions and the continuous move
+        of a fly scan prepared with prepareFlyScan.
+        :param shots: maximum number of positions to gather
+        :return: Future, result() blocks until the stage reached the end and
+        is the error code of the XPS (0: scan done)
+        """
+
+        self.myxps.EventExtendedConfigurationTriggerSet(
+            self.socketId, ['Always'], ['0'], ['0'], ['0'], ['0'])
+        self.myxps.EventExtendedConfigurationActionSet(
+            self.socketId, ['ExternalGatheringRun'], [str(int(shots))], ['1'],
+            ['0'], ['0'])
+        [errorCode, self.flyEventID] = \
+            self.myxps.EventExtendedStart(self.socketId)
+        if errorCode != 0:
+            # no positions are gathered: the stage is not moved
+            print("Error: ", self.flyEventID)
+            self.flyEventID = None
+            future = Future()
+            future.set_result(errorCode)
+            return future
+
+        if self.moveExecutor is None:
+            self.moveExecutor = ThreadPoolExecutor(max_workers=1)
+        # the XPS answers the move at the end of the scan, which can take
+        # longer than the timeout of the socket
+        return self.moveExecutor.submit(
+            self.callWithTimeout, Timeout + self.flyDuration,
+            self.moveStage_absolute, self.flyEnd)
+
+    def finishFlyScan(self):
+        """
+        Read the positions latched during a fly scan, remove the gathering
+        event and reset the velocity of the stage.
+        :return: positions (array, one entry for every laser shot) [mm]
+        """
+
+        [errorCode, current, maximum] = \
+            self.myxps.GatheringExternalCurrentNumberGet(self.socketId)
+        # one line per laser shot: GatheringChunk lines are read with one
+        # command, lines that can not be read are NaN (shot discarded)
+        positions = np.full(current, np.nan)
+        failed = 0
+        for first in range(0, current, GatheringChunk):
+            lines = min(GatheringChunk, current - first)
+            [errorCode, values] = \
+                self.myxps.GatheringExternalDataMultipleLinesGetArray(
+                    self.socketId, first, lines)
+            if errorCode != 0:
+                failed += lines
+                continue
+            positions[first:first + lines] = values[:, 0]
+        if failed:
+            print("Error: ", failed, " gathered positions not read")
+
+        if self.flyEventID is not None:
+            self.myxps.EventExtendedRemove(self.socketId, self.flyEventID)
+        [errorCode, velocity, acceleration, minJerk, maxJerk] = self.flyParams
+        self.myxps.PositionerSGammaParametersSet(
+            self.socketId, self.positioner.decode(), velocity, acceleration,
+            minJerk, maxJerk)
+        return positions
+
     def setStageParams(self, Stage_SpeedParams):
         """
         Set the Velocity and Acceleration of the Stage.
         :param Stage_SpeedParams['Velocity' [mm/s], 'Acceleration' [mm/s^2]]:
         """
 
-        self.myxps.GroupJogParametersSet(self.socketId, self.group,
-                                         Stage_SpeedParams['Velocity'],
-                                         Stage_SpeedParams['Acceleration'])
+        # the XPS interface expects one value per positioner of the group
+        self.myxps.GroupJogParametersSet(
+            self.socketId, self.group, [float(Stage_SpeedParams['Velocity'])],
+            [float(Stage_SpeedParams['Acceleration'])])
 
-    def getCurrPos(self):
+    def getStatus(self):
+        """
+        Ask stage for current position, motion status and group status in one
+        exchange with the XPS (the three commands are send without waiting
+        for the replies in between).
+        :return: dictionary 'Position' [mm], 'MotionStatus' (0: not moving),
+        'GroupStatus' (XPS status code, 10-19: ready), 'Error' (first error
+        code not 0, else 0)
         """
-        Ask stage for current position in mm.
+
+        group = self.group.decode()
+        replies = self.myxps.BatchSendAndReceive([
+            (self.socketId, 'GroupPositionCurrentGet(' +
+             self.positioner.decode() + ',double *)'),
+            (self.socketId, 'GroupMotionStatusGet(' + group + ',int *)'),
+            (self.socketId, 'GroupStatusGet(' + group + ',int *)')])
+
+        status = {'Position': float('nan'), 'MotionStatus': -1,
+                  'GroupStatus': -1, 'Error': 0}
+        for key, [errorCode, returnString] in zip(
+                ['Position', 'MotionStatus', 'GroupStatus'], replies):
+            if errorCode != 0:
+                print("Error: ", returnString)
+                status['Error'] = status['Error'] or errorCode
+                continue
+            status[key] = type(status[key])(returnString.split(',')[0])
+        if status['Error'] == 0:
+            self.position = status['Position']
+        return status
+
+    def moveTogether(self, stages, positions):
+        """
+        Move this stage and other stages (f.e. the delay stage and the
+        waveplate) at the same time to absolute positions. Every stage uses
+        its own socket, the move commands are send without waiting, so the
+        XPS executes the moves in parallel. Returns when all moves are
+        finished.
+        :param stages: other StageCommunication objects
+        :param positions: absolute positions [mm], first for this stage, then
+        one for each of the other stages
+        :return: list of errorCodes
+        """
+
+        commands = [(stage.socketId, 'GroupMoveAbsolute(' +
+                     stage.positioner.decode() + ',' + str(float(position)) +
+                     ')')
+                    for stage, position in zip([self] + list(stages),
+                                               positions)]
+        replies = self.myxps.BatchSendAndReceive(commands)
+        for stage, position, [errorCode, returnString] in zip(
+                [self] + list(stages), positions, replies):
+            if errorCode != 0:
+                print("Error: ", returnString)
+                stage.position = None
+            else:
+                stage.position = float(position)
+        return [errorCode for errorCode, returnString in replies]
+
+    def getCurrPos(self, bRefresh=False):
+        """
+        Current position in mm. The position cached from the last move is
+        returned, the stage is only asked if the position is not known or
+        bRefresh is True.
+        :param bRefresh: ask the XPS for the position
         :return: currentPosition
         """
 
+        if self.position is not None and not bRefresh:
+            return self.position
+
         [errorCode, currentPosition] = \
             self.myxps.GroupPositionCurrentGet(self.socketId,
                                                self.positioner, 1)
         if errorCode != 0:
-            print("Error: ", returnString)
-        return currentPosition
+            print("Error: ", currentPosition)
+            return currentPosition
+        self.position = float(currentPosition)
+        return self.position
 
     def closeStage(self):
         """
         Close Communication, kill the group of the Stage and free the XPS
-        socket.
+        socket. Waits for moves started with moveStage_async.
         """
-    
+
+        if self.moveExecutor is not None:
+            self.moveExecutor.shutdown(wait=True)
+            self.moveExecutor = None
+        self.position = None
         self.myxps.GroupKill(self.socketId, self.group)
         self.myxps.TCP_CloseSocket(self.socketId)
 
@@ -228,16 +486,51 @@ class StageCommunication_Debug():
     def moveStage_absolute(self, value):
         print(f'{Fore.GREEN}Stage: Moved absolute{Style.RESET_ALL}')
 
+    def moveStage_relative(self, value):
+        print(f'{Fore.GREEN}Stage: Moved relative{Style.RESET_ALL}')
+
     def setStageParams(self, Stage_SpeedParams):
         print(f'{Fore.GREEN}Stage: did set Parameters{Style.RESET_ALL}')
 
-    def getCurrPos(self):
+    def getCurrPos(self, bRefresh=False):
         print(f'{Fore.GREEN}Stage: got current Position{Style.RESET_ALL}')
         return -100
 
+    def getStatus(self):
+        print(f'{Fore.GREEN}Stage: got status{Style.RESET_ALL}')
+        return {'Position': -100., 'MotionStatus': 0, 'GroupStatus': 12,
+                'Error': 0}
+
+    def moveTogether(self, stages, positions):
+        print(f'{Fore.GREEN}Stage: Moved together with ' + str(len(stages)) +
+              f' stages{Style.RESET_ALL}')
+        return [0]*len(positions)
+
     def moveStage(self, RelativeMoveX):
         print(f'{Fore.GREEN}Stage: Moved relative{Style.RESET_ALL}')
 
+    def moveStage_async(self, RelativeMoveX):
+        self.moveStage(RelativeMoveX)
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def prepareFlyScan(self, start, end, velocity):
+        print(f'{Fore.GREEN}Stage: prepared fly scan{Style.RESET_ALL}')
+        self.flyScan = (start, end)
+        return abs(end - start)/velocity
+
+    def startFlyScan(self, shots):
+        print(f'{Fore.GREEN}Stage: started fly scan{Style.RESET_ALL}')
+        self.flyShots = int(shots)
+        future = Future()
+        future.set_result(0)
+        return future
+
+    def finishFlyScan(self):
+        print(f'{Fore.GREEN}Stage: finished fly scan{Style.RESET_ALL}')
+        return np.linspace(self.flyScan[0], self.flyScan[1], self.flyShots)
+
     def closeStage(self):
         print(f'{Fore.GREEN}Stage: Closed Connection{Style.RESET_ALL}')
 
@@ -6,6 +6,7 @@
 
 __next__ = next
 import socket
+import numpy as np
 from builtins import str
 from builtins import range
 from builtins import object
@@ -24,48 +25,113 @@ class Iterator(object):
 class XPS(object):
     # Defines
     MAX_NB_SOCKETS = 100
+    END_OF_API = b',EndOfAPI'
+    RECV_SIZE = 65536
 
     # Global variables
     __sockets = {}
     __usedSockets = {}
+    __buffers = {}
+    __pending = {}
     __nbSockets = 0
 
     # Initialization Function
 
 
     def __init__(self):
-        XPS.__nbSockets = 0
-        for socketId in range(self.MAX_NB_SOCKETS):
-            XPS.__usedSockets[socketId] = 0
+        # the socket pool is shared by all instances, only initialize it once
+        # (otherwise a second instance takes over the sockets of the first)
+        if (len(XPS.__usedSockets) == 0):
+            XPS.__nbSockets = 0
+            for socketId in range(self.MAX_NB_SOCKETS):
+                XPS.__usedSockets[socketId] = 0
     
         # Send command and get return
     
     
     def __sendAndReceive(self, socketId, command):
         try:
-            
             XPS.__sockets[socketId].send(command.encode())
-            ret = XPS.__sockets[socketId].recv(1024)
-            
-            value=ret.find(b',EndOfAPI')
-            ret=ret.decode()
-
-            while (value == -1):
-                ret += XPS.__sockets[socketId].recv(1024)
-                
+            self.__skipPending(socketId)
+            ret = self.__receiveFrame(socketId)
         except socket.timeout:
-           return [-2, '']
+            XPS.__pending[socketId] = XPS.__pending.get(socketId, 0) + 1
+            return [-2, '']
         except socket.error as errString:
-            print('Socket error : ' + errString)
-           
-        for i in range(len(ret)):
-            if (ret[i] == ','):
-               # print([int(ret[0:i]), ret[i + 1:-9]])
-                return [int(ret[0:i]), ret[i + 1:-9]]
-            
-     #   return[]
-     #           
+            print('Socket error : ' + str(errString))
+            self.__resetBuffer(socketId)
+            return [-2, '']
+
+        i = ret.find(',')
+        return [int(ret[0:i]), ret[i + 1:]]
+
+
+    # The reply of a command which timed out still arrives later on the socket. The number of these replies is kept
+    # in __pending and they are read and dropped before the reply of the next command, so the replies stay in step
+    # with the commands (otherwise every following command gets the reply of the one before).
+    def __skipPending(self, socketId):
+        while (XPS.__pending.get(socketId, 0) > 0):
+            self.__receiveFrame(socketId)
+            XPS.__pending[socketId] -= 1
+
+
+    # After a socket error the state of the connection is unknown: drop the received data and the pending replies.
+    def __resetBuffer(self, socketId):
+        XPS.__buffers[socketId] = bytearray()
+        XPS.__pending[socketId] = 0
+
 
+    # Read one reply terminated by ',EndOfAPI' from the buffer of the socket.
+    # Data received behind the terminator stays in the buffer for the next
+    # reply, the buffer is only scanned from where the last search stopped.
+    def __receiveFrame(self, socketId):
+        buffer = XPS.__buffers.setdefault(socketId, bytearray())
+        start = 0
+        end = buffer.find(XPS.END_OF_API)
+        while (end == -1):
+            start = max(0, len(buffer) - len(XPS.END_OF_API) + 1)
+            chunk = XPS.__sockets[socketId].recv(XPS.RECV_SIZE)
+            if not chunk:
+                raise socket.error('connection closed by XPS')
+            buffer += chunk
+            end = buffer.find(XPS.END_OF_API, start)
+
+        with memoryview(buffer) as view:
+            ret = str(view[:end], 'utf-8')
+        del buffer[:end + len(XPS.END_OF_API)]
+        return ret
+
+
+    # BatchSendAndReceive :  Send several commands without waiting for the replies in between. commandList holds
+    # (socketId, command) pairs, the commands can use one or several sockets. The replies are collected in the order
+    # of the commands as [error, returnedString]. Commands on different sockets are executed in parallel by the XPS
+    # (f.e. moves of different groups), commands on one socket one after the other.
+    def BatchSendAndReceive(self, commandList):
+        for socketId, command in commandList:
+            if (XPS.__usedSockets[socketId] == 0):
+                return [[-1, ''] for command in commandList]
+    
+        replies = []
+        try:
+            for socketId, command in commandList:
+                XPS.__sockets[socketId].send(command.encode())
+            for socketId in set(socketId for socketId, command in commandList):
+                self.__skipPending(socketId)
+            for socketId, command in commandList:
+                ret = self.__receiveFrame(socketId)
+                i = ret.find(',')
+                replies.append([int(ret[0:i]), ret[i + 1:]])
+        except socket.timeout:
+            for socketId, command in commandList[len(replies):]:
+                XPS.__pending[socketId] = XPS.__pending.get(socketId, 0) + 1
+            return replies + [[-2, ''] for idx in range(len(commandList) - len(replies))]
+        except socket.error as errString:
+            print('Socket error : ' + str(errString))
+            for socketId in set(socketId for socketId, command in commandList):
+                self.__resetBuffer(socketId)
+            return replies + [[-2, ''] for idx in range(len(commandList) - len(replies))]
+    
+        return replies
     
     
     # TCP_ConnectToServer
@@ -81,13 +147,16 @@ class XPS(object):
     
         XPS.__usedSockets[socketId] = 1
         XPS.__nbSockets += 1
+        XPS.__buffers[socketId] = bytearray()
+        XPS.__pending[socketId] = 0
         
         
         try:
             XPS.__sockets[socketId] = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             XPS.__sockets[socketId].connect((IP, port))
-            XPS.__sockets[socketId].settimeout(timeOut)
+            # setblocking(1) removes the timeout (same as settimeout(None)), so it has to be called first
             XPS.__sockets[socketId].setblocking(1)
+            XPS.__sockets[socketId].settimeout(timeOut)
         except socket.error:
             return -1
 
@@ -105,6 +174,8 @@ class XPS(object):
         if (socketId >= 0 and socketId < self.MAX_NB_SOCKETS):
             try:
                 XPS.__sockets[socketId].close()
+                XPS.__buffers.pop(socketId, None)
+                XPS.__pending.pop(socketId, None)
                 XPS.__usedSockets[socketId] = 0
                 XPS.__nbSockets -= 1
             except socket.error:
@@ -294,7 +365,6 @@ class XPS(object):
             return
     
         command = 'ErrorStringGet(' + str(ErrorCode) + ',char *)'
-        command=command.encode()
         [error, returnedString] = self.__sendAndReceive(socketId, command)
         return [error, returnedString]
     
@@ -678,6 +748,19 @@ class XPS(object):
         return [error, returnedString]
     
     
+    # GatheringDataMultipleLinesGetArray :  Get multiple data lines from gathering buffer as array (lines x gathered types)
+    def GatheringDataMultipleLinesGetArray(self, socketId, IndexPoint, NumberOfLines):
+        if (XPS.__usedSockets[socketId] == 0):
+            return
+    
+        [error, returnedString] = self.GatheringDataMultipleLinesGet(socketId, IndexPoint, NumberOfLines)
+        if (error != 0):
+            return [error, returnedString]
+    
+        values = np.array(returnedString.replace(';', ' ').split(), dtype=np.float64)
+        return [error, values.reshape(NumberOfLines, -1)]
+    
+    
     # GatheringReset :  Empty the gathered data in memory to start new gathering from scratch
     def GatheringReset(self, socketId):
         if (XPS.__usedSockets[socketId] == 0):
@@ -774,6 +857,29 @@ class XPS(object):
         return [error, returnedString]
     
     
+    # GatheringExternalDataMultipleLinesGet :  Get multiple data lines from external gathering buffer
+    def GatheringExternalDataMultipleLinesGet(self, socketId, IndexPoint, NumberOfLines):
+        if (XPS.__usedSockets[socketId] == 0):
+            return
+    
+        command = 'GatheringExternalDataMultipleLinesGet(' + str(IndexPoint) + ',' + str(NumberOfLines) + ',char *)'
+        [error, returnedString] = self.__sendAndReceive(socketId, command)
+        return [error, returnedString]
+    
+    
+    # GatheringExternalDataMultipleLinesGetArray :  Get multiple data lines from external gathering buffer as array (lines x gathered types)
+    def GatheringExternalDataMultipleLinesGetArray(self, socketId, IndexPoint, NumberOfLines):
+        if (XPS.__usedSockets[socketId] == 0):
+            return
+    
+        [error, returnedString] = self.GatheringExternalDataMultipleLinesGet(socketId, IndexPoint, NumberOfLines)
+        if (error != 0):
+            return [error, returnedString]
+    
+        values = np.array(returnedString.replace(';', ' ').split(), dtype=np.float64)
+        return [error, values.reshape(NumberOfLines, -1)]
+    
+    
     # GatheringExternalStopAndSave :  Stop acquisition and save data
     def GatheringExternalStopAndSave(self, socketId):
         if (XPS.__usedSockets[socketId] == 0):
@@ -1061,7 +1167,6 @@ class XPS(object):
     
         GroupName=GroupName.decode()
         command = 'GroupHomeSearchAndRelativeMove(' + GroupName + ','
-        command=command.encode()
         for i in range(len(TargetDisplacement)):
             if (i > 0):
                 command += ','
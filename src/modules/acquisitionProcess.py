@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+acquisitionProcess.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Runs a MokeExperiment in its own process, so the timing of the acquisition
+(card, stage, saving) does not depend on the GUI (resizing windows,
+exporting plots, ...). The reduced values of every delay point (BlockType)
+are written into a SharedRing, the GUI process reads them and replays them
+into its own MokeExperiment (without hardware) for plotting. All other
+events are sent through a queue. The files are saved by the acquisition
+process.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import multiprocessing
+import queue
+import time
+
+from mokeExperiment import MokeExperiment, MeasurementStopped, BlockType
+from sharedRing import SharedRing
+
+# vectors of the experiment the GUI needs to set up the plots
+PreparedVectors = ['stageVector_ps', 'stageVector_mm', 'voltageVector',
+                   'fluenceVector', 'hystDelayVector_mm']
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Acquisition Process ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def runAcquisition(params, ring, events, stop, bAdjustement=False):
+    """
+    Target of the acquisition process: prepare and run the measurement.
+    Events sent to the queue (besides the events of MokeExperiment):
+    'prepared' (dictionary of PreparedVectors), 'hysteresis' (resultList),
+    'adjustement' (PP_Plus of the MO contrast) and 'closed' at the end.
+
+    :param params: MokeParameters
+    :param ring: SharedRing of BlockType
+    :param events: multiprocessing.Queue
+    :param stop: multiprocessing.Event, stops the measurement
+    :param bAdjustement: measure the MO contrast (Button "Justage")
+    """
+
+    experiment = MokeExperiment(params)
+
+    def forward(event, value):
+        if stop.is_set():
+            raise MeasurementStopped
+        if event == 'block':
+            ring.write(value)
+        elif event == 'data':
+            if 'Hysteresis' in value:
+                events.put(('hysteresis', experiment.resultList.copy()))
+            if bAdjustement:
+                events.put(('adjustement', experiment.PP_Plus.copy()))
+        elif event != 'idle':
+            events.put((event, value))
+
+    experiment.addObserver(forward)
+    try:
+        experiment.prepare()
+        events.put(('prepared', {name: getattr(experiment, name)
+                                 for name in PreparedVectors}))
+        if bAdjustement:
+            experiment.measureAdjustement()
+        else:
+            experiment.run()
+    except MeasurementStopped:
+        print('Measurement stopped')
+    finally:
+        experiment.observers.clear()
+        experiment.close()
+        events.put(('closed', None))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Class Acquisition Process ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class AcquisitionProcess:
+    """
+    GUI side of the acquisition process: start, poll and stop.
+    """
+
+    def __init__(self, params, bAdjustement=False, slots=4096):
+        """
+        Start the acquisition process.
+        :param params: MokeParameters
+        :param bAdjustement: measure the MO contrast (Button "Justage")
+        :param slots: number of blocks in the ring
+        """
+
+        self.ring = SharedRing(BlockType, slots)
+        self.events = multiprocessing.Queue()
+        self.stopEvent = multiprocessing.Event()
+        self.cursor = 0
+        self.process = multiprocessing.Process(
+            target=runAcquisition,
+            args=(params, self.ring, self.events, self.stopEvent,
+                  bAdjustement))
+        self.process.start()
+
+    def poll(self):
+        """
+        Collect everything the acquisition process sent since the last poll.
+        :return: list of events (event, value), blocks, number of lost blocks
+        """
+
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        blocks, self.cursor, lost = self.ring.read(self.cursor)
+        return events, blocks, lost
+
+    def stop(self, timeout=None):
+        """
+        Stop the measurement (the data measured so far is saved) and wait for
+        the end of the process.
+        :param timeout: time in s to wait, None: wait until the end
+        """
+
+        self.stopEvent.set()
+        # the queue is emptied while waiting, a process with unread items
+        # in its queue can not end
+        start = time.time()
+        while self.process.is_alive():
+            self.poll()
+            self.process.join(0.1)
+            if timeout is not None and time.time() - start > timeout:
+                break
+
+    def isAlive(self):
+        return self.process.is_alive()
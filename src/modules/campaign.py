@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+campaign.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Scheduler for the measurements of a Time Resolved MOKE run (fluences x
+static hysteresis x TR hysteresis delays x voltages). The run is compiled
+into an ordered list of tasks, ordered to avoid expensive transitions:
+
+- every fluence is set once (waveplate move), the fluences are measured in
+  ascending order (shortest way of the waveplate, lowest fluence first),
+  the waveplate searches for home only once at the start of the campaign
+- the static hysteresis is measured directly after the waveplate move, the
+  shutter stays closed in between
+- the TR hysteresis delays are measured in ascending stage position
+- the stage stays connected for the whole campaign (no new initialization
+  between the measurements)
+
+Every finished task is appended to a journal (one JSON line per task with
+its duration). A campaign started again with the same journal skips the
+finished tasks, so an interrupted run is continued with the first task that
+was not finished. A campaign that measured all its tasks writes a last line
+{"finished": time}, the folders of the runs without it are offered for
+resuming (lastUnfinishedRun). The remaining time (ETA) is estimated from the
+measured durations of the tasks.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import os
+import json
+import time
+import numpy as np
+
+from phaseTimer import timer
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Class Task ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class Task:
+    """
+    One measurement of a campaign.
+    kind: 'Static' (static hysteresis), 'Hysteresis' (TR hysteresis at the
+    stage position value in mm) or 'Transient' (at the voltage value)
+    """
+
+    def __init__(self, kind, fluence, value=None):
+        self.kind = kind
+        self.fluence = fluence
+        self.value = value
+
+    def key(self):
+        """
+        :return: unique name of the task (used in the journal)
+        """
+
+        return self.kind + '_' + str(self.fluence) + '_' + str(self.value)
+
+
+def compileCampaign(fluenceVector, voltageVector, hystDelayVector_mm,
+                    bHysteresis, bTimeResolved, bSortFluence=True):
+    """
+    Create the ordered task list of a campaign.
+    :param fluenceVector: fluences (-1: fluence is not set)
+    :param voltageVector: voltages of the transients
+    :param hystDelayVector_mm: stage positions of the TR hysteresis
+    :param bHysteresis: measure static and TR hysteresis
+    :param bTimeResolved: measure transients
+    :param bSortFluence: measure the fluences in ascending order
+    :return: list of Task
+    """
+
+    fluences = list(dict.fromkeys(fluenceVector))
+    if bSortFluence:
+        fluences.sort()
+
+    tasks = []
+    for fluence in fluences:
+        if bHysteresis:
+            tasks.append(Task('Static', fluence))
+            for position in sorted(hystDelayVector_mm):
+                tasks.append(Task('Hysteresis', fluence, position))
+        if bTimeResolved:
+            for voltage in voltageVector:
+                tasks.append(Task('Transient', fluence, voltage))
+    return tasks
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Class Campaign ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class Campaign:
+    """
+    Runs the task list of a MokeExperiment and keeps the journal.
+    """
+
+    def __init__(self, experiment, journal=None):
+        """
+        :param experiment: prepared MokeExperiment
+        :param journal: path of the journal file (None: no journal)
+        """
+
+        self.experiment = experiment
+        self.journal = journal
+        self.tasks = compileCampaign(experiment.fluenceVector,
+                                     experiment.voltageVector,
+                                     experiment.hystDelayVector_mm,
+                                     experiment.params.bHysteresis,
+                                     experiment.params.bTimeResolved)
+        self.finished = set()
+        self.durations = {}
+        self.readJournal()
+
+    def readJournal(self):
+        """
+        Read the finished tasks and their durations from the journal
+        """
+
+        if not self.journal or not os.path.exists(self.journal):
+            return
+        with open(self.journal) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # last line of a crash
+                    continue
+                if 'task' not in entry:
+                    continue
+                self.finished.add(entry['task'])
+                self.durations.setdefault(entry['kind'], []).append(
+                    entry['duration'])
+
+    def writeJournal(self, task, duration):
+        """
+        Append a finished task to the journal and force it to disk
+        """
+
+        self.finished.add(task.key())
+        self.durations.setdefault(task.kind, []).append(duration)
+        if not self.journal:
+            return
+        with open(self.journal, 'a') as f:
+            f.write(json.dumps({'task': task.key(), 'kind': task.kind,
+                                'duration': duration,
+                                'time': time.strftime('%Y%m%d_%H%M%S')}) +
+                    '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def writeEnd(self):
+        """
+        Mark the campaign as finished in the journal (lastUnfinishedRun)
+        """
+
+        if not self.journal:
+            return
+        with open(self.journal, 'a') as f:
+            f.write(json.dumps({'finished': time.strftime('%Y%m%d_%H%M%S')}) +
+                    '\n')
+
+    def remaining(self):
+        """
+        :return: list of the tasks that are not finished
+        """
+
+        return [task for task in self.tasks
+                if task.key() not in self.finished]
+
+    def eta(self):
+        """
+        Estimate the remaining time from the mean duration of the finished
+        tasks of the same kind (of all tasks, if no task of the kind is
+        finished yet).
+        :return: remaining time in s, None if no task is finished
+        """
+
+        if not self.durations:
+            return None
+        means = {kind: np.mean(durations)
+                 for kind, durations in self.durations.items()}
+        overall = np.mean([d for durations in self.durations.values()
+                           for d in durations])
+        return float(sum(means.get(task.kind, overall)
+                         for task in self.remaining()))
+
+    def run(self):
+        """
+        Measure all remaining tasks
+        """
+
+        experiment = self.experiment
+        tasks = self.remaining()
+        if len(tasks) < len(self.tasks):
+            experiment.statusReport('Resume campaign: ' +
+                                    str(len(self.tasks) - len(tasks)) +
+                                    ' of ' + str(len(self.tasks)) +
+                                    ' measurements finished')
+
+        experiment.TotalProgresscount = 0
+        experiment.CurrentNumber = 1 + len(self.tasks) - len(tasks)
+        experiment.initializeTransientArrays()
+
+        # Card and stage are initialized once, the tasks are kept open for
+        # all fluences and voltages (Analog Output with on demand timing can
+        # not overflow)
+        experiment.initializeNICard()
+        experiment.initializeStage()
+        # the waveplate searches for home once (with closed shutter) and
+        # stays open, setFluence only moves it
+        bWaveplate = any(task.fluence != -1 for task in tasks)
+        if bWaveplate:
+            experiment.statusReport('Close Shutter...')
+            experiment.moveShutter(True)
+            experiment.initializeWaveplate()
+        experiment.emit('eta', self.eta())
+
+        fluence = None
+        for task in tasks:
+            if task.fluence != fluence:
+                # the static hysteresis needs the shutter closed
+                experiment.setFluence(task.fluence, task.kind != 'Static')
+                fluence = task.fluence
+
+            start = time.time()
+            if task.kind == 'Static':
+                experiment.measureStaticHysteresis()
+            elif task.kind == 'Hysteresis':
+                experiment.stage.moveStage(task.value)
+                experiment.measureHysteresis(task.value)
+            else:
+                experiment.measureTransient(task.value)
+                experiment.CurrentNumber += 1
+                experiment.calculateProgress(0)
+
+            self.writeJournal(task, time.time() - start)
+            experiment.emit('eta', self.eta())
+            experiment.emit('timing', timer.summary())
+        self.writeEnd()
+
+        if bWaveplate:
+            experiment.closeWaveplate()
+        experiment.closeNICard()
+        experiment.closeStage()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) Unfinished Runs ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def lastUnfinishedRun(saveDirectory):
+    """
+    Find the newest run in saveDirectory whose campaign was interrupted (the
+    journal has no "finished" line).
+    :param saveDirectory: directory of the timestamp folders
+    :return: timestamp of the run (for MokeParameters.resumeTimeStamp), None
+    if there is none
+    """
+
+    if not os.path.isdir(saveDirectory):
+        return None
+    for timeStamp in sorted(os.listdir(saveDirectory), reverse=True):
+        journal = saveDirectory + timeStamp + "\\Campaign.txt"
+        if not os.path.isfile(journal):
+            continue
+        with open(journal) as f:
+            lines = [line for line in f if line.strip()]
+        try:
+            bFinished = bool(lines) and 'finished' in json.loads(lines[-1])
+        except ValueError:
+            # last line of a crash
+            bFinished = False
+        if not bFinished:
+            return timeStamp
+        # only the newest run with a journal is offered
+        return None
+    return None
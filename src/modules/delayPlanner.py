@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+delayPlanner.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Adaptive delay grid of a transient: the measurement starts with a coarse
+grid (GUI or "StageParams.txt"), between two loops new delays are inserted
+in the middle of the intervals where the averaged MOKE signal is described
+worst by the measured delays. Every interval between two neighbouring delays
+gets a score (in V):
+
+- curvature: error of the linear interpolation between the two delays,
+  h^2 / 8 * |second derivative| (h: width of the interval), large at the
+  fast demagnetization and the kink at time zero
+- uncertainty: mean standard error of the two delays times h / largest h,
+  so noisy parts of the trace get more delays, large intervals first
+
+The intervals with the largest scores are halved, intervals smaller than
+2 * MinStep are not split any more.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import numpy as np
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Scores of the Intervals ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def secondDerivative(delays, signal):
+    """
+    Second derivative of a signal on a non-uniform grid (second divided
+    difference of three neighbouring delays), 0 at the first and last delay.
+    :param delays: sorted delays in ps
+    :param signal: signal at the delays
+    :return: array (length of delays)
+    """
+
+    delays = np.asarray(delays, dtype=np.float64)
+    signal = np.asarray(signal, dtype=np.float64)
+    derivative = np.zeros(len(delays))
+    if len(delays) < 3:
+        return derivative
+
+    h = np.diff(delays)
+    slope = np.diff(signal) / h
+    derivative[1:-1] = 2 * np.diff(slope) / (h[1:] + h[:-1])
+    return derivative
+
+
+def intervalScores(delays, signal, error=None, weight=1.):
+    """
+    Score of every interval between two neighbouring delays (see above).
+    :param delays: sorted delays in ps
+    :param signal: averaged signal at the delays
+    :param error: standard error of the signal (NaN or None: only the
+    curvature is used, f.e. after the first loop)
+    :param weight: weight of the uncertainty relative to the curvature
+    :return: array (length of delays - 1)
+    """
+
+    delays = np.asarray(delays, dtype=np.float64)
+    h = np.diff(delays)
+    curvature = np.abs(secondDerivative(delays, signal))
+    scores = h ** 2 / 8 * np.maximum(curvature[1:], curvature[:-1])
+
+    if error is not None and weight:
+        error = np.nan_to_num(np.asarray(error, dtype=np.float64))
+        scores += weight * (error[1:] + error[:-1]) / 2 * h / np.max(h)
+    return scores
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Refinement of the Grid ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def refineDelays(delays, signal, error=None, newPoints=10, minStep=0.1,
+                 weight=1.):
+    """
+    Insert delays in the middle of the intervals with the largest scores.
+    :param delays: measured delays in ps
+    :param signal: averaged signal at the delays (f.e. MOKE_Average[:, 1])
+    :param error: standard error of the signal (or None)
+    :param newPoints: maximal number of new delays
+    :param minStep: smallest distance of two delays in ps
+    :param weight: weight of the uncertainty relative to the curvature
+    :return: new delays (sorted), row of every old delay in the new delays
+    (old delays keep their statistics), rows of the inserted delays
+    """
+
+    delays = np.asarray(delays, dtype=np.float64)
+    order = np.argsort(delays, kind='mergesort')
+    sortedDelays = delays[order]
+
+    scores = intervalScores(sortedDelays, np.asarray(signal)[order],
+                            None if error is None else
+                            np.asarray(error)[order], weight)
+    scores[np.diff(sortedDelays) < 2 * minStep] = -np.inf
+    candidates = np.argsort(scores)[::-1][:max(int(newPoints), 0)]
+    candidates = candidates[np.isfinite(scores[candidates]) &
+                            (scores[candidates] > 0)]
+    inserted = (sortedDelays[candidates] + sortedDelays[candidates + 1]) / 2
+
+    stageVector = np.concatenate((delays, inserted))
+    merged = np.argsort(stageVector, kind='mergesort')
+    rows = np.empty(len(stageVector), dtype=int)
+    rows[merged] = np.arange(len(stageVector))
+    return stageVector[merged], rows[:len(delays)], \
+        np.sort(rows[len(delays):])
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+measurementStore.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Preallocated store for the averaged values of a Time Resolved MOKE
+measurement (saved as "AllData_Reduced.txt"). The values are kept in one
+structured NumPy array with a typed column for every quantity, one row for
+every chopped and unchopped value. The array is sized from
+loops x delays x magnetic field directions x chopper states, writing a value
+is a slot assignment at the write cursor.
+MeasurementWriter appends the new rows of a store to the open text file,
+RowWriter streams a measurement row by row and writes the final file once.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import os
+import time
+import numpy as np
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Class Measurement Store ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class MeasurementStore:
+    """
+    Columns and order are the same as in the saved file "AllData_Reduced.txt":
+    Diodesignal, MinusDiode, PlusDiode, ReferenzDiode, chopper (1: chopped,
+    0: unchopped), StagePosition [ps], Loops, MagneticField
+    """
+
+    dtype = np.dtype([('Diodesignal', np.float64),
+                      ('MinusDiode', np.float64),
+                      ('PlusDiode', np.float64),
+                      ('ReferenzDiode', np.float64),
+                      ('chopper', np.int8),
+                      ('StagePosition', np.float64),
+                      ('Loops', np.int32),
+                      ('MagneticField', np.float64)])
+
+    def __init__(self, loops, delays, polarities=2, chopStates=2):
+        """
+        :param loops: number of loops
+        :param delays: number of stage positions
+        :param polarities: number of magnetic field directions
+        :param chopStates: chopped and unchopped
+        """
+
+        self.data = np.zeros(int(loops * delays * polarities * chopStates),
+                             dtype=self.dtype)
+        self.cursor = 0
+
+    def reset(self):
+        """
+        Start writing at the first row again, the allocated array is reused.
+        """
+
+        self.cursor = 0
+
+    def appendChopPair(self, diode, minusDiode, plusDiode, reference,
+                       position, loop, field):
+        """
+        Write the chopped and unchopped values of one stage position as two
+        rows. If the store is full, its size is doubled.
+
+        :param diode: (chopped, unchopped) balanced diode
+        :param minusDiode: (chopped, unchopped) Diode-
+        :param plusDiode: (chopped, unchopped) Diode+
+        :param reference: (chopped, unchopped) reference diode
+        :param position: stage position [ps]
+        :param loop: current loop
+        :param field: (chopped, unchopped) magnetic field
+        """
+
+        if self.cursor + 2 > len(self.data):
+            self.data = np.concatenate(
+                (self.data, np.zeros(max(len(self.data), 2),
+                                     dtype=self.dtype)))
+
+        rows = self.data[self.cursor:self.cursor + 2]
+        rows['Diodesignal'] = diode
+        rows['MinusDiode'] = minusDiode
+        rows['PlusDiode'] = plusDiode
+        rows['ReferenzDiode'] = reference
+        rows['chopper'] = (1, 0)
+        rows['StagePosition'] = position
+        rows['Loops'] = loop
+        rows['MagneticField'] = field
+        self.cursor += 2
+
+    def rows(self):
+        """
+        :return: written rows (view of the structured array)
+        """
+
+        return self.data[:self.cursor]
+
+    def __len__(self):
+        return self.cursor
+
+    def save(self, filename):
+        """
+        Write all rows as tab separated text file with header and index
+        column (same format as pandas.DataFrame.to_csv).
+        :param filename:
+        """
+
+        with open(filename, 'w') as f:
+            f.write('\t' + '\t'.join(self.dtype.names) + '\n')
+            self.writeRows(f, 0, self.cursor)
+
+    def writeRows(self, f, start, stop):
+        """
+        Write the rows start to stop into an open text file.
+        :param f: file handle
+        :param start: first row
+        :param stop: row behind the last row
+        """
+
+        if stop <= start:
+            return
+        rows = self.data[start:stop]
+        table = np.column_stack(
+            [np.arange(start, stop)] +
+            [rows[name].astype(np.float64) for name in self.dtype.names])
+        fmt = ['%d'] + ['%d' if self.dtype[name].kind == 'i' else '%.15g'
+                        for name in self.dtype.names]
+        np.savetxt(f, table, fmt=fmt, delimiter='\t')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Class Measurement Writer ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class MeasurementWriter:
+    """
+    Append only writer for a MeasurementStore. The file stays open during the
+    measurement and only the rows written since the last flush are appended,
+    so the cost of saving does not grow with the number of loops.
+    The rows are flushed if flushRows new rows are waiting or flushInterval
+    seconds passed since the last flush. checkpoint() writes all rows and
+    forces them to disk (fsync).
+    If a RunFile is given, the rows are appended to its dataset
+    'AllData_Reduced' of the group runPath as well.
+    """
+
+    def __init__(self, store, filename, flushRows=200, flushInterval=5.,
+                 runFile=None, runPath=None):
+        """
+        :param store: MeasurementStore
+        :param filename: text file, created with header
+        :param flushRows: number of new rows that triggers a flush
+        :param flushInterval: time in s that triggers a flush
+        :param runFile: RunFile (HDF5) or None
+        :param runPath: group of the rows in the run file
+        """
+
+        self.store = store
+        self.runFile = runFile
+        self.runPath = runPath
+        self.flushRows = flushRows
+        self.flushInterval = flushInterval
+        self.flushed = 0
+        self.lastFlush = time.time()
+        self.file = open(filename, 'w')
+        self.file.write('\t' + '\t'.join(store.dtype.names) + '\n')
+
+    def update(self):
+        """
+        Append the new rows if the row or time budget is exceeded.
+        """
+
+        pending = len(self.store) - self.flushed
+        if pending >= self.flushRows or \
+                (pending > 0 and
+                 time.time() - self.lastFlush >= self.flushInterval):
+            self.flush()
+
+    def flush(self):
+        """
+        Append all rows since the last flush and hand them to the OS.
+        """
+
+        stop = len(self.store)
+        self.store.writeRows(self.file, self.flushed, stop)
+        self.file.flush()
+        if self.runFile and stop > self.flushed:
+            self.runFile.appendRows(self.runPath, 'AllData_Reduced',
+                                    self.store.data[self.flushed:stop])
+        self.flushed = stop
+        self.lastFlush = time.time()
+
+    def checkpoint(self):
+        """
+        Append all rows since the last flush and force them to disk: after a
+        crash the file holds at least the rows up to the last checkpoint.
+        """
+
+        self.flush()
+        os.fsync(self.file.fileno())
+        if self.runFile:
+            self.runFile.flush()
+
+    def close(self):
+        """
+        Write the remaining rows and close the file.
+        """
+
+        if not self.file.closed:
+            self.checkpoint()
+            self.file.close()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) Class Row Writer ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RowWriter:
+    """
+    Streams the rows of a measurement that is written row by row (e.g. a
+    hysteresis, one row per field step) to "filename.partial". Every row is
+    appended and handed to the OS, every checkpointInterval seconds the file
+    is forced to disk (fsync). finish() writes the complete file "filename"
+    once (atomic) and removes the partial file. After a crash the partial
+    file holds all rows up to the last checkpoint.
+    """
+
+    def __init__(self, filename, header='', checkpointInterval=10.):
+        """
+        :param filename: name of the final file
+        :param header: header of np.savetxt
+        :param checkpointInterval: time in s between two fsync
+        """
+
+        self.filename = filename
+        self.header = header
+        self.checkpointInterval = checkpointInterval
+        self.lastCheckpoint = time.time()
+        self.file = open(filename + '.partial', 'w')
+        if header:
+            self.file.write('# ' + header + '\n')
+
+    def append(self, row):
+        """
+        Append one row.
+        :param row: 1D array
+        """
+
+        np.savetxt(self.file, np.atleast_2d(row), delimiter='\t')
+        self.file.flush()
+        if time.time() - self.lastCheckpoint >= self.checkpointInterval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        os.fsync(self.file.fileno())
+        self.lastCheckpoint = time.time()
+
+    def finish(self, array):
+        """
+        Write the complete array as final file and remove the partial file.
+        :param array: all rows
+        """
+
+        self.close()
+        saveAtomic(self.filename, array, self.header)
+        os.remove(self.filename + '.partial')
+
+    def close(self):
+        """
+        Close the partial file (it stays on disk if finish was not called).
+        """
+
+        if not self.file.closed:
+            self.checkpoint()
+            self.file.close()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 5) Functions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def saveAtomic(filename, array, header=''):
+    """
+    Write a small array as tab separated text file: the file is written to a
+    temporary file first and replaces the old one in one step, so a crash
+    never leaves a half written file.
+    :param filename:
+    :param array:
+    :param header: header of np.savetxt
+    """
+
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        np.savetxt(f, array, delimiter='\t', header=header)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
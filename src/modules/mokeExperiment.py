@@ -0,0 +1,2143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+mokeExperiment.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Measurement engine of the Time Resolved MOKE setup without GUI. All
+hardware control, averaging and saving of TimeResolvedMOKE.py runs in
+MokeExperiment, the settings are given by a MokeParameters object.
+The engine does not know any widget: it reports its state by events to the
+observers (e.g. the Qt window, a script or a benchmark). An observer is a
+function observer(event, value):
+
+- 'status': message for the user
+- 'fluence', 'voltage': fluence and voltage that are set now
+- 'timeStamp': timestamp (name of the folder) of the run
+- 'measurement': 'Transient', 'Hysteresis' or 'MOContrast' started
+- 'data': tuple of plot names whose data changed
+- 'render': end of a scan, the plots should be drawn now
+- 'idle': the engine waits for the hardware (GUI: process events)
+- 'progress': (percentage of all measurements, percentage of the current
+  measurement, number of the current measurement)
+- 'eta': estimated remaining time of the campaign in s (None if unknown)
+- 'timing': summary of the phases of the measurement (stage move, DAQ
+  read, sorting, GUI, saving, see phaseTimer.py), after every scan
+- 'block': reduced values of one delay point (BlockType), replayBlock()
+  applies them to another MokeExperiment (e.g. in the GUI process)
+- 'grid': delays inserted between two loops (Measurement, next Loop,
+  stageVector_ps, stageVector_mm, rows of the old delays), see
+  refineDelayGrid()
+- 'export': the plots should be exported into the given directory (only
+  if bBackgroundSave is False)
+- 'error': hardware error, the measurement should be stopped
+- 'finished': all measurements are done
+
+Without observers the engine runs at full speed, e.g. in a script:
+
+    experiment = MokeExperiment(MokeParameters())
+    experiment.prepare()
+    experiment.run()
+    experiment.close()
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import os
+import time as t
+from datetime import datetime
+import numpy as np
+
+from calculateFluence import Fluence
+from measurementStore import MeasurementStore, MeasurementWriter, \
+    RowWriter, saveAtomic
+from runFile import RunFile, h5py
+from saveWorker import SaveWorker
+from campaign import Campaign
+from phaseTimer import timer
+from runningStatistics import RunningStatistics
+import delayPlanner
+import utilities
+
+# Debug Settings
+# if variable is True: Hardware is not needed for testing functions
+bDebug = False
+
+# Acquisition Settings
+# if variable is True: the Analog Input Task runs continuously and the newest
+# values are taken from a ring buffer instead of restarting the triggered task
+# for every read
+bStreaming = True
+# if variable is True: the complete Hysteresis is written as one hardware timed
+# waveform and read synchronously instead of setting the voltage step by step
+bHysteresisSweep = True
+# if variable is True: the delays of a transient are measured in one continuous
+# move of the stage (fly scan), the laser trigger needs to be connected to
+# TRIG IN of the XPS controller
+bFlyScan = False
+
+# Save Settings
+# if variable is True (and h5py is installed): all data of a run (reduced
+# values, averages, every shot read by the card and the hysteresis) is written
+# into one HDF5 file "TimeStamp.h5" in addition to the text files
+bHDF5 = True
+# if variable is True: the text files of the averages and the plots are saved
+# by a background thread (plots rendered with Matplotlib) instead of exporting
+# the plots of the GUI while the measurement waits
+bBackgroundSave = True
+# if variable is True: the duration of every phase of the measurement is
+# written into "Timing.txt" (one JSON line per phase) in the folder of the run
+bTimingTrace = True
+
+# Simulation Settings
+# if variable is True: the hardware is replaced by the simulated setup of
+# simulation.py (timing of the hardware and synthetic MOKE signal), used to
+# measure the throughput of complete scans without hardware
+bSimulation = False
+
+# import of Hardware modules
+if bSimulation:
+    from simulation import StageCommunication_Simulation
+    StageCommunication = StageCommunication_Simulation
+    from simulation import NI_CardCommunication_Simulation
+    NI_CardCommunication = NI_CardCommunication_Simulation
+    from simulation import MECard_Simulation
+    MECard = MECard_Simulation
+elif not bDebug:
+    from StageCommunication_V2 import StageCommunication
+    from NI_CardCommunication_V2 import NI_CardCommunication
+    from MERedLab_Communication import MECard
+else:
+    from StageCommunication_V2 import StageCommunication_Debug
+    StageCommunication = StageCommunication_Debug
+    from NI_CardCommunication_V2 import NI_CardCommunication_Debug
+    NI_CardCommunication = NI_CardCommunication_Debug
+    from MERedLab_Communication import MECard_Debug
+    MECard = MECard_Debug
+from NI_CardCommunication_V2 import NI_TaskManager
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Default Parameters ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+MeasParams = {'sampleName': 'XXX', 'angle': -1., 'Fluence': -1.,
+              'timeZero': -1., 'timeoverlapp': 5.}
+# TargetError: standard error of the pump-probe signal (chopped - unchopped
+# of the balanced diode in V) at which the reading of a delay of a step scan
+# stops, blocks of MeasurementPoints shots are read until it or MaxPoints
+# shots are reached (0: every delay gets MeasurementPoints shots)
+LoopParams = {'Loops': 1, 'MeasurementPoints': 200, 'TargetError': 0.,
+              'MaxPoints': 20000}
+Parameters = {'Voltage': 2.}
+HysteresisParameters = {'Amplitude': 5., 'Stepwidth': 0.05, 'Delay': 0.,
+                        'Loops': 5, 'SettleShots': 20}
+Stage_SpeedParams = {'Velocity': 20, 'Acceleration': 20}
+StageParams_ps = {'StartPoint': 0., 'EndPoint': 10., 'StepWidth': 5.}
+FlyScanParams = {'LaserRate': 1000., 'MarginShots': 200}
+# NewPoints > 0: the delay grid is refined between the loops, NewPoints delays
+# are inserted where the averaged MOKE signal has the largest curvature or
+# standard error (weighted by Weight, see delayPlanner.py), two delays are at
+# least MinStep ps apart (0: the delays of the GUI or file are measured)
+GridParams = {'NewPoints': 0, 'MinStep': 0.1, 'Weight': 1.}
+SaveParams = {'FlushRows': 200, 'FlushInterval': 5.,
+              'CheckpointInterval': 10.}
+HysteresisHeader = '#Voltage (V)\t Balanced Pumped\t Balanced Umpumed\t ' \
+                   'referenceDiode closed\t referenceDiode\t ' \
+                   'Diode+ Pumped\t Diode+ Unpumped\t Diode- Pumped\t ' \
+                   'Diode- Unpumped'
+
+# reduced values of one delay point (chopped and unchopped average of every
+# channel) and the indices of the point in the plot arrays
+BlockType = np.dtype([('Measurement', np.int32), ('Loop', np.int32),
+                      ('Polarity', np.int8), ('Stage_idx', np.int32),
+                      ('Stage_idx2', np.int32), ('PP_PlusIdx', np.int32),
+                      ('PP_MinusIdx', np.int32), ('Pos_ps', np.float64),
+                      ('Chop', np.float64, 6), ('UnChop', np.float64, 6),
+                      ('Field', np.float64, 2)])
+
+# Pump-Probe arrays averaged over the loops (positive field, negative field)
+PumpProbeArrays = ['PP_Plus', 'MinusDiode_PP_Plus', 'PlusDiode_PP_Plus',
+                   'RefDiode_PP_Plus', 'PP_Minus', 'MinusDiode_PP_Minus',
+                   'PlusDiode_PP_Minus', 'RefDiode_PP_Minus']
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Class Moke Parameters ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class MokeParameters:
+    """
+    All settings of one measurement. The dictionaries are copies of the
+    default parameters above, they are filled by the GUI (readParameters)
+    or by a script before the measurement is prepared.
+    """
+
+    def __init__(self):
+        self.MeasParams = dict(MeasParams)
+        self.LoopParams = dict(LoopParams)
+        self.Parameters = dict(Parameters)
+        self.HysteresisParameters = dict(HysteresisParameters)
+        self.Stage_SpeedParams = dict(Stage_SpeedParams)
+        self.StageParams_ps = dict(StageParams_ps)
+        self.FlyScanParams = dict(FlyScanParams)
+        self.GridParams = dict(GridParams)
+        self.SaveParams = dict(SaveParams)
+
+        # measurements and data sources
+        self.bSave = True
+        self.bHysteresis = False
+        self.bTimeResolved = True
+        self.Stage_ReadFromFile = False
+        self.Voltage_ReadFromFile = False
+        self.Fluence_ReadFromFile = False
+        self.HystDelay_ReadFromFile = False
+        # TR Hysteresis delays relative to timeZero in ps, e.g. '-5, 10'
+        self.hystDelay = '0'
+        # timestamp of an interrupted run: it is continued in its folder, the
+        # measurements finished before (campaign journal) are skipped
+        self.resumeTimeStamp = None
+
+        # every run is saved into saveDirectory + timestamp
+        self.saveDirectory = "D:\\Data\\MOKE_PumpProbe\\"
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) Class Moke Experiment ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class MeasurementStopped(Exception):
+    """
+    Raised by an observer to stop the running measurement, close() saves
+    the data measured so far
+    """
+
+
+class MokeExperiment:
+    """
+    Measurement engine (hardware, data and saving), no GUI
+
+    Structure of class:
+    a) init and events
+    b) initialize and close Hardware
+    c) Hardware orders
+    d) calculate Measurement Parameters
+    e) run & measurement order
+    f) Data Analysis
+    g) Save Data
+    """
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    # ~~~ a) Init and Events ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    def __init__(self, params=None):
+        """
+        :param params: MokeParameters (default parameters if None)
+        """
+
+        self.params = params or MokeParameters()
+        self.observers = []
+
+        # Variables used for Tracking Initialization Status
+        self.Pos_ps = 0
+        self.stageIni = 0
+        self.waveIni = 0
+        self.cardIni = 0
+        self.CurrentNumber = 1
+        self.replayNumber = None
+        self.pendingGrids = []
+        # (stageVector_ps, stageVector_mm) of the GUI or file while the
+        # delay grid of a transient is refined
+        self.coarseGrid = None
+        self.shutterClosed = None
+        self.StartMeasurement = False
+        self.Initialize = False
+        self.bFolderCreated = False
+        self.dataWriter = None
+        self.runFile = None
+        self.saveWorker = None
+        self.hysteresisWriter = None
+
+    def addObserver(self, observer):
+        """
+        :param observer: function observer(event, value)
+        """
+
+        self.observers.append(observer)
+
+    def emit(self, event, value=None):
+        """
+        Report an event to all observers.
+        :param event: name of the event (see module docstring)
+        :param value: value of the event
+        """
+
+        if not self.observers:
+            return
+        with timer.phase('GUI'):
+            for observer in self.observers:
+                observer(event, value)
+
+    def statusReport(self, status):
+        """
+        Write status in console and report it to the observers
+        :param status: Message for user
+        """
+
+        print(status)
+        self.emit('status', status)
+
+    def prepare(self):
+        """
+        Hardware Initialization, calculate Measurement Parameters and create
+        the folder and run file (if saving is on)
+        """
+
+        timer.reset()
+        self.initializeAllHardware()
+        self.calculateMeasurementParams()
+
+        # condition for creating folder only once and only when needed
+        if self.params.bSave and not self.bFolderCreated:
+            self.createFolder()
+            self.bFolderCreated = True
+        if self.params.bSave:
+            self.openRunFile()
+            if bTimingTrace:
+                timer.openTrace(self.params.saveDirectory + self.timeStamp +
+                                "\\Timing.txt")
+
+    def stop(self):
+        """
+        Save the data of a started measurement and close all open files
+        """
+
+        if self.StartMeasurement and self.params.bSave:
+            self.saveData()
+            self.closeDataWriter()
+        # an unfinished hysteresis stays as partial file
+        if self.hysteresisWriter:
+            self.hysteresisWriter.close()
+        self.closeSaveWorker()
+        self.closeRunFile()
+        timer.closeTrace()
+
+    def close(self):
+        """
+        Stop the measurement and close open hardware connections
+        """
+
+        self.stop()
+        if self.Initialize:
+            self.closeNICard()
+            self.closeStage()
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    # ~~~ b) Initialize and Close Hardware ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    def initializeAllHardware(self):
+        """
+        Start communication with hardware
+        Set value for initialization to true
+        """
+
+        self.Initialize = True
+        self.initializeNICard()
+        self.initializeStage()
+        self.initializeShutterCard()
+
+    def initializeNICard(self):
+        """
+        Communication for DAQ Measurement Cards from National Instruments
+        Boolean checks zhaz connection is only started once
+
+        Created task for several channels issynchronized,
+        so reading the analog input (ai) from channel 0:5 means
+        the timing for reading is identical
+
+        The tasks are kept open by the task manager for the whole measurement
+        series, the Analog Output uses on demand timing, so its buffer can not
+        overflow. The devices are only reset again after a DAQ error.
+        :return: Measurement Tasks
+        """
+
+        if self.cardIni == 1:
+            return
+        self.cardIni = 1
+
+        self.statusReport('Initialize Measurement Card')
+        self.MeasurementCard = NI_CardCommunication()
+        self.NITasks = NI_TaskManager(self.MeasurementCard, "Dev2/ai0:5",
+                                      "Dev1/ao0", ["Dev1", "Dev2"], bStreaming)
+        self.NITasks.open(self.params.LoopParams)
+
+    def initializeShutterCard(self):
+        """
+        Initializes communication with MELab Card.
+        Communication is very slow, should be avoided if not needed
+        Only used for shutter of pump laser
+        """
+
+        self.statusReport('Initialize Shutter Card')
+        self.Shutter = MECard()
+
+    def closeNICard(self):
+        """
+        Closes the communication for NI DAQ Card
+        """
+        if self.cardIni == 0:
+            return
+        self.cardIni = 0
+        self.NITasks.close()
+
+    def initializeStage(self):
+        """
+        Initialize Stage communication with XPS Newport Controller
+        Strings of Stage Name ('GROUP1', 'POSITIONER') are set in the
+        Web Interface of the XPS Controller
+        Also the Stage offset determined by length of Stage and the number of
+        times the light crosses the stage is hardcoded, needs to be changed
+        in the code for each setup.
+
+        StageSpeedParams : can be set to 0, than default values will be used
+
+        self.stageIni : Boolean to make sure it is initialized only once at
+        the time
+        :return: stage object
+        """
+
+        self.statusReport('Initialize Stage')
+        if self.stageIni == 1:
+            return
+        self.stageIni = 1
+
+        self.stage = StageCommunication('GROUP1', 'POSITIONER')
+        self.stage.connectStage()
+        self.stage.setStageParams(self.params.Stage_SpeedParams)
+        self.stage.getCurrPos()
+
+    def closeStage(self):
+        """
+        Close Stage Communication
+        """
+
+        self.stage.closeStage()
+        self.stageIni = 0
+
+    def initializeWaveplate(self):
+        """
+        Initialize Waveplate - rotational motor communication
+        with XPS Newport Controller
+        Strings of Stage Name ('GROUP3', 'POSITIONER') are set in the
+        Web Interface of the XPS Controller
+
+        self.waveIni : Boolean to make sure it is initialized only once at
+        the time
+
+        IMPORTANT: if waveplate is initialized, it will serach for its
+        home position (in connectStage), it is not possible to influence
+        serach direction. So the sample (or anything else) needs to be
+        protected with shutter (or similar) from the possible high power.
+
+        :return: Waveplate object
+        """
+
+        if self.waveIni == 1:
+            return
+        self.statusReport('Initialize Waveplate')
+        self.waveIni = 1
+        self.Waveplate = StageCommunication('GROUP3', 'POSITIONER')
+        self.Waveplate.connectStage()
+        self.Waveplate.getCurrPos()
+
+    def closeWaveplate(self):
+        """
+        Close Waveplate Communication
+        """
+
+        self.waveIni = 0
+        self.Waveplate.closeStage()
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    # ~~~ c) Hardware orders ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    def moveToReference(self, ref, angle):
+        """
+        Move Waveplate to angle written in the calibration file.
+        The reference value from the calibration file is compared to the
+        now measured reference value. If the difference is larger than 1%,
+        the angle is corrected. The waveplate is moved
+        until value is in the 1% range.
+
+        The measured value is the Power in mW measured in the
+        Calibration file.
+
+        :param ref: float reference from pump diode in calibration file
+        :param angle: float angle recorded in calibration file
+        """
+
+        if self.stageIni:
+            # the delay stage moves to the first delay while the waveplate
+            # turns (both moves are executed in parallel by the XPS)
+            self.Waveplate.moveTogether([self.stage],
+                                        [angle, self.stageVector_mm[0]])
+        else:
+            self.Waveplate.moveStage_absolute(angle)
+        currRef = self.measureReference()
+
+        if abs(currRef) < abs(ref):
+            direction = - 1
+        else:
+            direction = 1
+
+        count = 0
+        while ((currRef * 0.025) + currRef) > ref or (
+                currRef - (currRef * 0.025)) < ref:
+
+            currRef = self.measureReference()
+            self.Waveplate.moveStage_relative(direction * 0.025)
+            count += 1
+            if count == 150:
+                self.Waveplate.moveStage_absolute(angle)
+                direction = direction * -1
+            self.emit('idle')
+
+            print(count)
+            self.statusReport('Current referenceDiode: '+str(currRef) +
+                              ', Goal referenceDiode: '+str(ref))
+            self.statusReport('Current Waveplate Angle: ' +
+                              str(self.Waveplate.getCurrPos()) +
+                              ', Original Goal Angle: '+str(angle))
+
+        self.statusReport('Setting Fluence finished!')
+
+    def readMeasurementCard(self):
+        """
+        Read LoopParams['MeasurementPoints'] values for all channels of the
+        Measurement Task. In streaming mode the newest values are taken from
+        the ring buffer of the running task, else the triggered task is started
+        and stopped for the read.
+        :return: data (channels x MeasurementPoints)
+        """
+
+        with timer.phase('DAQ read'):
+            return self.NITasks.read(self.params.LoopParams)
+
+    def readDelayPoint(self):
+        """
+        Read the values of one delay of a step scan. With
+        LoopParams['TargetError'] > 0 blocks of MeasurementPoints shots are
+        read until the standard error of the pump-probe signal (chopped -
+        unchopped of the balanced diode) is below TargetError or
+        LoopParams['MaxPoints'] shots are read: quiet delays (f.e. before
+        time zero) get less shots than the delays of the fast dynamics.
+        :return: data (channels x shots), ChopperStats of all shots, attempt
+        (1: the measurement should be repeated, see
+        sortAfterChopperAllChannels)
+        """
+
+        data = self.readMeasurementCard()
+        with timer.phase('Demux'):
+            ChopperStats, attempt = \
+                utilities.sortAfterChopperAllChannels(data, 3)
+        target = self.params.LoopParams['TargetError']
+        if attempt == 1 or target <= 0:
+            return data, ChopperStats, attempt
+
+        # the card returns the same buffer for every read: the blocks are
+        # copied before the next read
+        blocks = [data.copy()]
+        shots = data.shape[1]
+        while shots + self.params.LoopParams['MeasurementPoints'] <= \
+                self.params.LoopParams['MaxPoints'] and \
+                np.hypot(ChopperStats['ChopError'][0],
+                         ChopperStats['UnChopError'][0]) > target:
+            self.emit('idle')
+            block = self.readMeasurementCard()
+            # shots of blocks that can not be sorted count for MaxPoints, too
+            shots += block.shape[1]
+            with timer.phase('Demux'):
+                BlockStats, attempt = \
+                    utilities.sortAfterChopperAllChannels(block, 3)
+                if attempt == 1:
+                    continue
+                ChopperStats = utilities.mergeChopperStats(ChopperStats,
+                                                           BlockStats)
+            blocks.append(block.copy())
+
+        return np.concatenate(blocks, axis=1), ChopperStats, 0
+
+    def measureReference(self):
+        """
+        MEasure the reference value for diode and sort it for unchoped value.
+        :return: ReferenceAverage value
+        """
+
+        data = self.readMeasurementCard()
+        ChopperStats, attempt = utilities.sortAfterChopperAllChannels(data, 3)
+        currRef = ChopperStats['UnChop'][5]
+        return currRef
+
+    def moveShutter(self, value):
+        """
+        Move Shutter.
+        Waiting time necessary, because the motor used at the moment can have
+        an intertia, if activated after a longer waiting time
+        (not deterministic).
+
+        :param value: True: Shutter closed (Transistor cylce open)
+                      False: Shutter open (Transistor cycle close)
+        :return: if ans is not zero, an error occured
+        """
+
+        # the shutter is only moved if its state changes
+        if value == self.shutterClosed:
+            return
+        with timer.phase('Shutter'):
+            ans = self.Shutter.setDigValue(value)
+            t.sleep(0.5)
+        if ans:
+            self.statusReport("Problem with shutter!")
+            self.emit('error', "Problem with shutter!")
+            self.shutterClosed = None
+        else:
+            self.shutterClosed = value
+
+    def checkIfLaserOff(self, reference):
+        """
+        control if laser seems to be off: check reference diode value
+
+        if value is 0: do something,
+        f.e. write Email with notification
+
+        :param reference:  current measurement from voltage diode
+        """
+        if round(np.mean(reference), 4) == 0:
+            print("Laser is off!?")
+            utilities.sendEmail(
+                "Laser is not in expected range for reference value!")
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    # ~~~ d) Calculate Measurement Parameters ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    def calculateMeasurementParams(self):
+        """
+        create save parameters and calculate values from GUI values
+        """
+
+        self.createTimeStamp()
+        self.createVectors()
+        self.createSaveFrame()
+
+    def createVectors(self):
+        """
+        Create the measurement vectors for the different variables depending
+        on if they are read from GUI or from file
+
+        :return:
+
+        self.stageVector_ps : Stage Delays for TR MOKE in Pikoseconds (ps)
+        self.stageVector_mm : Stage Delays for TR MOKE in Millimetres (mm)
+        self.saveVector : Stage Delays for TR MOKE in Pikoseconds (ps)
+        to be saved to file
+
+        self.hystDelayVector_ps : Stage Delay in ps for TR Hysteresis
+        self.hystDelayVector_mm : Stage Delay in mm for TR Hysteresis
+
+        self.voltageVector : Voltage Values in Volt (V) - magnetic field
+
+        self.fluenceVector : Fluence Values in mJ/cm^2 to be set
+        """
+
+        if not self.params.Stage_ReadFromFile:
+            self.stageVector_ps = \
+                utilities.readStageFromGui(self.params.StageParams_ps)
+            self.stageVector_mm = \
+                self.stage.calculateStagemmFromps(self.stageVector_ps)
+        else:
+            self.stageVector_ps, self.saveVector = utilities.readStageFromFile()
+            self.stageVector_mm = \
+                self.stage.calculateStagemmFromps(self.stageVector_ps)
+
+        if self.params.Voltage_ReadFromFile:
+            self.voltageVector = utilities.readVoltageFromFile()
+        else:
+            self.voltageVector = [self.params.Parameters['Voltage']]
+
+        if self.params.Fluence_ReadFromFile:
+            self.fluenceVector = utilities.readFluenceFromFile()
+        else:
+            self.fluenceVector = [self.params.MeasParams['Fluence']]
+
+        if self.params.HystDelay_ReadFromFile:
+            self.hystDelayVector_ps = \
+                utilities.readHysteresisDelayfromFile(
+                    self.params.MeasParams['timeZero'])
+            self.hystDelayVector_mm = \
+                self.stage.calculateStagemmFromps(self.hystDelayVector_ps)
+        else:
+            delay = self.params.hystDelay
+            self.hystDelayVector_ps = utilities.readHysteresisDelayfromGUI(
+                delay, self.params.MeasParams['timeZero'])
+            self.hystDelayVector_mm = self.stage.calculateStagemmFromps(
+                self.hystDelayVector_ps)
+
+    def setFluence(self, fluence, bOpenShutter=True):
+        """
+        Set Fluence Value.
+
+        If GUI entry is "-1", nothing will be done.
+
+        Else the calculation of the fluence will be called.
+        From the given values the power to set is calculated and the waveplate
+        is moved until the reference value in the diode is in range
+        of the calibration value.
+
+        close shutter during move of waveplate, to not "barbeque" the sample.
+
+        IMPORTANT: referenceDiode Photodiode must be positioned in front of the
+        shutter (so it is not influenced by closing or opening the shutter)
+
+        A waveplate initialized before (f.e. for all fluences of a campaign)
+        is only moved and stays open, otherwise it is initialized (search for
+        home) and closed again.
+
+        :param fluence: float, goal value
+        :param bOpenShutter: open the shutter after the waveplate is set
+            (False: the next measurement needs the shutter closed)
+        """
+
+        if fluence != -1:
+            bKeepWaveplate = self.waveIni == 1
+            self.params.MeasParams['Fluence'] = fluence
+            self.emit('fluence', self.params.MeasParams['Fluence'])
+            self.statusReport('Close Shutter...')
+            self.moveShutter(True)
+            self.statusReport('Set Fluence: ' + str(fluence))
+            self.initializeWaveplate()
+            flu = Fluence()
+            power = flu.calculateFluence(fluence)
+            angle, reference = flu.calculateWaveplateAngle(power)
+            self.moveToReference(reference, angle)
+            if not bKeepWaveplate:
+                self.closeWaveplate()
+            if bOpenShutter:
+                self.statusReport('Open Shutter...')
+                self.moveShutter(False)
+
+    def initializeHysteresisArray(self):
+        """
+        create the Voltage values for Hysteresis measurement:
+        start at zero and stop at zero, but loop from minus to plus value
+
+        check if the value used for Voltage limit is too high.
+        Limit is hardcoded (should be changed with caution and thought!)
+
+        :return: Array
+        """
+
+        step = float(self.params.HysteresisParameters['Amplitude']) / 100
+        amplitude = float(self.params.HysteresisParameters['Amplitude'])
+        loopField = int(self.params.HysteresisParameters['Loops'])
+
+        if amplitude > 5.5:
+            self.statusReport("Voltage to high! LImit is at 5.5 Volt")
+            return
+
+        if (amplitude + step) > 5.2:
+            startArray = np.arange(0, amplitude, step)
+            loopArray1 = np.arange(amplitude, -1*(amplitude), -1*step)
+            loopArray2 = np.arange(-1*amplitude, amplitude, step)
+            loopArray = np.concatenate([loopArray1, loopArray2])
+            endArray = np.arange(amplitude, 0-step, -step)
+        else:
+            startArray = np.arange(0, amplitude+step, step)
+            loopArray1 = np.arange(amplitude+step, -1*(amplitude+step), -1*step)
+            loopArray2 = np.arange(-1*(amplitude+step), amplitude+step, step)
+            loopArray = np.concatenate([loopArray1, loopArray2])
+            endArray = np.arange((amplitude+step), 0-step, -step)
+
+        Array = startArray
+        for i in range(loopField):
+            Array = np.concatenate([Array, loopArray])
+        Array = np.concatenate([Array, endArray])
+
+        resultlist = np.zeros(shape = (len(Array), 9))
+        resultlist[:, 0] = Array
+        return resultlist
+
+    def createSaveFrame(self):
+        """
+        Create the preallocated store used for save "AllData_Reduced.txt"
+        (Loops x delays x 2 field directions x chopped/unchopped)
+        :return: self.AllData_Reduced
+        """
+
+        self.AllData_Reduced = MeasurementStore(
+            self.params.LoopParams['Loops'], len(self.stageVector_mm))
+
+    def initializeTransientArrays(self):
+        """
+        Initialize all Lists, Arrays and Parameters used during measurement
+        """
+
+        # every transient starts with the delays of the GUI or file, the
+        # delays inserted by refineDelayGrid belong to the last transient
+        if self.coarseGrid is not None:
+            if self.stageVector_ps is self.refinedVector:
+                self.stageVector_ps, self.stageVector_mm = self.coarseGrid
+            self.coarseGrid = None
+
+        # Store for the averaged repeated values for each Diode, Chopped and
+        # Unchopeed following each other, saved in "AllData_Reduced"
+        self.AllData_Reduced.reset()
+
+        # the Pump Probe Signal for each magnetic field direction
+        self.PP_Plus = np.zeros(((int(len(self.stageVector_mm))), 2))
+        self.PP_Minus = np.zeros(((int(len(self.stageVector_mm))), 2))
+        self.MinusDiode_PP_Plus = np.zeros(((int(len(self.stageVector_mm))), 2))
+        self.MinusDiode_PP_Minus = np.zeros(((int(len(self.stageVector_mm))), 2))
+        self.PlusDiode_PP_Plus = np.zeros(((int(len(self.stageVector_mm))), 2))
+        self.PlusDiode_PP_Minus = np.zeros(((int(len(self.stageVector_mm))), 2))
+        self.RefDiode_PP_Plus = np.zeros(((int(len(self.stageVector_mm))), 2))
+        self.RefDiode_PP_Minus = np.zeros(((int(len(self.stageVector_mm))), 2))
+
+        # count, mean and M2 of the Pump Probe values of all loops for every
+        # delay, the averages above are the exact means of all loops
+        self.PPStatistics = {name: RunningStatistics(len(self.stageVector_mm))
+                             for name in PumpProbeArrays}
+
+        # All Loops without averaging for easy access to loop changes visible 
+        # during measurement
+        self.diffDiode_PP_Plus_AllLoops = \
+            np.zeros(((int(len(self.stageVector_mm)) *
+                       self.params.LoopParams['Loops'] + 1), 2))
+        self.diffDiode_PP_Minus_AllLoops = \
+            np.zeros(((int(len(self.stageVector_mm)) *
+                       self.params.LoopParams['Loops'] + 1), 2))
+
+        # All Chopped and Unchopped values in arrays for each diode and
+        # each magnetic field direction
+        self.diffDiodeChopMinus = [0]*int(len(self.stageVector_mm))
+        self.diffDiodeUnChopMinus = [0]*int(len(self.stageVector_mm))
+        self.diffDiodeChopPlus = [0]*int(len(self.stageVector_mm))
+        self.diffDiodeUnChopPlus = [0]*int(len(self.stageVector_mm))
+        self.MinusDiodeChop_minus = [0]*int(len(self.stageVector_mm))
+        self.MinusDiodeChop_plus = [0] * int(len(self.stageVector_mm))
+        self.MinusDiodeUnChop_minus = [0] * int(len(self.stageVector_mm))
+        self.MinusDiodeUnChop_plus = [0] * int(len(self.stageVector_mm))
+        self.PlusDiodeChop_minus = [0] * int(len(self.stageVector_mm))
+        self.PlusDiodeChop_plus = [0] * int(len(self.stageVector_mm))
+        self.PlusDiodeUnChop_minus = [0] * int(len(self.stageVector_mm))
+        self.PlusDiodeUnChop_plus = [0] * int(len(self.stageVector_mm))
+        self.RefDiodeChop_minus = [0] * int(len(self.stageVector_mm))
+        self.RefDiodeChop_plus = [0] * int(len(self.stageVector_mm))
+        self.RefDiodeUnChop_minus = [0] * int(len(self.stageVector_mm))
+        self.RefDiodeUnChop_plus = [0] * int(len(self.stageVector_mm))
+
+        # Averaged Arrays for MOKE and PumpProbe for Diodes
+        self.MOKE_Average = np.zeros((int(len(self.stageVector_mm)), 2))
+        self.MinusDiode_Average = np.zeros((int(len(self.stageVector_mm)), 2))
+        self.PlusDiode_Average = np.zeros((int(len(self.stageVector_mm)), 2))
+
+    def createTimeStamp(self):
+        """
+        Main folder for data saving is named after Timestamp to ensure
+        unique name tha tcannot be overriden accidently
+        :return: self.timeStamp
+        """
+
+        if self.params.resumeTimeStamp:
+            self.timeStamp = self.params.resumeTimeStamp
+        else:
+            self.timeStamp = str(datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+    def createFolder(self):
+        """
+        create Folder with timeStamp as name at given directory.
+        Check if folder already exists
+
+        :return: new folder created
+        """
+
+        self.statusReport('Create Folder')
+        self.emit('timeStamp', self.timeStamp)
+        if not os.path.exists(self.params.saveDirectory + self.timeStamp):
+            os.makedirs(self.params.saveDirectory + self.timeStamp)
+        os.chdir(self.params.saveDirectory + self.timeStamp)
+
+    def calculateNumberOfMeasurements(self):
+        """
+        calculate total number of measurements including every Hysteresis and
+        Time Resolved MOKE
+        :return: TotalNumber
+        """
+
+        if self.params.bHysteresis:
+            # timeresolved + static measurement
+            hystNumber = len(self.hystDelayVector_mm) + 1
+        else:
+            hystNumber = 0
+
+        TotalNumber = hystNumber + \
+                      len(self.fluenceVector)*len(self.voltageVector)
+
+        return TotalNumber
+
+    def calculateProgress(self, meas):
+        """
+        calculate the progress based on total Number for all measuremenss
+        (small bar) and the current measurement (large bar)
+
+        :param: meas : describes the measurement "mode", necessary because total
+        percentage of single measurement is different for Transient and
+        Hysteresis measurements
+
+        emits 'progress': (percentage of all measurements, percentage of the
+        current measurement, number of the current measurement)
+        """
+
+        MultiplyMagnetfield = 2
+        MultiplyChopper = 2
+
+        if self.params.bHysteresis:
+            StepsForHysteresis = np.size(self.resultList[:, 0])
+            PHysteresis = (len(self.hystDelayVector_mm) + 1) * StepsForHysteresis
+        else:
+            PHysteresis = 0
+
+        PTransient = self.params.LoopParams['Loops'] * \
+            self.delaysPerLoop() * MultiplyMagnetfield * len(self.fluenceVector) * \
+                     len(self.voltageVector)
+
+        # Calculation of all Progess
+        PTotalOverall = PTransient + PHysteresis
+        P_momentTotal = self.TotalProgresscount
+        PercentageTotal = int((P_momentTotal * 100) / PTotalOverall)
+
+        # Calculation of single measurement progress
+        # meas = 0: Transient is measured
+        if meas == 0:
+            PTotal = self.params.LoopParams['Loops'] * \
+                self.delaysPerLoop() * MultiplyMagnetfield
+        # meas = 1: Hysteresis is measured
+        if meas == 1:
+            PTotal = StepsForHysteresis
+        P_moment = self.Progresscount
+        Percentage = int((P_moment*100)/PTotal)
+        self.emit('progress', (PercentageTotal, Percentage,
+                               self.CurrentNumber))
+
+    def delaysPerLoop(self):
+        """
+        :return: mean number of delays of a loop, with a refined delay grid
+        GridParams['NewPoints'] more delays in every loop after the first
+        """
+
+        delays = len(self.coarseGrid[0] if self.coarseGrid is not None
+                     else self.stageVector_mm)
+        return delays + self.params.GridParams['NewPoints'] * \
+            (self.params.LoopParams['Loops'] - 1) / 2
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    # ~~~ e) Run & measurement order ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    def run(self):
+        """
+        Measure all TR MOKE and TR Hysteresis of the fluence and voltage
+        vectors as one campaign (see campaign.py), emits 'finished' at the end
+        """
+
+        journal = None
+        if self.params.bSave:
+            journal = self.params.saveDirectory + self.timeStamp + \
+                      "\\Campaign.txt"
+        Campaign(self, journal).run()
+        self.emit('finished')
+
+    def measureAdjustement(self):
+        """
+        Measurement for the adjustement of the overlapp (Button "Justage").
+
+        Show MO contrast in plot as function of time, but not of stage position
+        Stage is set to a position shortly after the timezero (GUI value)
+        """
+
+        self.initializeStage()
+        position = self.stage.calcStageWay(
+            self.params.MeasParams['timeZero'] +
+            self.params.MeasParams['timeoverlapp'])
+        self.stage.moveStage(position)
+        self.measureMOContrast()
+
+    def measureStaticHysteresis(self):
+        """
+        Measure Hysteresis without Pump Laser blocked by shutter
+        """
+
+        self.moveShutter(True)
+        self.measureHysteresis('Static')
+
+        # no useful information contained in the pumped value
+        # - columns are deleted
+        np.delete(self.resultList, 2, 1)
+        if self.params.bSave:
+            self.saveOnlyHysteresis()
+        self.moveShutter(False)
+
+    def measureHysteresis(self, position):
+        """
+        Measure a Hysteresis at a certain delay points.
+
+        resultList
+        :param position: Stage delay for naming the save file
+        :return: self.resultList
+        """
+
+        self.statusReport('Measuring Hysteresis at ' + str(position))
+        # set autofocus to Hysteresis Plot in GUI
+        self.emit('measurement', 'Hysteresis')
+        self.Progresscount = 0
+
+        try:
+            self.resultList = self.initializeHysteresisArray()
+        except TypeError:
+            return
+
+        if bHysteresisSweep:
+            self.measureHysteresisSweep()
+            self.saveHysteresisAtPosition(position)
+            self.CurrentNumber += 1
+            return
+
+        # every finished field step is appended to the partial file, the
+        # complete file is written once at the end
+        self.openHysteresisWriter(position)
+
+        for i in range(np.size(self.resultList[:, 0])):
+            with timer.phase('Magnet'):
+                self.NITasks.write(self.resultList[i, 0])
+            attempt = 1
+
+            # attempt used to repeat measurements that have an unequal amount of
+            # chopped and unchopped values
+            while attempt == 1:
+
+                data = self.readMeasurementCard()
+
+                # channels: 0 balanced Diode, 1 Diode+, 3 Chopper,
+                # 4 Diode-, 5 reference Diode
+                with timer.phase('Demux'):
+                    ChopperStats, attempt = \
+                        utilities.sortAfterChopperAllChannels(data, 3)
+                chop = ChopperStats['Chop']
+                unchop = ChopperStats['UnChop']
+
+                #if not bDebug:
+                #    self.checkIfLaserOff(refchop)
+
+                self.emit('idle')
+                self.calculateProgress(1)
+                self.TotalProgresscount += 1
+                self.Progresscount += 1
+
+
+            self.resultList[i, 1:9] = [chop[0], unchop[0], chop[5], unchop[5],
+                                       chop[1], unchop[1], chop[4], unchop[4]]
+
+            self.emit('data', ('Hysteresis',))
+            with timer.phase('Save'):
+                self.hysteresisWriter.append(self.resultList[i])
+
+        self.emit('render')
+        self.saveHysteresisAtPosition(position)
+        self.CurrentNumber += 1
+
+    def measureHysteresisSweep(self):
+        """
+        Measure the complete Hysteresis in one hardware timed sweep: the
+        voltages of the resultList are written as one waveform, each value is
+        held for SettleShots + MeasurementPoints laser shots while the
+        Analog Input is read synchronously. The first SettleShots of every
+        value are discarded (settling of the magnet), the remaining shots are
+        sorted after the chopper for all field steps at once.
+        A field step can not be repeated within the sweep (the magnetization
+        depends on the steps before): steps with a missing chopper phase or
+        an unequal number of chopped and unchopped values (repeated by the
+        step by step measurement) are set to NaN and reported.
+
+        :return: self.resultList
+        """
+
+        settle = int(self.params.HysteresisParameters['SettleShots'])
+        shots = settle + self.params.LoopParams['MeasurementPoints']
+        steps = np.size(self.resultList[:, 0])
+
+        def showStep(idx, block):
+            ChopperStats, attempt = \
+                utilities.sortAfterChopperAllChannels(block[:, settle:], 3)
+            if attempt == 1:
+                self.resultList[idx, 1:3] = np.nan
+            else:
+                self.resultList[idx, 1:3] = [ChopperStats['Chop'][0],
+                                             ChopperStats['UnChop'][0]]
+            self.emit('data', ('Hysteresis',))
+            self.Progresscount += 1
+            self.TotalProgresscount += 1
+            self.calculateProgress(1)
+            self.emit('idle')
+
+        with timer.phase('Sweep'):
+            data = self.NITasks.sweep(self.resultList[:, 0], shots,
+                                      callback=showStep)
+
+        # data: channels x field steps x shots
+        with timer.phase('Demux'):
+            ChopperStats, attempt = \
+                utilities.sortAfterChopperAllChannels(data[:, :, settle:], 3)
+        chop = ChopperStats['Chop']
+        unchop = ChopperStats['UnChop']
+        self.resultList[:, 1:9] = np.column_stack(
+            [chop[0], unchop[0], chop[5], unchop[5],
+             chop[1], unchop[1], chop[4], unchop[4]])
+        if attempt == 1:
+            invalid = (ChopperStats['ChopCount'] == 0) | \
+                (ChopperStats['ChopCount'] != ChopperStats['UnChopCount'])
+            self.resultList[invalid, 1:9] = np.nan
+            voltages = [round(float(v), 4) for v in self.resultList[invalid, 0]]
+            self.statusReport(
+                'Hysteresis sweep: ' + str(len(voltages)) + ' field steps '
+                'without equal chopped and unchopped values set to NaN: ' +
+                ', '.join(str(v) for v in voltages[:10]) +
+                (' ...' if len(voltages) > 10 else '') + ' V')
+        self.emit('data', ('Hysteresis',))
+        self.emit('render')
+        self.statusReport('Hysteresis sweep finished: ' + str(steps) +
+                          ' field steps')
+
+    def hysteresisDelay(self, position):
+        """
+        When value of position is not string (as it would be for static)
+        use the delay value in ps to name saving file,
+        else use the original name ('static') for saving.
+        :param position: stage position in mm or 'Static'
+        :return: delay in ps or 'Static'
+        """
+
+        if isinstance(position, int) or isinstance(position, float):
+            return self.stage.calcLightWay(position)
+        return position
+
+    def saveHysteresisAtPosition(self, position):
+        """
+        Save the Hysteresis measured at a stage position.
+        :param position: stage position in mm or 'Static'
+        """
+
+        self.saveHysteresis(self.hysteresisDelay(position))
+
+    def measureMOContrast(self):
+        """
+        measure only MO contrast: stage is stationary at one position.
+        It displays the MO contrast for the entered magnetic field in an
+        infinity loop (if end if axid is reached it starts again).
+        """
+
+        self.emit('measurement', 'MOContrast')
+        vector = np.arange(0, 501)
+        self.PP_Plus = np.zeros((int(len(vector)), 2))
+        self.emit('voltage', self.params.Parameters['Voltage'])
+        self.NITasks.write(self.params.Parameters['Voltage'])
+        self.Stage_idx = int(vector[0])
+
+        while True:
+            repeat = 0
+
+            while repeat < 1:
+                data = self.readMeasurementCard()
+                self.emit('idle')
+                # returned attempt shows if the length of the lists are
+                # equal or not. if not: repeat the measurement.
+                ChopperStats, attempt = \
+                    utilities.sortAfterChopperAllChannels(data, 3)
+                if attempt == 1:
+                    repeat -= 1
+                else:
+                    self.emit('data', ('MOKE',))
+                    self.calculateMO(ChopperStats, vector)
+
+                repeat += 1
+            self.Stage_idx += 1
+            if self.Stage_idx == 500:
+                self.Stage_idx = 0
+        self.NITasks.write(0)
+
+    def calculateMO(self, ChopperStats, vector):
+        """
+        calculate the measured MO signal (Pump Probe for one magnetic field
+        direction)
+
+        :param ChopperStats: sorted values from sortAfterChopperAllChannels
+        :param vector:
+        :return: self.PP_Plus
+        """
+
+        self.PP_Plus[self.Stage_idx, 0] = vector[int(self.Stage_idx)]
+        self.PP_Plus[self.Stage_idx, 1] = \
+            ChopperStats['Chop'][0] - ChopperStats['UnChop'][0]
+
+    def measureTransient(self, entry):
+        """
+        measure time resolved trace of MOKE for applied voltage (entry)
+        :param entry: Voltage for Time Trace
+        :return:
+        """
+
+        self.emit('measurement', 'Transient')
+        self.initializeTransientArrays()
+        self.Progresscount = 0
+        self.StartMeasurement = True
+
+        Loop = 1
+        self.PP_MinusIdx = 0
+        self.PP_PlusIdx = 0
+
+        self.params.Parameters['Voltage'] = float(entry)
+        self.emit('voltage', self.params.Parameters['Voltage'])
+
+        if self.params.bSave:
+            self.saveToMeasurementParameterList()
+            self.openDataWriter(bStart=True)
+            
+        bAborted = False
+        while Loop < self.params.LoopParams['Loops']+1:
+            Polarity_Field = 1
+            self.MagneticFieldChange = 0
+            self.statusReport('Loop: '+str(Loop))
+
+            while self.MagneticFieldChange < 2:
+                with timer.phase('Magnet'):
+                    self.NITasks.write(Polarity_Field *
+                                       self.params.Parameters['Voltage'])
+
+                self.Stage_idx = 0
+                self.Stage_idx2 = (len(self.stageVector_mm)-1)
+                self.j, self.k = 0, 0
+
+                if bFlyScan:
+                    if not self.measureFlyScan(Loop, Polarity_Field):
+                        bAborted = True
+                        break
+                else:
+                    self.measureStepScan(Loop, Polarity_Field)
+                self.emit('timing', timer.summary())
+
+                self.MagneticFieldChange += 1
+                Polarity_Field = Polarity_Field*(-1)
+
+                # to save time: measure on return way of stage
+                self.stageVector_mm = self.stageVector_mm[::-1]
+            if bAborted:
+                break
+
+            if Loop > 1:
+                # the error decreases with 1/sqrt(Loops): the measurement can
+                # be stopped as soon as the error is small enough
+                self.statusReport(
+                    'Loop ' + str(Loop) + ': standard error of MOKE signal '
+                    '{:.3g}'.format(np.nanmedian(
+                        self.standardErrors()['MOKE'])))
+            Loop += 1
+
+            if self.params.bSave:
+                self.saveData()
+
+            if Loop <= self.params.LoopParams['Loops'] and \
+                    self.params.GridParams['NewPoints'] > 0:
+                self.refineDelayGrid(Loop)
+
+        if bAborted:
+            self.statusReport('Transient Measurement aborted in Loop ' +
+                              str(Loop))
+        else:
+            self.statusReport('Finished Transient Measurement')
+
+        if self.params.bSave:
+            self.saveData()
+            self.closeDataWriter()
+        # saved: stop() does not need to save this transient again
+        self.StartMeasurement = False
+        self.NITasks.write(0)
+
+    def measureStepScan(self, Loop, Polarity_Field):
+        """
+        measure the delays of self.stageVector_mm one after the other: the
+        stage stops at every delay while the values are read.
+        :param Loop: current loop
+        :param Polarity_Field: direction of the magnetic field (1, -1)
+        """
+
+        # the stage moves in a worker thread: the move to the next
+        # delay is started as soon as the data of the current delay
+        # is read, sorting, averaging and plotting run while the
+        # stage is moving and settling
+        positions = self.stageVector_mm
+        move = self.stage.moveStage_async(positions[0])
+        shots = []
+
+        for idx, Stagemove in enumerate(positions):
+            with timer.phase('Stage move'):
+                move.result()
+            self.Pos_ps = self.stage.calcLightWay(Stagemove)
+            self.statusReport('Measure Transient: '
+                              'Stage Position in ps: '+str(self.Pos_ps))
+            repeat = 0
+
+            while repeat < 1:
+                # returned attempt shows if the length of the lists are
+                # equal or not. if not: repeat the measurement.
+                data, ChopperStats, attempt = self.readDelayPoint()
+                if attempt == 1:
+                    repeat -= 1
+                    self.emit('idle')
+                else:
+                    if idx + 1 < len(positions):
+                        move = self.stage.moveStage_async(
+                            positions[idx + 1])
+                    shots.append(data.shape[1])
+                    with timer.phase('Save raw'):
+                        self.saveRawData(Loop, Polarity_Field, data,
+                                         self.Pos_ps)
+                    self.emit('idle')
+                    with timer.phase('Analysis'):
+                        self.dataOperations(Loop, Polarity_Field, data,
+                                            ChopperStats)
+
+                        if Loop == 1:
+                            self.calculateFirstLoop()
+                        else:
+                            self.calculateLoopAverage()
+
+                repeat += 1
+                self.Progresscount += 1
+                self.TotalProgresscount += 1
+                self.calculateProgress(0)
+
+            self.Stage_idx += 1
+            self.Stage_idx2 -= 1
+
+        if self.params.LoopParams['TargetError'] > 0:
+            self.statusReport('Adaptive Repeats: ' + str(sum(shots)) +
+                              ' shots, ' + str(min(shots)) + ' to ' +
+                              str(max(shots)) + ' per delay')
+
+        # show the last delays of the scan
+        self.emit('render')
+
+    def measureFlyScan(self, Loop, Polarity_Field):
+        """
+        measure the delays of self.stageVector_mm in one continuous move of
+        the stage (fly scan). The XPS latches the stage position for every
+        laser shot (laser trigger on TRIG IN of the XPS) while the
+        measurement card reads every shot. Afterwards each shot is assigned to
+        the delay bin it was measured in and sorted after the chopper.
+        The velocity is chosen so every delay bin gets about
+        self.params.LoopParams['MeasurementPoints'] shots.
+        :param Loop: current loop
+        :param Polarity_Field: direction of the magnetic field (1, -1)
+        :return: False if the scan was aborted (stage not prepared or not
+        moved), nothing is binned then
+        """
+
+        positions = np.asarray(self.stageVector_mm, dtype=np.float64)
+        order = np.argsort(positions)
+        binOfPosition = np.empty(len(positions), dtype=int)
+        binOfPosition[order] = np.arange(len(positions))
+        edges = utilities.binEdges(positions[order])
+        velocity = np.min(np.diff(edges)) * \
+            self.params.FlyScanParams['LaserRate'] / \
+            self.params.LoopParams['MeasurementPoints']
+
+        self.statusReport('Fly Scan: ' + str(positions[0]) + ' mm to ' +
+                          str(positions[-1]) + ' mm, ' + str(velocity) +
+                          ' mm/s')
+        with timer.phase('Stage move'):
+            duration = self.stage.prepareFlyScan(positions[0],
+                                                 positions[-1], velocity)
+        if duration <= 0:
+            self.statusReport('Fly Scan: stage can not be prepared for ' +
+                              str(positions[0]) + ' mm to ' +
+                              str(positions[-1]) + ' mm, scan aborted')
+            return False
+        shots = int(duration * self.params.FlyScanParams['LaserRate'])
+        moves = []
+
+        def startMotion():
+            moves.append(self.stage.startFlyScan(shots))
+
+        with timer.phase('Fly scan'):
+            data, offset = self.NITasks.flyScan(
+                shots + self.params.FlyScanParams['MarginShots'],
+                startMotion)
+            errorCode = moves[0].result()
+        with timer.phase('Gathering'):
+            gathered = self.stage.finishFlyScan()
+        if errorCode != 0 or not np.any(np.isfinite(gathered)):
+            self.statusReport('Fly Scan: stage not moved or no positions '
+                              'gathered (error ' + str(errorCode) +
+                              '), scan aborted')
+            return False
+
+        with timer.phase('Demux'):
+            ChopperStats = utilities.binFlyScan(data, gathered, offset,
+                                                edges, 3)
+
+        if self.runFile and self.dataWriter:
+            n = min(len(gathered), data.shape[1] - offset)
+            shotPositions = np.full(data.shape[1], np.nan)
+            shotPositions[offset:offset + n] = \
+                [self.stage.calcLightWay(p) for p in gathered[:n]]
+            with timer.phase('Save raw'):
+                self.saveRawData(Loop, Polarity_Field, data, shotPositions)
+        chop, unchop = ChopperStats['Chop'], ChopperStats['UnChop']
+
+        for idx, Stagemove in enumerate(positions):
+            b = binOfPosition[idx]
+            if ChopperStats['ChopCount'][0, b] == 0 or \
+                    ChopperStats['UnChopCount'][0, b] == 0:
+                self.statusReport('Fly Scan: no values at ' + str(Stagemove))
+            self.Pos_ps = self.stage.calcLightWay(Stagemove)
+            binData = np.column_stack([chop[:, b], unchop[:, b]])
+            with timer.phase('Analysis'):
+                self.dataOperations(Loop, Polarity_Field, binData,
+                                    {'Chop': chop[:, b],
+                                     'UnChop': unchop[:, b]})
+
+                if Loop == 1:
+                    self.calculateFirstLoop()
+                else:
+                    self.calculateLoopAverage()
+
+            self.Progresscount += 1
+            self.TotalProgresscount += 1
+            self.Stage_idx += 1
+            self.Stage_idx2 -= 1
+
+        self.calculateProgress(0)
+        self.emit('render')
+        self.emit('idle')
+        return True
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    # ~~~ f) Data Analysis ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    def calculateLoopAverage(self):
+        """
+        Calculate Loop Average for
+        - MOKE_Average
+        - MinusDiode_Average
+        - PlisDiode_Average
+        from the averages of all loops of both magnetic field directions
+        """
+
+        self.MOKE_Average[:, 1] = self.PP_Plus[:, 1] - self.PP_Minus[:, 1]
+        self.MinusDiode_Average[:, 1] = (self.MinusDiode_PP_Minus[:, 1] +
+                                         self.MinusDiode_PP_Plus[:, 1]) / 2
+        self.PlusDiode_Average[:, 1] = (self.PlusDiode_PP_Minus[:, 1] +
+                                        self.PlusDiode_PP_Plus[:, 1]) / 2
+
+    def calculateFirstLoop(self):
+        """
+        Set first column to Stagevector
+        Calculate MOKE and Diodes for first loop
+        """
+
+        self.MOKE_Average[:, 0] = self.stageVector_ps
+        self.MinusDiode_Average[:, 0] = self.stageVector_ps
+        self.PlusDiode_Average[:, 0] = self.stageVector_ps
+        self.calculateLoopAverage()
+
+    def standardErrors(self):
+        """
+        Standard error of the averages of all loops for every delay (NaN
+        before the second loop), the errors of both magnetic field
+        directions are added in quadrature.
+        :return: dictionary with the errors of 'MOKE', 'MinusDiode',
+        'PlusDiode' and every Pump-Probe array (f.e. 'PP_Plus')
+        """
+
+        errors = {name: statistics.standardError()
+                  for name, statistics in self.PPStatistics.items()}
+        errors['MOKE'] = np.sqrt(errors['PP_Plus'] ** 2 +
+                                 errors['PP_Minus'] ** 2)
+        errors['MinusDiode'] = np.sqrt(errors['MinusDiode_PP_Plus'] ** 2 +
+                                       errors['MinusDiode_PP_Minus'] ** 2) / 2
+        errors['PlusDiode'] = np.sqrt(errors['PlusDiode_PP_Plus'] ** 2 +
+                                      errors['PlusDiode_PP_Minus'] ** 2) / 2
+        return errors
+
+    def refineDelayGrid(self, Loop):
+        """
+        Insert GridParams['NewPoints'] delays into the grid of the running
+        transient where the averaged MOKE signal has the largest curvature
+        or standard error (see delayPlanner.py). Called between two loops
+        (stage vectors in the order of the positive field): the new delays
+        are measured from the next loop on, the negative field is still
+        measured on the return way of the stage.
+        :param Loop: next loop
+        """
+
+        stageVector_ps, rows, inserted = delayPlanner.refineDelays(
+            self.stageVector_ps, self.MOKE_Average[:, 1],
+            self.standardErrors()['MOKE'],
+            self.params.GridParams['NewPoints'],
+            self.params.GridParams['MinStep'],
+            self.params.GridParams['Weight'])
+        if not len(inserted):
+            return
+
+        stageVector_mm = self.stage.calculateStagemmFromps(stageVector_ps)
+        self.applyDelayGrid(Loop, stageVector_ps, stageVector_mm, rows)
+        self.emit('grid', (self.CurrentNumber, Loop, stageVector_ps,
+                           stageVector_mm, rows))
+        self.statusReport('Delay grid: ' + str(len(inserted)) +
+                          ' delays inserted, ' + str(len(stageVector_ps)) +
+                          ' delays')
+
+    def applyDelayGrid(self, Loop, stageVector_ps, stageVector_mm, rows):
+        """
+        Continue the transient with new delays: the averages and statistics
+        of the measured delays are moved to their rows in the new grid, the
+        new delays have no values yet (the averages are interpolated from
+        the neighbouring delays until they are measured).
+        :param Loop: next loop
+        :param stageVector_ps, stageVector_mm: new delays (order of the
+        positive field)
+        :param rows: row of every old delay in the new delays
+        """
+
+        if self.coarseGrid is None:
+            self.coarseGrid = (self.stageVector_ps, self.stageVector_mm)
+        stageVector_ps = np.asarray(stageVector_ps, dtype=np.float64)
+        delays = len(stageVector_ps)
+        measured = np.argsort(rows)
+
+        for name in PumpProbeArrays:
+            old = getattr(self, name)
+            new = np.zeros((delays, 2))
+            new[:, 0] = stageVector_ps
+            new[:, 1] = np.interp(stageVector_ps,
+                                  stageVector_ps[rows[measured]],
+                                  old[measured, 1])
+            new[rows] = old
+            setattr(self, name, new)
+            self.PPStatistics[name].expand(rows, delays)
+
+        # the values of every loop are appended, room for the remaining loops
+        size = max(self.PP_PlusIdx, self.PP_MinusIdx) + \
+            delays * (self.params.LoopParams['Loops'] - Loop + 1) + 1
+        for name in ('diffDiode_PP_Plus_AllLoops',
+                     'diffDiode_PP_Minus_AllLoops'):
+            old = getattr(self, name)
+            if size > len(old):
+                setattr(self, name, np.concatenate(
+                    (old, np.zeros((size - len(old), 2)))))
+
+        for name in ('diffDiodeChopMinus', 'diffDiodeUnChopMinus',
+                     'diffDiodeChopPlus', 'diffDiodeUnChopPlus',
+                     'MinusDiodeChop_minus', 'MinusDiodeChop_plus',
+                     'MinusDiodeUnChop_minus', 'MinusDiodeUnChop_plus',
+                     'PlusDiodeChop_minus', 'PlusDiodeChop_plus',
+                     'PlusDiodeUnChop_minus', 'PlusDiodeUnChop_plus',
+                     'RefDiodeChop_minus', 'RefDiodeChop_plus',
+                     'RefDiodeUnChop_minus', 'RefDiodeUnChop_plus'):
+            setattr(self, name, [0] * delays)
+
+        self.stageVector_ps = self.refinedVector = stageVector_ps
+        self.stageVector_mm = stageVector_mm
+        self.MOKE_Average = np.zeros((delays, 2))
+        self.MinusDiode_Average = np.zeros((delays, 2))
+        self.PlusDiode_Average = np.zeros((delays, 2))
+        self.calculateFirstLoop()
+
+    def dataOperations(self, Loop, Polarity_Field, data, ChopperStats):
+        """
+        sort data according to chopper and Magnetic Field direction
+
+        channels in data: 0 balanced Diode, 1 Diode-, 2 Magnetic Field,
+        3 Chopper, 4 Diode+, 5 reference Diode
+
+        :param Loop, Polarity_Field, data
+        :param ChopperStats: sorted values from sortAfterChopperAllChannels
+        """
+
+        if self.observers:
+            self.emit('block', self.reducedBlock(Loop, Polarity_Field, data,
+                                                 ChopperStats))
+
+        chop = ChopperStats['Chop']
+        unchop = ChopperStats['UnChop']
+        DiffDiodeChop, DiffDiodeUnChop = chop[0], unchop[0]
+        ReferenceChop, ReferenceUnchop = chop[5], unchop[5]
+        MinusDiodeChop, MinusDiodeUnChop = chop[1], unchop[1]
+        PlusDiodeChop, PlusDiodeUnChop = chop[4], unchop[4]
+
+        if Polarity_Field < 0:
+            self.calculateMinusMagneticField(DiffDiodeChop, DiffDiodeUnChop,
+                                             ReferenceChop, ReferenceUnchop,
+                                             MinusDiodeChop, MinusDiodeUnChop,
+                                             PlusDiodeChop, PlusDiodeUnChop,
+                                             Loop, data)
+        else:
+            self.calculatePlusMagneticField(DiffDiodeChop, DiffDiodeUnChop,
+                                             ReferenceChop, ReferenceUnchop,
+                                             MinusDiodeChop, MinusDiodeUnChop,
+                                             PlusDiodeChop, PlusDiodeUnChop,
+                                            Loop, data)
+        if self.dataWriter:
+            self.dataWriter.update()
+
+        if Loop == 1:
+            self.calculatePPFirstLoop(Polarity_Field)
+        else:
+            self.calculatePPAverageLoop(Polarity_Field)
+        self.emit('data', ('PumpOnly', 'ProbeOnly', 'MOKE', 'Intensity',
+                           'PP1' if Polarity_Field > 0 else 'PP2'))
+
+    def reducedBlock(self, Loop, Polarity_Field, data, ChopperStats):
+        """
+        Reduced values of the current delay point, everything replayBlock
+        needs to repeat dataOperations.
+        :param Loop, Polarity_Field, data, ChopperStats: see dataOperations
+        :return: array of BlockType (one element)
+        """
+
+        block = np.zeros(1, dtype=BlockType)
+        block['Measurement'] = self.CurrentNumber
+        block['Loop'] = Loop
+        block['Polarity'] = Polarity_Field
+        block['Stage_idx'] = self.Stage_idx
+        block['Stage_idx2'] = self.Stage_idx2
+        block['PP_PlusIdx'] = self.PP_PlusIdx
+        block['PP_MinusIdx'] = self.PP_MinusIdx
+        block['Pos_ps'] = self.Pos_ps
+        block['Chop'] = ChopperStats['Chop'][:6]
+        block['UnChop'] = ChopperStats['UnChop'][:6]
+        block['Field'] = data[2][0:2]
+        return block
+
+    def replayBlock(self, block):
+        """
+        Apply a reduced block of another MokeExperiment (e.g. running in the
+        acquisition process) to the arrays of this one. The stage vectors
+        need to be set, the arrays are initialized with every new transient,
+        refined delay grids are applied at the start of their loop.
+        :param block: element of BlockType
+        """
+
+        if block['Measurement'] != self.replayNumber:
+            self.replayNumber = block['Measurement']
+            self.initializeTransientArrays()
+
+        Loop = int(block['Loop'])
+        # delays inserted by the other MokeExperiment before this loop
+        # ('grid' events, appended to self.pendingGrids)
+        while self.pendingGrids and self.pendingGrids[0][:2] <= \
+                (block['Measurement'], Loop):
+            Measurement, gridLoop, stageVector_ps, stageVector_mm, rows = \
+                self.pendingGrids.pop(0)
+            if Measurement == block['Measurement']:
+                self.applyDelayGrid(gridLoop, stageVector_ps, stageVector_mm,
+                                    rows)
+
+        self.Pos_ps = float(block['Pos_ps'])
+        self.Stage_idx = int(block['Stage_idx'])
+        self.Stage_idx2 = int(block['Stage_idx2'])
+        self.j = self.k = self.Stage_idx
+        self.PP_PlusIdx = int(block['PP_PlusIdx'])
+        self.PP_MinusIdx = int(block['PP_MinusIdx'])
+        data = np.zeros((6, 2))
+        data[2] = block['Field']
+        self.dataOperations(Loop, int(block['Polarity']), data,
+                            {'Chop': block['Chop'],
+                             'UnChop': block['UnChop']})
+
+        if Loop == 1:
+            self.calculateFirstLoop()
+        else:
+            self.calculateLoopAverage()
+
+    def calculatePPAverageLoop(self, Polarity_Field):
+        """
+        Add the Pump-Probe values of the current delay to the statistics of
+        all loops (self.PPStatistics) and set the averages depending on the
+        MagneticField. The rows are sorted by the delay for both directions
+        (the negative field is measured on the return way of the stage).
+        :param Polarity_Field:
+        :return:
+
+        self.PP_Plus
+        self.MinusDiode_PP_Plus
+        self.PlusDiode_PP_Plus
+        self.RefDiode_PP_Plus
+
+        OR
+
+        self.PP_Minus
+        self.MinusDiode_PP_Minus
+        self.PlusDiode_PP_Minus
+        self.RefDiode_PP_Minus
+        """
+
+        idx = self.Stage_idx
+        if Polarity_Field > 0:
+            row = self.Stage_idx
+            values = {
+                'PP_Plus': self.diffDiodeChopPlus[idx] -
+                self.diffDiodeUnChopPlus[idx],
+                'MinusDiode_PP_Plus': self.MinusDiodeChop_plus[idx] -
+                self.MinusDiodeUnChop_plus[idx],
+                'PlusDiode_PP_Plus': self.PlusDiodeChop_plus[idx] -
+                self.PlusDiodeUnChop_plus[idx],
+                'RefDiode_PP_Plus': self.RefDiodeChop_plus[idx] -
+                self.RefDiodeUnChop_plus[idx]}
+        else:
+            row = self.Stage_idx2
+            values = {
+                'PP_Minus': self.diffDiodeChopMinus[idx] -
+                self.diffDiodeUnChopMinus[idx],
+                'MinusDiode_PP_Minus': self.MinusDiodeChop_minus[idx] -
+                self.MinusDiodeUnChop_minus[idx],
+                'PlusDiode_PP_Minus': self.PlusDiodeChop_minus[idx] -
+                self.PlusDiodeUnChop_minus[idx],
+                'RefDiode_PP_Minus': self.RefDiodeChop_minus[idx] -
+                self.RefDiodeUnChop_minus[idx]}
+
+        for name, value in values.items():
+            statistics = self.PPStatistics[name]
+            statistics.add(row, value)
+            getattr(self, name)[row, 1] = statistics.mean[row]
+
+    def calculatePPFirstLoop(self, Polarity_Field):
+        """
+        Set the delay of the Pump-Probe values depending on MagneticField
+        for first loop and add the values (calculatePPAverageLoop)
+        :param Polarity_Field:
+        """
+
+        if Polarity_Field > 0:
+            row = self.Stage_idx
+            names = PumpProbeArrays[:4]
+        else:
+            row = self.Stage_idx2
+            names = PumpProbeArrays[4:]
+        for name in names:
+            getattr(self, name)[row, 0] = self.Pos_ps
+        self.calculatePPAverageLoop(Polarity_Field)
+
+    def calculatePlusMagneticField(self, DiffDiodeChop, DiffDiodeUnChop,
+                                   ReferenceChop, ReferenceUnchop,
+                                   MinusDiodeChop, MinusDiodeUnChop,
+                                   PlusDiodeChop, PlusDiodeUnChop, Loop, data):
+        """
+        Sort all values in their list and Position in the general dataframe
+        for the positive magnetic field
+
+        :param DiffDiodeChop:
+        :param DiffDiodeUnChop:
+        :param ReferenceChop:
+        :param ReferenceUnchop:
+        :param MinusDiodeChop:
+        :param MinusDiodeUnChop:
+        :param PlusDiodeChop:
+        :param PlusDiodeUnChop:
+        :param Loop:
+        :param data:
+        :return:
+        """
+        self.diffDiodeChopPlus[self.k] = DiffDiodeChop
+        self.diffDiodeUnChopPlus[self.k] = DiffDiodeUnChop
+        self.MinusDiodeChop_plus[self.k] = MinusDiodeChop
+        self.MinusDiodeUnChop_plus[self.k] = MinusDiodeUnChop
+        self.PlusDiodeChop_plus[self.k] = PlusDiodeChop
+        self.PlusDiodeUnChop_plus[self.k] = PlusDiodeUnChop
+        self.RefDiodeChop_plus[self.k] = ReferenceChop
+        self.RefDiodeUnChop_plus[self.k] = ReferenceUnchop
+
+        self.AllData_Reduced.appendChopPair(
+            [DiffDiodeChop, DiffDiodeUnChop],
+            [MinusDiodeChop, MinusDiodeUnChop],
+            [PlusDiodeChop, PlusDiodeUnChop],
+            [ReferenceChop, ReferenceUnchop], self.Pos_ps, Loop, data[2][0:2])
+
+        self.diffDiode_PP_Plus_AllLoops[self.PP_PlusIdx, 0] = self.Pos_ps
+        self.diffDiode_PP_Plus_AllLoops[self.PP_PlusIdx, 1] = DiffDiodeChop - \
+                                                         DiffDiodeUnChop
+
+        self.k += 1
+        self.PP_PlusIdx += 1
+
+    def calculateMinusMagneticField(self, DiffDiodeChop, DiffDiodeUnChop,
+                                   ReferenceChop, ReferenceUnchop,
+                                   MinusDiodeChop, MinusDiodeUnChop,
+                                   PlusDiodeChop, PlusDiodeUnChop, Loop, data):
+        """
+        Sort all values in their list and Position in the general dataframe
+        for the negative magnetic field
+
+        :param DiffDiodeChop:
+        :param DiffDiodeUnChop:
+        :param ReferenceChop:
+        :param ReferenceUnchop:
+        :param MinusDiodeChop:
+        :param MinusDiodeUnChop:
+        :param PlusDiodeChop:
+        :param PlusDiodeUnChop:
+        :param Loop:
+        :param data:
+        :return:
+        """
+
+        self.diffDiodeChopMinus[self.j] = DiffDiodeChop
+        self.diffDiodeUnChopMinus[self.j] = DiffDiodeUnChop
+        self.MinusDiodeChop_minus[self.j] = MinusDiodeChop
+        self.MinusDiodeUnChop_minus[self.j] = MinusDiodeUnChop
+        self.PlusDiodeChop_minus[self.j] = PlusDiodeChop
+        self.PlusDiodeUnChop_minus[self.j] = PlusDiodeUnChop
+        self.RefDiodeChop_minus[self.j] = ReferenceChop
+        self.RefDiodeUnChop_minus[self.j] = ReferenceUnchop
+
+        self.AllData_Reduced.appendChopPair(
+            [DiffDiodeChop, DiffDiodeUnChop],
+            [MinusDiodeChop, MinusDiodeUnChop],
+            [PlusDiodeChop, PlusDiodeUnChop],
+            [ReferenceChop, ReferenceUnchop], self.Pos_ps, Loop, data[2][0:2])
+
+        self.diffDiode_PP_Minus_AllLoops[self.PP_MinusIdx, 0] = self.Pos_ps
+        self.diffDiode_PP_Minus_AllLoops[self.PP_MinusIdx, 1] = DiffDiodeChop - \
+                                                           DiffDiodeUnChop
+
+        self.j += 1
+        self.PP_MinusIdx += 1
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    # ~~~ g) Save Data ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+    def voltageDirectory(self):
+        """
+        :return: directory of the current fluence and voltage
+        """
+
+        return self.params.saveDirectory + self.timeStamp + \
+               "\\Fluence\\" + str(self.params.MeasParams['Fluence']) + \
+               "\\" + str(self.params.Parameters['Voltage'])
+
+    def changeToVoltageDirectory(self):
+        """
+        if the directory of the current fluence and voltage does not exist
+        already: create it, change into it
+        """
+
+        if not os.path.exists(self.voltageDirectory()):
+            os.makedirs(self.voltageDirectory())
+
+        os.chdir(self.voltageDirectory())
+
+    def openDataWriter(self, bStart=False):
+        """
+        Save the Parameters and open "AllData_Reduced.txt" of the current
+        voltage. The rows are appended while measuring (after
+        SaveParams['FlushRows'] rows or SaveParams['FlushInterval'] s).
+        :param bStart: a transient starts: the data of the voltage in the
+        run file is replaced, otherwise only "AllData_Reduced" is written
+        again (the raw data stays)
+        """
+
+        self.closeDataWriter()
+        self.changeToVoltageDirectory()
+        self.saveParameters()
+        if self.runFile:
+            if bStart:
+                # a measurement started again (restart, resumed campaign)
+                # replaces the data of the voltage like the text files
+                self.runFile.remove(self.runPath())
+            else:
+                self.runFile.remove(self.runPath() + '/AllData_Reduced')
+            self.runFile.group(self.runPath(),
+                               MeasParams=self.params.MeasParams,
+                               LoopParams=self.params.LoopParams,
+                               Parameters=self.params.Parameters,
+                               StageParams_ps=self.params.StageParams_ps,
+                               Stage_SpeedParams=self.params.Stage_SpeedParams,
+                               stageVector_mm=self.stageVector_mm,
+                               stageVector_ps=self.stageVector_ps)
+        self.dataWriter = MeasurementWriter(
+            self.AllData_Reduced, 'AllData_Reduced.txt',
+            self.params.SaveParams['FlushRows'],
+            self.params.SaveParams['FlushInterval'],
+            self.runFile, self.runPath())
+
+    def openRunFile(self):
+        """
+        Open the HDF5 file of the run "TimeStamp.h5" in the folder of the
+        timestamp (if bHDF5 and h5py is installed)
+        """
+
+        if bHDF5 and h5py is not None and not self.runFile:
+            self.runFile = RunFile(self.params.saveDirectory +
+                                   self.timeStamp + "\\" + self.timeStamp +
+                                   ".h5")
+
+    def closeRunFile(self):
+        if self.runFile:
+            self.runFile.close()
+            self.runFile = None
+
+    def runPath(self):
+        """
+        :return: group of the current fluence and voltage in the run file
+        """
+
+        return 'Fluence/' + str(self.params.MeasParams['Fluence']) + '/' + \
+               str(self.params.Parameters['Voltage'])
+
+    def saveRawData(self, Loop, Polarity_Field, data, positions):
+        """
+        Append every shot read by the card to the run file (only while
+        saving the transient)
+        :param data: array (channels x shots)
+        :param positions: stage position in ps (one value or one per shot)
+        """
+
+        if self.runFile and self.dataWriter:
+            self.runFile.appendRaw(self.runPath(), data, Loop,
+                                   Polarity_Field, positions)
+
+    def closeDataWriter(self):
+        """
+        Write the remaining rows and close "AllData_Reduced.txt"
+        """
+
+        if self.dataWriter:
+            self.dataWriter.close()
+            self.dataWriter = None
+
+    @timer.timed('Save')
+    def saveData(self):
+        """
+
+        Save all data (repeats are averaged)
+        Choppervalue is 1 for chopped and 0 for unchopped values (threshold
+        of 2V, max: 5V, min: 0V), only the measured rows are written.
+        "AllData_Reduced.txt" is not rewritten: the new rows are appended and
+        forced to disk (checkpoint), "MOKE_Average.txt" is replaced in one
+        step
+
+        File Structure of Directories is as follows:
+
+        - TimeStamp
+            |- Static
+                |- Static Hysteresis
+            |- Fluence Values
+                |- Hysteresis
+                    |- TR Hysteresis textfiles: "Fluence"_"Sample"_"Time"ps.txt
+                |- Voltage Values
+                    |- Hyteresis_Measurement_Parameters.txt
+                    |- AllData_Reduced.txt
+                    |- MOKE_Average.txt
+
+        """
+        self.statusReport('Saving...')
+
+        if not self.dataWriter:
+            self.openDataWriter()
+        else:
+            self.changeToVoltageDirectory()
+
+        if self.runFile:
+            self.runFile.writeArray(self.runPath(), 'MOKE_Average',
+                                    self.MOKE_Average)
+        self.dataWriter.checkpoint()
+
+        if bBackgroundSave:
+            # the worker gets copies of the arrays, the next loop starts
+            # while the text file and the plots are written
+            if not self.saveWorker:
+                self.saveWorker = SaveWorker()
+            self.saveWorker.submit(
+                self.voltageDirectory(),
+                {'MOKE_Average.txt': self.MOKE_Average},
+                {'MOKE_AveragePlot.png': self.MOKE_Average,
+                 'PumpProbeSignal_Averaged_1.png': self.PP_Plus,
+                 'PumpProbeSignal_Averaged_2.png': self.PP_Minus,
+                 'PumpProbeSignal_All_1.png': self.diffDiode_PP_Plus_AllLoops,
+                 'PumpProbeSignal_All_2.png':
+                     self.diffDiode_PP_Minus_AllLoops})
+            self.statusReport('Saving in background')
+        else:
+            saveAtomic('MOKE_Average.txt', self.MOKE_Average)
+            self.emit('export', self.voltageDirectory())
+            self.statusReport('Saved!')
+
+    def closeSaveWorker(self):
+        """
+        Wait until the background saving is finished and stop the worker
+        """
+
+        if self.saveWorker:
+            self.saveWorker.close()
+            self.saveWorker = None
+
+    def changeToHysteresisDirectory(self):
+        """
+        if the directory does not exit already: create it, change into it
+        """
+
+        if not os.path.exists(self.params.saveDirectory + self.timeStamp +
+                              "\\Fluence\\" +
+                              str(self.params.MeasParams['Fluence'])+
+                              "\\Hysteresis"):
+            os.makedirs(self.params.saveDirectory + self.timeStamp +
+                        "\\Fluence\\" +
+                        str(self.params.MeasParams['Fluence']) +
+                        "\\Hysteresis")
+
+        os.chdir(self.params.saveDirectory + self.timeStamp + "\\Fluence\\" +
+                 str(self.params.MeasParams['Fluence'])+"\\Hysteresis")
+
+    def hysteresisFileName(self, position):
+        """
+        :param position: delay in ps or 'Static'
+        :return: name of the hysteresis file
+        """
+
+        return str(self.params.MeasParams['Fluence']) + 'mJcm2_' + \
+            str(self.params.MeasParams['sampleName']) + "_" + str(position) + \
+            'ps.txt'
+
+    def openHysteresisWriter(self, position):
+        """
+        Open the partial file of the hysteresis at position, the measured
+        rows are appended while measuring
+        :param position: stage position in mm or 'Static'
+        """
+
+        self.changeToHysteresisDirectory()
+        self.hysteresisWriter = RowWriter(
+            self.hysteresisFileName(self.hysteresisDelay(position)),
+            HysteresisHeader, self.params.SaveParams['CheckpointInterval'])
+
+    def saveHysteresis(self, position):
+        """
+        save hysteresis: written once (atomic) when the hysteresis is
+        finished, the partial file of the hysteresis is removed
+        :param position: delay in ps or 'Static'
+        """
+
+        self.changeToHysteresisDirectory()
+        if self.hysteresisWriter:
+            self.hysteresisWriter.finish(self.resultList)
+            self.hysteresisWriter = None
+        else:
+            saveAtomic(self.hysteresisFileName(position), self.resultList,
+                       HysteresisHeader)
+
+        if self.runFile:
+            self.runFile.writeArray('Fluence/' +
+                                    str(self.params.MeasParams['Fluence']) +
+                                    '/Hysteresis', str(position),
+                                    self.resultList)
+            self.runFile.flush()
+
+    def saveOnlyHysteresis(self):
+        """
+        if the directory does not exit already: create it
+        Save the simple Hysteresis with only two columns (static Hysteresis)
+        """
+
+        if not os.path.exists(
+                        self.params.saveDirectory +
+                        self.timeStamp +"\Fluence\\" +
+                         "\\Static\\"):
+            os.makedirs(self.params.saveDirectory + self.timeStamp +
+                        "\Fluence\\" +
+                         "\\Static\\")
+        os.chdir(self.params.saveDirectory + self.timeStamp +"\Fluence\\" +
+                         "\\Static\\")
+        np.savetxt(str(self.params.MeasParams['sampleName']) + '_NoLaser.txt',
+                   self.resultList, delimiter='\t',
+                   header='#Voltage (V)\t Value ()')
+
+    def saveParameters(self):
+        """
+        Save all Parameters set or used in the measurement in the Parameter file
+        """
+
+        name = 'Hyteresis_Measurement_Parameters.txt'
+        file = open(name, 'w')   # Trying to create a new file or open one
+        file.write("Voltage: {} V\n".format(
+            str(self.params.Parameters['Voltage'])))
+        file.write("Loops: {} \n".format(str(self.params.LoopParams['Loops'])))
+        file.write("Measurementpoints: {} \n".format(
+            str(self.params.LoopParams['MeasurementPoints'])))
+        file.write("Set Fluenz: {} \n".format(
+            str(self.params.MeasParams['Fluence'])))
+        file.write("TimeZero: {} \n".format(
+            str(self.params.MeasParams['timeZero'])))
+        file.write("Pump-Angle: {} \n".format(
+            str(self.params.MeasParams['angle'])))
+        file.write("Samplename: {} \n".format(
+            str(self.params.MeasParams['sampleName'])))
+
+        if not self.params.Stage_ReadFromFile:
+            file.write("StartPoint: {} ps\n".format(
+                str(self.params.StageParams_ps['StartPoint'])))
+            file.write("End Point: {} ps\n".format(
+                str(self.params.StageParams_ps['EndPoint'])))
+            file.write("Stepwidth: {} ps\n".format(
+                str(self.params.StageParams_ps['StepWidth'])))
+            file.write("Stage Velocity: {} \n".format(
+                str(self.params.Stage_SpeedParams['Velocity'])))
+            file.write("Stage Acceleration: {} \n".format(
+                str(self.params.Stage_SpeedParams['Acceleration'])))
+
+        if self.params.Stage_ReadFromFile:
+            file.write("Start \t Stop \t Stepwidth ps\n")
+            for idx, val in enumerate(self.saveVector):
+                entry = '    '.join(str(e) for e in self.saveVector[idx])
+                file.write("{}\n".format(entry))
+
+        if self.params.bHysteresis:
+            file.write("StartPoint: {} ps\n".format(
+                str(self.params.HysteresisParameters['Stepwidth'])))
+            file.write("Amplitude: {} ps\n".format(
+                str(self.params.HysteresisParameters['Amplitude'])))
+            file.write("@StageDelay")
+            for idx, val in enumerate(self.hystDelayVector_ps):
+                entry = '    '.join(str(val))
+                file.write("{}\n".format(entry))
+
+        file.close()
+
+    def saveToMeasurementParameterList(self):
+        """
+        write important parameters in measurement list for easy choise of
+        Measurements and Labbookentry creation
+        """
+        
+        date, time = utilities.partTimeStamp(self.timeStamp)
+        FWHMx, FWHMy = utilities.readFWHMfromBeamprofile()
+        file = utilities.createOrOpenMeasurementParameterList()
+        file.write(date+'\t')
+        file.write(time+'\t')
+        file.write(format(str(self.params.Parameters['Voltage']))+'\t')
+        file.write(format(str(self.params.MeasParams['Fluence']))+'\t')
+        file.write('300'+'\t')
+        file.write(format(str(self.params.MeasParams['timeZero']))+'\t')
+        file.write(FWHMx+'\t')
+        file.write(FWHMy+'\t')
+        file.write(format(str(self.params.MeasParams['angle']))+'\t')
+        file.write(format(str(self.params.MeasParams['sampleName']))+'\t')
+
+        file.write('\n')
+        file.close()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+phaseTimer.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Timing of the phases of a measurement loop (stage move, DAQ read, sorting,
+GUI, saving, ...), to see where the time of a scan goes and to notice a slow
+XPS or exporter. A phase is timed with a with statement or a decorator,
+usually with the timer shared by all modules of the process:
+
+    from phaseTimer import timer
+    with timer.phase('DAQ read'):
+        data = card.read()
+
+    @timer.timed('Save')
+    def saveData():
+        ...
+
+Every phase keeps the number, sum and maximum of all its durations and the
+last durations (samples) for the median and 95% percentile. Timing a phase
+costs two calls of time.perf_counter and an array write (a few µs), so the
+timer can stay on in every measurement. If a trace file is opened, every
+duration is also written as one JSON line (nested phases, f.e. 'GUI' in
+'Analysis', are contained in the time of the outer phase):
+
+    {"phase": "DAQ read", "start": 12.0031, "duration": 0.2012}
+
+(start in s since the timer was created or reset).
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import functools
+import json
+import threading
+import time
+import numpy as np
+
+# Timing Settings
+# if variable is False: phases are not timed (no overhead at all)
+bTiming = True
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Statistics of one Phase ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class PhaseStatistics:
+    """
+    Durations of one phase, the percentiles are calculated from the last
+    samples durations.
+    """
+
+    def __init__(self, samples=1024):
+        self.durations = np.zeros(samples)
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, duration):
+        """
+        :param duration: in s
+        """
+
+        self.durations[self.count % len(self.durations)] = duration
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def summary(self):
+        """
+        :return: dictionary 'count', 'mean', 'p50', 'p95', 'max', 'total'
+        (durations in s)
+        """
+
+        recent = self.durations[:min(self.count, len(self.durations))]
+        p50, p95 = np.percentile(recent, [50, 95])
+        return {'count': self.count, 'mean': self.total / self.count,
+                'p50': p50, 'p95': p95, 'max': self.max,
+                'total': self.total}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Class Phase Timer ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class Phase:
+    """
+    Context manager returned by PhaseTimer.phase
+    """
+
+    __slots__ = ['timer', 'name', 'start']
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.timer.record(self.name, time.perf_counter() - self.start,
+                          self.start)
+        return False
+
+
+class NoPhase:
+    """
+    Context manager doing nothing (bTiming is False)
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+
+class PhaseTimer:
+    """
+    Statistics of all phases of a measurement and the optional trace file.
+    Phases can be nested and timed from several threads.
+    """
+
+    def __init__(self, samples=1024):
+        """
+        :param samples: number of durations kept per phase for the
+        percentiles
+        """
+
+        self.samples = samples
+        self.phases = {}
+        self.lock = threading.Lock()
+        self.trace = None
+        self.origin = time.perf_counter()
+
+    def phase(self, name):
+        """
+        :param name: name of the phase
+        :return: context manager timing the with block
+        """
+
+        if not bTiming:
+            return NoPhase()
+        return Phase(self, name)
+
+    def timed(self, name=None):
+        """
+        Decorator timing every call of a function.
+        :param name: name of the phase (default: name of the function)
+        """
+
+        def decorator(function):
+            phaseName = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.phase(phaseName):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, duration, start=None):
+        """
+        Add a duration to a phase (and the trace).
+        :param name: name of the phase
+        :param duration: in s
+        :param start: time.perf_counter() at the start of the phase
+        """
+
+        with self.lock:
+            statistics = self.phases.get(name)
+            if statistics is None:
+                statistics = self.phases[name] = \
+                    PhaseStatistics(self.samples)
+            statistics.add(duration)
+            if self.trace:
+                if start is None:
+                    start = time.perf_counter() - duration
+                self.trace.write(json.dumps(
+                    {'phase': name, 'start': round(start - self.origin, 6),
+                     'duration': round(duration, 6)}) + '\n')
+
+    def openTrace(self, path):
+        """
+        Write every duration as JSON line into the file (appended).
+        :param path: file name, f.e. "Timing.txt" in the folder of the run
+        """
+
+        self.closeTrace()
+        self.trace = open(path, 'a')
+
+    def closeTrace(self):
+        with self.lock:
+            if self.trace:
+                self.trace.close()
+                self.trace = None
+
+    def reset(self):
+        """
+        Forget all phases (f.e. at the start of a run)
+        """
+
+        with self.lock:
+            self.phases = {}
+            self.origin = time.perf_counter()
+
+    def summary(self):
+        """
+        :return: dictionary with the summary of every phase (see
+        PhaseStatistics.summary)
+        """
+
+        with self.lock:
+            return {name: statistics.summary()
+                    for name, statistics in self.phases.items()}
+
+    def report(self, summary=None):
+        """
+        Table of the phases sorted by their total time.
+        :param summary: summary to show (default: summary of this timer)
+        :return: string, durations in ms
+        """
+
+        if summary is None:
+            summary = self.summary()
+        lines = ['{:<18}{:>7}{:>9}{:>9}{:>9}{:>9}{:>9}'.format(
+            'Phase', 'Count', 'Mean', 'p50', 'p95', 'Max', 'Total')]
+        for name, s in sorted(summary.items(),
+                              key=lambda item: -item[1]['total']):
+            lines.append('{:<18}{:>7}{:>9.1f}{:>9.1f}{:>9.1f}{:>9.1f}'
+                         '{:>9.1f}'.format(
+                             name[:17], s['count'], 1e3 * s['mean'],
+                             1e3 * s['p50'], 1e3 * s['p95'], 1e3 * s['max'],
+                             1e3 * s['total']))
+        return '\n'.join(lines)
+
+
+# timer shared by the modules of one process (engine, GUI, ...)
+timer = PhaseTimer()
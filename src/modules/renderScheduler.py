@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+renderScheduler.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Limits the redrawing of live plots to a fixed frame rate. The measurement
+marks the plots whose data changed as dirty and requests a frame after every
+read. A frame is only rendered if the last one is older than 1/frameRate,
+and only the dirty plots are updated. All changes between two frames are
+shown together in the next frame, so the GUI work does not grow with the
+number of reads.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import time
+
+from phaseTimer import timer
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Class Render Scheduler ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RenderScheduler:
+    """
+    Every plot is registered with a name and the function that pushes its
+    data to the curves.
+    """
+
+    def __init__(self, frameRate=10.):
+        """
+        :param frameRate: maximum number of frames per second
+        """
+
+        self.interval = 1. / frameRate
+        self.lastFrame = 0.
+        self.updates = {}
+        self.dirty = set()
+
+    def register(self, name, update):
+        """
+        :param name: name of the plot
+        :param update: function without arguments updating the plot
+        """
+
+        self.updates[name] = update
+
+    def markDirty(self, *names):
+        """
+        Mark plots as changed, they are updated with the next frame.
+        """
+
+        self.dirty.update(names)
+
+    def reset(self):
+        """
+        Forget all changes (e.g. after the plots are cleared).
+        """
+
+        self.dirty.clear()
+        self.lastFrame = 0.
+
+    def request(self):
+        """
+        Render a frame if the last frame is older than 1/frameRate.
+        :return: True if a frame was rendered
+        """
+
+        if time.time() - self.lastFrame < self.interval:
+            return False
+        self.render()
+        return True
+
+    def render(self):
+        """
+        Update all dirty plots now (e.g. at the end of a measurement).
+        """
+
+        with timer.phase('Render'):
+            for name, update in self.updates.items():
+                if name in self.dirty:
+                    update()
+        self.dirty.clear()
+        self.lastFrame = time.time()
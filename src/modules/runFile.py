@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+runFile.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+h5py Version: 2.8.0
+
+One HDF5 file per measurement (timestamp) holding all data of the run.
+The data is appended while measuring, every dataset is chunked and
+compressed. Structure of the file:
+
+- TimeStamp.h5
+    |- Fluence
+        |- Fluence Value
+            |- Voltage Value (attributes: MeasParams, LoopParams, Parameters,
+               stage vectors)
+                |- AllData_Reduced (rows of the MeasurementStore)
+                |- MOKE_Average
+                |- Raw (shots x channels, every shot read by the card)
+                |- RawPosition (stage position in ps for every shot)
+                |- RawBlocks (start, stop, Loops, MagneticField of each read)
+            |- Hysteresis
+                |- Delay Value (resultList of the hysteresis)
+
+h5py is optional: if it is not installed, h5py is None and no run file can
+be written (the text files are written in any case).
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import numpy as np
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+RawBlockType = np.dtype([('start', np.int64), ('stop', np.int64),
+                         ('Loops', np.int32), ('MagneticField', np.int8)])
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Class Run File ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RunFile:
+    """
+    Writes the data of one measurement run into one HDF5 file. Groups are
+    addressed by their path, e.g. 'Fluence/2.0/0.5'.
+    """
+
+    def __init__(self, filename, chunkRows=1024, compression='gzip'):
+        """
+        Create (or open) the run file.
+        :param filename: path of the .h5 file
+        :param chunkRows: number of rows (shots) per chunk of the datasets
+        :param compression: compression filter of h5py
+        """
+
+        self.chunkRows = chunkRows
+        self.compression = compression
+        self.file = h5py.File(filename, 'a')
+
+    def group(self, path, **parameters):
+        """
+        Return the group of path, create it if it does not exist.
+        Every dictionary in parameters is stored as attributes named
+        'dictionary.key', e.g. group(path, LoopParams=LoopParams).
+        :param path: e.g. 'Fluence/2.0/0.5'
+        :return: h5py group
+        """
+
+        group = self.file.require_group(path)
+        for name, values in parameters.items():
+            if isinstance(values, dict):
+                for key, value in values.items():
+                    group.attrs[name + '.' + key] = value
+            else:
+                group.attrs[name] = np.asarray(values)
+        return group
+
+    def appendRows(self, path, name, rows):
+        """
+        Append rows to the dataset name of the group path (created with the
+        shape and dtype of the first rows).
+        :param rows: array, appended along the first axis
+        """
+
+        rows = np.asarray(rows)
+        group = self.file.require_group(path)
+        if name not in group:
+            group.create_dataset(
+                name, shape=(0,) + rows.shape[1:],
+                maxshape=(None,) + rows.shape[1:], dtype=rows.dtype,
+                chunks=(self.chunkRows,) + rows.shape[1:],
+                compression=self.compression, shuffle=True)
+        dataset = group[name]
+        start = dataset.shape[0]
+        dataset.resize(start + rows.shape[0], axis=0)
+        dataset[start:] = rows
+
+    def appendRaw(self, path, data, Loop, Polarity_Field, positions):
+        """
+        Append the shots of one read of the measurement card.
+        :param data: array (channels x shots)
+        :param Loop: current loop
+        :param Polarity_Field: direction of the magnetic field (1, -1)
+        :param positions: stage position in ps (one value or one per shot)
+        """
+
+        data = np.asarray(data, dtype=np.float64)
+        group = self.file.require_group(path)
+        start = group['Raw'].shape[0] if 'Raw' in group else 0
+        shots = data.shape[1]
+
+        self.appendRows(path, 'Raw', data.T)
+        self.appendRows(path, 'RawPosition', np.broadcast_to(
+            np.asarray(positions, dtype=np.float64), (shots,)))
+        self.appendRows(path, 'RawBlocks', np.array(
+            [(start, start + shots, Loop, Polarity_Field)],
+            dtype=RawBlockType))
+
+    def writeArray(self, path, name, array):
+        """
+        Replace the dataset name of the group path by array (small arrays,
+        e.g. MOKE_Average or a hysteresis).
+        """
+
+        group = self.file.require_group(path)
+        if name in group:
+            del group[name]
+        group.create_dataset(name, data=np.asarray(array),
+                             compression=self.compression)
+
+    def remove(self, path):
+        """
+        Delete the group path with all its datasets (if it exists).
+        """
+
+        if path in self.file:
+            del self.file[path]
+
+    def flush(self):
+        """
+        Write all buffered data to disk.
+        """
+
+        self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Read Functions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def readTransients(filename):
+    """
+    Read all transients of a run file.
+    :param filename: path of the .h5 file
+    :return: list of dictionaries with 'Fluence', 'Voltage',
+        'AllData_Reduced' (structured array), 'MOKE_Average' and the
+        attributes of the voltage group ('Attributes')
+    """
+
+    transients = []
+    with h5py.File(filename, 'r') as f:
+        if 'Fluence' not in f:
+            return transients
+        for fluence, fluenceGroup in f['Fluence'].items():
+            for voltage, group in fluenceGroup.items():
+                if 'AllData_Reduced' not in group:
+                    continue
+                transients.append({
+                    'Fluence': fluence, 'Voltage': voltage,
+                    'AllData_Reduced': group['AllData_Reduced'][()],
+                    'MOKE_Average': group['MOKE_Average'][()]
+                    if 'MOKE_Average' in group else None,
+                    'Attributes': dict(group.attrs)})
+    return transients
+
+
+def readHysteresis(filename, fluence):
+    """
+    Read all hysteresis measured at one fluence.
+    :param filename: path of the .h5 file
+    :param fluence: fluence (group name)
+    :return: dictionary {delay: array}
+    """
+
+    with h5py.File(filename, 'r') as f:
+        path = 'Fluence/' + str(fluence) + '/Hysteresis'
+        if path not in f:
+            return {}
+        return {delay: dataset[()] for delay, dataset in f[path].items()}
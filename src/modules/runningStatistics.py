@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+runningStatistics.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Mean and standard error of values measured one after the other (f.e. the
+pump-probe value of every delay in every loop), calculated with Welford's
+algorithm: for every element only the number of values, the mean and the
+sum of the squared deviations from the mean (M2) are kept. Adding a value
+costs a few operations, the exact mean and the standard error of all values
+added so far are available at any time.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import numpy as np
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Class Running Statistics ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class RunningStatistics:
+    """
+    count, mean and M2 for every element of an array (f.e. one element per
+    delay)
+    """
+
+    def __init__(self, shape):
+        """
+        :param shape: shape of the statistics (f.e. number of delays)
+        """
+
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.M2 = np.zeros(shape)
+
+    def reset(self):
+        """
+        Forget all values, the arrays are reused
+        """
+
+        self.count[...] = 0
+        self.mean[...] = 0.
+        self.M2[...] = 0.
+
+    def expand(self, idx, size):
+        """
+        Move the elements into a larger statistics (f.e. delays inserted
+        into the grid), the new elements have no values.
+        :param idx: new index of every element
+        :param size: new number of elements
+        """
+
+        for name in ('count', 'mean', 'M2'):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[idx] = old
+            setattr(self, name, new)
+
+    def add(self, idx, value):
+        """
+        Add one value to an element.
+        :param idx: index of the element
+        :param value: measured value
+        """
+
+        self.count[idx] += 1
+        delta = value - self.mean[idx]
+        self.mean[idx] += delta / self.count[idx]
+        self.M2[idx] += delta * (value - self.mean[idx])
+
+    def addAll(self, values, idx=slice(None)):
+        """
+        Add one value to each of several elements at once.
+        :param values: measured values
+        :param idx: indices of the elements (every index only once,
+        default: all elements)
+        """
+
+        count = self.count[idx] + 1
+        delta = values - self.mean[idx]
+        mean = self.mean[idx] + delta / count
+        self.M2[idx] += delta * (values - mean)
+        self.mean[idx] = mean
+        self.count[idx] = count
+
+    def variance(self):
+        """
+        :return: sample variance of every element (NaN with less than 2
+        values)
+        """
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self.M2 / (self.count - 1),
+                            np.nan)
+
+    def standardError(self):
+        """
+        :return: standard error of the mean of every element (NaN with less
+        than 2 values)
+        """
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(self.variance() / self.count)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+saveWorker.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+Matplotlib Version: 2.2.2
+
+Background thread for saving plots and small text files during a
+measurement. The measurement thread hands over copies (snapshots) of the
+arrays and continues with the next loop at once, the worker writes the text
+files and renders the plots as PNG with the Agg renderer of Matplotlib
+(no GUI needed, independent of the pyqtgraph widgets).
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import os
+import queue
+import threading
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from colorama import Fore, Style
+
+from measurementStore import saveAtomic
+
+# colors of the pyqtgraph plots
+LineColor = (215/255, 128/255, 26/255)
+ZeroLineColor = (215/255, 128/255, 26/255, 125/255)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Class Save Worker ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class SaveWorker:
+    """
+    One thread working through a queue of save jobs. A job is one directory
+    with text files {filename: array} and plots {filename: (x, y) array}.
+    """
+
+    def __init__(self, width=2000, dpi=100):
+        """
+        Start the worker thread.
+        :param width: width of the PNGs in pixel
+        :param dpi: resolution of the PNGs
+        """
+
+        self.width = width
+        self.dpi = dpi
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def submit(self, directory, textFiles=None, plots=None):
+        """
+        Add a save job. All arrays are copied, so the measurement can change
+        its arrays right after the call.
+        :param directory: absolute path of the directory
+        :param textFiles: {filename: array} saved as tab separated text
+        :param plots: {filename: array (points x 2)} saved as PNG
+        """
+
+        textFiles = {name: np.array(array, copy=True)
+                     for name, array in (textFiles or {}).items()}
+        plots = {name: np.array(array, copy=True)
+                 for name, array in (plots or {}).items()}
+        self.jobs.put((directory, textFiles, plots))
+
+    def work(self):
+        """
+        Loop of the worker thread, stops at the job None.
+        """
+
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                self.save(*job)
+            except Exception as e:
+                print(Fore.RED + 'Saving failed: ' + str(e) + Style.RESET_ALL)
+            finally:
+                self.jobs.task_done()
+
+    def save(self, directory, textFiles, plots):
+        for name, array in textFiles.items():
+            saveAtomic(os.path.join(directory, name), array)
+        for name, array in plots.items():
+            self.renderPlot(os.path.join(directory, name), array)
+
+    def renderPlot(self, filename, array):
+        """
+        Render a line plot (same style as the pyqtgraph plots) to PNG.
+        :param filename: path of the PNG
+        :param array: points x 2 (x, y)
+        """
+
+        figure = Figure(figsize=(self.width/self.dpi, 0.6*self.width/self.dpi),
+                        dpi=self.dpi)
+        FigureCanvasAgg(figure)
+        axes = figure.add_subplot(111)
+        axes.axhline(0, color=ZeroLineColor)
+        axes.plot(array[:, 0], array[:, 1], color=LineColor)
+        figure.savefig(filename)
+
+    def wait(self):
+        """
+        Block until all submitted jobs are saved.
+        """
+
+        self.jobs.join()
+
+    def close(self):
+        """
+        Save the remaining jobs and stop the thread.
+        """
+
+        self.jobs.put(None)
+        self.thread.join()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+sharedRing.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Ring buffer of structured NumPy rows in shared memory, to hand data from one
+process to another without pickling. The writer (e.g. the acquisition
+process) appends rows, every reader keeps its own cursor and gets the rows
+written since its last read. A reader that falls behind more than the size
+of the ring loses the oldest rows (the number is returned), the writer is
+never blocked by a slow reader.
+
+The memory is a multiprocessing.RawArray (available since Python 3.3 and on
+Windows), it is handed to the child process with the arguments of
+multiprocessing.Process.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import ctypes
+import multiprocessing
+import numpy as np
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Class Shared Ring ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class SharedRing:
+    """
+    slots rows of dtype in shared memory and the total number of written
+    rows. The lock is only held while copying rows.
+    """
+
+    def __init__(self, dtype, slots=4096):
+        """
+        :param dtype: NumPy dtype of one row
+        :param slots: number of rows in the ring
+        """
+
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.buffer = multiprocessing.RawArray(ctypes.c_byte,
+                                               slots * self.dtype.itemsize)
+        self.written = multiprocessing.RawValue(ctypes.c_longlong, 0)
+        self.lock = multiprocessing.Lock()
+        self.rows = None
+
+    def __getstate__(self):
+        # the NumPy view is created again in the other process
+        state = self.__dict__.copy()
+        state['rows'] = None
+        return state
+
+    def view(self):
+        """
+        :return: NumPy array (slots) on the shared memory
+        """
+
+        if self.rows is None:
+            self.rows = np.frombuffer(self.buffer, dtype=self.dtype)
+        return self.rows
+
+    def write(self, rows):
+        """
+        Append rows, the oldest rows are overwritten.
+        :param rows: array of dtype (or one element)
+        """
+
+        rows = np.atleast_1d(np.asarray(rows, dtype=self.dtype))[-self.slots:]
+        with self.lock:
+            start = self.written.value
+            self.view()[(start + np.arange(len(rows))) % self.slots] = rows
+            self.written.value = start + len(rows)
+
+    def read(self, cursor):
+        """
+        Copy the rows written since cursor.
+        :param cursor: number of rows read before (0 at the start)
+        :return: rows, new cursor, number of lost rows
+        """
+
+        with self.lock:
+            written = self.written.value
+            lost = max(0, written - cursor - self.slots)
+            rows = self.view()[np.arange(cursor + lost, written) % self.slots]
+        return rows, written, lost
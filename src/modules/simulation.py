@@ -0,0 +1,767 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+simulation.py
+
+Author: Lisa Willig
+Last Edited: 06.12.2018
+
+Python Version: 3.6.5
+
+Simulated Time Resolved MOKE setup to measure the throughput of complete
+scans without hardware (f.e. on a laptop). In contrast to the *_Debug classes
+the simulated classes implement exactly the interfaces of the real classes
+and take as long as the hardware:
+
+- XPS controller: StageCommunication_Simulation is the real
+  StageCommunication talking to a simulated controller, every command of the
+  XPS interface costs one TCP exchange, moves take the time of a trapezoidal
+  velocity profile (SGamma velocity and acceleration), the positions of a fly
+  scan are latched for every laser shot
+- NI measurement card: the Analog Input is locked to a 1 kHz laser trigger,
+  a read returns when the requested shots were fired. The channels contain
+  a chopper pattern (every second shot pumped), the probe diodes with a
+  synthetic MOKE signal (hysteresis loop of the sample and demagnetization
+  transient depending on the delay stage), the magnetic field with first
+  order settling after every write and the reference diode of the pump
+  (waveplate angle, shutter, chopper)
+- MERedLab card: shutter with switching time
+
+All simulated hardware shares one SimulatedSetup (module variable setup),
+its parameters are a copy of SimulationParams and can be changed before the
+measurement, f.e. setup.params['TimeScale'] = 0.1 runs the hardware ten times
+faster than real time.
+
+The simulation is selected with bSimulation in mokeExperiment.py.
+
+"""
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 1) Imports ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+import re
+import threading
+import time as t
+import numpy as np
+
+from XPS.XPS_ import XPS
+from StageCommunication_V2 import StageCommunication, Offset_mm
+from NI_CardCommunication_V2 import NI_CardCommunication, RingBuffer_ai, \
+    DaqError
+
+# Parameters of the simulated setup
+SimulationParams = {
+    # timing
+    'TimeScale': 1.,          # 1: real time, 0.1: ten times faster
+    'LaserRate': 1000.,       # laser trigger (Hz)
+    'XPSLatency': 0.001,      # one TCP exchange with the XPS (s)
+    'HomeSearch': 2.,         # home search of a group (s)
+    'MoveSettle': 0.005,      # settling at the end of a move (s)
+    'ResetLatency': 0.3,      # reset of a NI device (s)
+    'TaskStart': 0.01,        # start and stop of a triggered NI task (s)
+    'MagnetSettle': 0.05,     # time constant of the magnet (s)
+    'ShutterLatency': 0.03,   # MERedLab card and shutter motor (s)
+    'ErrorRate': 0.,          # probability of a DaqError for every read
+    'Seed': 0,                # random numbers (noise, errors)
+    # signal
+    'Probe': 2.,              # sum of both probe diodes (V)
+    'ProbeNoise': 2e-3,       # relative shot to shot noise of the probe
+    'DetectorNoise': 5e-4,    # noise of every channel (V)
+    'Kerr': 0.01,             # relative MOKE signal of the saturated sample
+    'BalancedGain': 10.,      # gain of the balanced diode
+    'CoerciveField': 1.5,     # coercive field (V written to the magnet)
+    'SwitchingWidth': 0.3,    # width of the switching (V)
+    'FieldPerVolt': 0.6070497802,  # field channel (V) per written value
+    'Reference': 1.,          # reference diode at full pump power (V)
+    'TimeZero': 3.,           # light way of the pump probe overlap (ps)
+    'Demagnetization': 0.3,   # relative quenching at full pump power
+    'TauDemag': 0.2,          # demagnetization time (ps)
+    'TauRecovery': 2.,        # recovery time of the electrons (ps)
+    'Recovery': 0.6,          # part of the quenching recovered fast
+    }
+
+# Parameters of the simulated XPS groups, the SGamma velocity and
+# acceleration are used for moves (as by the XPS, the jog parameters are not).
+# GROUP1: delay stage (mm), GROUP3: waveplate (deg), the pump power is
+# sin(2 angle)^2 of the full power, so home is set to full power
+XPSGroups = {
+    'GROUP1': {'Velocity': 300., 'Acceleration': 2500., 'MinJerk': 0.005,
+               'MaxJerk': 0.05, 'Travel': (-75., 75.), 'Home': 0.},
+    'GROUP3': {'Velocity': 20., 'Acceleration': 80., 'MinJerk': 0.005,
+               'MaxJerk': 0.05, 'Travel': (-1e9, 1e9), 'Home': 22.5},
+    }
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 2) Simulated Setup ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class SimulatedSetup:
+    """
+    State of the simulated setup (stages, magnet, shutter, sample) and its
+    clock. The time of the setup runs 1/TimeScale times faster than the real
+    time, laser shot n is fired at time n/LaserRate.
+    """
+
+    def __init__(self, params=None):
+        """
+        :param params: dictionary, default SimulationParams
+        """
+
+        self.params = dict(params or SimulationParams)
+        self.start = t.time()
+        self.lock = threading.RLock()
+        self.random = np.random.RandomState(self.params['Seed'])
+        self.xps = SimulatedXPSController(self)
+        # magnet: start time, target and field at the start of each write
+        self.magnetTimes = [0.]
+        self.magnetTargets = [0.]
+        self.magnetFields = [0.]
+        # branch of the hysteresis loop the sample is on (1, -1)
+        self.branch = 1
+        self.shutterClosed = False
+
+    def now(self):
+        """
+        :return: time of the setup (s)
+        """
+
+        return (t.time() - self.start) / self.params['TimeScale']
+
+    def waitUntil(self, time):
+        """
+        Sleep until the time of the setup is reached.
+        :param time: time of the setup (s)
+        """
+
+        remaining = time - self.now()
+        if remaining > 0:
+            t.sleep(remaining * self.params['TimeScale'])
+
+    def wait(self, duration):
+        """
+        :param duration: time of the setup to wait (s)
+        """
+
+        self.waitUntil(self.now() + duration)
+
+    def nextShot(self):
+        """
+        :return: number of the next laser shot
+        """
+
+        return int(self.now() * self.params['LaserRate']) + 1
+
+    def waitForShots(self, first, n):
+        """
+        Wait until the laser fired n shots starting with shot first.
+        """
+
+        self.waitUntil((first + n) / self.params['LaserRate'])
+
+    def writeMagnet(self, target, time=None):
+        """
+        The magnet approaches the new value with a first order response.
+        :param target: value written to the power supply (V)
+        :param time: time of the write (default now)
+        """
+
+        if time is None:
+            time = self.now()
+        with self.lock:
+            field = self.field(np.array([time]))[0]
+            self.magnetTimes.append(time)
+            self.magnetTargets.append(float(target))
+            self.magnetFields.append(field)
+            if len(self.magnetTimes) > 4096:
+                del self.magnetTimes[:2048]
+                del self.magnetTargets[:2048]
+                del self.magnetFields[:2048]
+
+    def field(self, times):
+        """
+        :param times: array of times of the setup (s)
+        :return: magnetic field (in V written to the power supply)
+        """
+
+        idx = np.searchsorted(self.magnetTimes, times, side='right') - 1
+        idx = np.clip(idx, 0, None)
+        start = np.asarray(self.magnetTimes)[idx]
+        target = np.asarray(self.magnetTargets)[idx]
+        field = np.asarray(self.magnetFields)[idx]
+        decay = np.exp(-(times - start) / self.params['MagnetSettle'])
+        return target + (field - target) * decay
+
+    def magnetization(self, field):
+        """
+        Hysteresis loop of the sample: the branch changes if the field
+        exceeds the coercive field. The shots have to be given in the order
+        they were fired.
+        :param field: array of the field for consecutive shots
+        :return: magnetization (-1 ... 1)
+        """
+
+        Hc = self.params['CoerciveField']
+        switch = np.where(field > Hc, 1, np.where(field < -Hc, -1, 0))
+        last = np.where(switch != 0, np.arange(len(switch)), -1)
+        last = np.maximum.accumulate(last)
+        branch = np.where(last >= 0, switch[np.clip(last, 0, None)],
+                          self.branch)
+        if len(branch):
+            self.branch = branch[-1]
+        return np.tanh((field + branch * Hc) /
+                       self.params['SwitchingWidth'])
+
+    def transient(self, delay):
+        """
+        Relative quenching of the magnetization at full pump power.
+        :param delay: pump probe delay (ps)
+        :return: array
+        """
+
+        p = self.params
+        tau = np.clip(delay, 0, None)
+        return np.where(delay > 0, p['Demagnetization'] *
+                        (1 - np.exp(-tau / p['TauDemag'])) *
+                        (p['Recovery'] * np.exp(-tau / p['TauRecovery']) +
+                         1 - p['Recovery']), 0.)
+
+    def measure(self, first, n):
+        """
+        Signal of the six Analog Input channels for n consecutive laser
+        shots: 0 balanced Diode, 1 Diode-, 2 Magnetic Field, 3 Chopper,
+        4 Diode+, 5 reference Diode
+        :param first: number of the first shot
+        :param n: number of shots
+        :return: data (6 x n)
+        """
+
+        p = self.params
+        shots = np.arange(first, first + n)
+        times = shots / p['LaserRate']
+        with self.lock:
+            noise = self.random.normal(size=(7, n))
+            field = self.field(times)
+            magnetization = self.magnetization(field)
+            position = self.xps.position('GROUP1', times)
+            angle = np.radians(self.xps.position('GROUP3', times))
+
+        delay = (position + Offset_mm) * 10 / 3 * 2 - p['TimeZero']
+        power = np.sin(2 * angle)**2
+
+        chopper = (shots % 2 == 0)
+        pumped = chopper * (not self.shutterClosed) * power
+        kerr = p['Kerr'] * magnetization * \
+            (1 - pumped * self.transient(delay))
+        probe = p['Probe'] * (1 + p['ProbeNoise'] * noise[6])
+
+        data = np.empty((6, n))
+        data[4] = probe / 2 * (1 + kerr)
+        data[1] = probe / 2 * (1 - kerr)
+        data[0] = p['BalancedGain'] * (data[4] - data[1])
+        data[2] = field * p['FieldPerVolt']
+        data[3] = 5. * chopper
+        data[5] = p['Reference'] * pumped
+        data += p['DetectorNoise'] * noise[:6]
+        return data
+
+    def failure(self):
+        """
+        Raise a DaqError with the probability ErrorRate.
+        """
+
+        if self.params['ErrorRate'] and \
+                self.random.random_sample() < self.params['ErrorRate']:
+            raise DaqError('Simulated error: samples were overwritten',
+                           -200279)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 3) Simulated XPS Controller ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class SimulatedAxis:
+    """
+    One positioner of the XPS. The moves are kept as trajectories, so the
+    position is known for every time (f.e. while the stage moves during a
+    read or a fly scan).
+    """
+
+    def __init__(self, params):
+        self.params = dict(params)
+        home = self.params['Home']
+        self.moves = [(0., home, home, 1., 1., 0.)]
+        self.status = 7
+        self.gathering = None
+
+    def target(self):
+        """
+        :return: end position of the last move
+        """
+
+        return self.moves[-1][2]
+
+    def move(self, start, target):
+        """
+        Start a move with the trapezoidal velocity profile of the SGamma
+        parameters.
+        :param start: time of the setup (s)
+        :param target: position (mm)
+        :return: duration of the move (s)
+        """
+
+        origin = float(self.position(np.array([start]))[0])
+        v = self.params['Velocity']
+        a = self.params['Acceleration']
+        distance = abs(target - origin)
+        if distance > v**2 / a:
+            duration = distance / v + v / a
+        else:
+            duration = 2 * np.sqrt(distance / a)
+        self.moves.append((start, origin, float(target), v, a, duration))
+        if len(self.moves) > 64:
+            del self.moves[:32]
+        return duration
+
+    def position(self, times):
+        """
+        :param times: array of times of the setup (s)
+        :return: positions (mm)
+        """
+
+        starts = [move[0] for move in self.moves]
+        idx = np.clip(np.searchsorted(starts, times, side='right') - 1, 0,
+                      None)
+        positions = np.empty(len(times))
+        for i in np.unique(idx):
+            mask = idx == i
+            start, origin, target, v, a, duration = self.moves[i]
+            tau = np.clip(times[mask] - start, 0, duration)
+            distance = abs(target - origin)
+            ta = min(v / a, duration / 2)
+            way = np.where(
+                tau < ta, a * tau**2 / 2,
+                np.where(tau > duration - ta,
+                         distance - a * (duration - tau)**2 / 2,
+                         a * ta**2 / 2 + a * ta * (tau - ta)))
+            positions[mask] = origin + np.sign(target - origin) * way
+        return positions
+
+
+class SimulatedXPSController:
+    """
+    Answers the commands of the XPS interface (same strings as send over
+    TCP). Commands that are not simulated are accepted without effect.
+    """
+
+    def __init__(self, setup):
+        self.setup = setup
+        self.axes = {name: SimulatedAxis(params)
+                     for name, params in XPSGroups.items()}
+        self.eventID = 0
+        self.gatheringGroup = None
+        self.gatheringShots = 0
+
+    def position(self, group, times):
+        """
+        :param group: name of the group
+        :param times: array of times of the setup (s)
+        :return: positions (mm)
+        """
+
+        return self.axes[group].position(times)
+
+    def execute(self, command):
+        """
+        Execute a command, moves are only started.
+        :param command: f.e. 'GroupMoveAbsolute(GROUP1.POSITIONER,1.0)'
+        :return: [error, returnedString], time of the setup when the reply is
+        sent
+        """
+
+        match = re.match(r'(\w+)\((.*)\)$', command)
+        name, args = match.group(1), match.group(2).split(',')
+        now = self.setup.now()
+        group = args[0].split('.')[0]
+        axis = self.axes.get(group)
+
+        with self.setup.lock:
+            if name == 'GroupKill':
+                axis.status = 7
+            elif name == 'GroupInitialize':
+                axis.status = 42
+            elif name == 'GroupHomeSearch':
+                axis.status = 11
+                home = axis.params['Home']
+                axis.moves = [(now, home, home, 1., 1., 0.)]
+                return [0, ''], now + self.setup.params['HomeSearch']
+            elif name in ['GroupMoveAbsolute', 'GroupMoveRelative']:
+                if axis.status not in [11, 12]:
+                    return [-22, 'Not allowed action'], now
+                target = float(args[1])
+                if name == 'GroupMoveRelative':
+                    target += axis.target()
+                low, high = axis.params['Travel']
+                if not low <= target <= high:
+                    return [-17, 'Parameter out of range'], now
+                axis.status = 12
+                duration = axis.move(now, target)
+                return [0, ''], now + duration + \
+                    self.setup.params['MoveSettle']
+            elif name == 'GroupPositionCurrentGet':
+                return [0, str(axis.position(np.array([now]))[0])], now
+            elif name == 'GroupMotionStatusGet':
+                end = axis.moves[-1][0] + axis.moves[-1][5]
+                return [0, str(int(now < end))], now
+            elif name == 'GroupStatusGet':
+                return [0, str(axis.status)], now
+            elif name == 'PositionerSGammaParametersGet':
+                p = axis.params
+                return [0, ','.join(str(p[key]) for key in
+                                    ['Velocity', 'Acceleration', 'MinJerk',
+                                     'MaxJerk'])], now
+            elif name == 'PositionerUserTravelLimitsGet':
+                low, high = axis.params['Travel']
+                return [0, str(low) + ',' + str(high)], now
+            elif name == 'PositionerSGammaParametersSet':
+                for key, value in zip(['Velocity', 'Acceleration',
+                                       'MinJerk', 'MaxJerk'], args[1:]):
+                    axis.params[key] = float(value)
+            elif name == 'GatheringExternalConfigurationSet':
+                self.gatheringGroup = group
+            elif name == 'EventExtendedConfigurationActionSet':
+                self.gatheringShots = int(args[1])
+            elif name == 'EventExtendedStart':
+                # the positions are latched from the next laser shot on
+                self.eventID += 1
+                self.axes[self.gatheringGroup].gathering = \
+                    self.setup.nextShot()
+                return [0, str(self.eventID)], now
+            elif name == 'GatheringExternalCurrentNumberGet':
+                current = self.gathered(now)
+                return [0, str(len(current)) + ',' +
+                        str(self.gatheringShots)], now
+            elif name == 'GatheringExternalDataGet':
+                return [0, str(self.gathered(now)[int(args[0])])], now
+            elif name == 'GatheringExternalDataMultipleLinesGet':
+                first = int(args[0])
+                lines = self.gathered(now)[first:first + int(args[1])]
+                if len(lines) < int(args[1]):
+                    return [-17, 'Parameter out of range'], now
+                return [0, '\n'.join(str(line) for line in lines)], now
+            elif name == 'EventExtendedRemove':
+                self.axes[self.gatheringGroup].gathering = None
+        return [0, ''], now
+
+    def gathered(self, now):
+        """
+        :param now: time of the setup (s)
+        :return: positions latched since EventExtendedStart
+        """
+
+        axis = self.axes[self.gatheringGroup]
+        if axis.gathering is None:
+            return np.zeros(0)
+        rate = self.setup.params['LaserRate']
+        n = min(self.gatheringShots, int(now * rate) - axis.gathering + 1)
+        times = np.arange(axis.gathering, axis.gathering + max(n, 0)) / rate
+        return axis.position(times)
+
+
+class SimulatedXPS(XPS):
+    """
+    XPS interface without sockets: the command strings of the XPS functions
+    are answered by the SimulatedXPSController of the setup. Every exchange
+    takes XPSLatency, a move returns when it is finished.
+    """
+
+    def __init__(self):
+        XPS.__init__(self)
+
+    def TCP_ConnectToServer(self, IP, port, timeOut):
+        usedSockets = XPS._XPS__usedSockets
+        for socketId in range(self.MAX_NB_SOCKETS):
+            if usedSockets[socketId] == 0:
+                usedSockets[socketId] = 1
+                XPS._XPS__nbSockets += 1
+                return socketId
+        return -1
+
+    def TCP_CloseSocket(self, socketId):
+        if XPS._XPS__usedSockets.get(socketId):
+            XPS._XPS__usedSockets[socketId] = 0
+            XPS._XPS__nbSockets -= 1
+
+    def TCP_SetTimeout(self, socketId, timeOut):
+        # no socket: the simulated controller answers every command
+        pass
+
+    def _XPS__sendAndReceive(self, socketId, command):
+        # replaces the private XPS.__sendAndReceive used by all functions
+        return self.BatchSendAndReceive([(socketId, command)])[0]
+
+    def BatchSendAndReceive(self, commandList):
+        for socketId, command in commandList:
+            if XPS._XPS__usedSockets[socketId] == 0:
+                return [[-1, ''] for command in commandList]
+
+        replies = []
+        end = 0
+        for socketId, command in commandList:
+            reply, done = setup.xps.execute(command)
+            replies.append(reply)
+            end = max(end, done)
+        setup.wait(setup.params['XPSLatency'])
+        setup.waitUntil(end)
+        return replies
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 4) Simulated Stage ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class StageCommunication_Simulation(StageCommunication):
+    """
+    StageCommunication connected to the simulated XPS controller, all other
+    methods are the ones of the real class.
+    """
+
+    def connectStage(self):
+        """
+        connect the stage: Open communication with the simulated XPS
+        controller and search for home.
+        """
+
+        self.myxps = SimulatedXPS()
+        self.socketId = self.myxps.TCP_ConnectToServer(b'10.10.1.2', 5001, 20)
+        if self.socketId == -1:
+            print('Connection to XPS failed, check IP & Port')
+            return
+
+        self.group = self.groupname.encode(encoding='utf-8')
+        self.positioner = self.group + self.positionername.encode()
+        self.myxps.GroupKill(self.socketId, self.group)
+        self.myxps.GroupInitialize(self.socketId, self.group)
+        self.searchForHome()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 5) Simulated NI Measurement Card ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class SimulatedTask:
+    """
+    Task of the simulated card with the attributes of a nidaqmx.Task the
+    measurement code uses.
+    """
+
+    count = 0
+
+    def __init__(self, chan, bOnDemand=False):
+        """
+        :param chan: channels, f.e. "Dev2/ai0:5" or "Dev1/ao0"
+        :param bOnDemand: output without sample clock
+        """
+
+        SimulatedTask.count += 1
+        self.name = '_simulated_task' + str(SimulatedTask.count)
+        match = re.search(r'(\d+)(?::(\d+))?$', str(chan))
+        first = int(match.group(1)) if match else 0
+        last = int(match.group(2)) if match and match.group(2) else first
+        self.channels = list(range(first, last + 1))
+        self.number_of_channels = len(self.channels)
+        self.bOnDemand = bOnDemand
+        self.bAnalogOutput = '/ao' in str(chan)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def write(self, data, auto_start=False):
+        if self.bAnalogOutput:
+            # the power supply gets value/0.6070497802, see Write_Single_36V6A
+            value = data if np.isscalar(data) else data[-1]
+            setup.writeMagnet(value * 0.6070497802)
+
+
+class NI_CardCommunication_Simulation(NI_CardCommunication):
+    """
+    NI_CardCommunication for the simulated setup. The tasks are
+    SimulatedTask objects, the Analog Input is clocked by the simulated
+    laser. Ring buffer, task manager and the calculation of the written
+    values are the ones of the real class.
+    """
+
+    def __init__(self):
+        NI_CardCommunication.__init__(self)
+        self.streams = {}
+
+    def reset_device(self, Device):
+        setup.wait(setup.params['ResetLatency'])
+
+    def create_Task_ai(self, chan, bTrig=True):
+        return SimulatedTask(chan)
+
+    def create_Task_ao0(self, chan, bTrig=True, bOnDemand=False):
+        return SimulatedTask(chan, bOnDemand)
+
+    def create_Task_do(self, chan):
+        return SimulatedTask(chan)
+
+    def read(self, task, first, n):
+        """
+        Signal of the channels of the task for n shots.
+        :param task: SimulatedTask
+        :param first: number of the first shot
+        :param n: number of shots
+        :return: data (channels x n)
+        """
+
+        return setup.measure(first, n)[task.channels]
+
+    def ReadValues_ai(self, task, LoopParams):
+        # the triggered task is started, waits for the trigger, reads and is
+        # stopped again
+        N = LoopParams['MeasurementPoints']
+        setup.wait(setup.params['TaskStart'])
+        first = setup.nextShot()
+        setup.waitForShots(first, N)
+        setup.failure()
+        data = self.read(task, first, N)
+        setup.wait(setup.params['TaskStart'])
+        return data
+
+    def startStreaming_ai(self, task, LoopParams, bufferLength=10000,
+                          samplesPerCallback=20):
+        length = max(bufferLength, 4*LoopParams['MeasurementPoints'])
+        ringBuffer = RingBuffer_ai(task.number_of_channels, length,
+                                   samplesPerCallback)
+        stop = threading.Event()
+
+        def callback():
+            first = setup.nextShot()
+            while not stop.is_set():
+                setup.waitForShots(first, samplesPerCallback)
+                ringBuffer.append(self.read(task, first, samplesPerCallback))
+                first += samplesPerCallback
+
+        thread = threading.Thread(target=callback, daemon=True)
+        self.streams[task.name] = (thread, stop)
+        thread.start()
+        return ringBuffer
+
+    def ReadValues_ai_stream(self, ringBuffer, LoopParams, timeout=10.):
+        setup.failure()
+        return NI_CardCommunication.ReadValues_ai_stream(
+            self, ringBuffer, LoopParams, timeout)
+
+    def stopStreaming_ai(self, task, ringBuffer):
+        thread, stop = self.streams.pop(task.name, (None, None))
+        if thread is not None:
+            stop.set()
+            thread.join()
+
+    def configureLaserTiming(self, task, sample_mode, samples,
+                             startTrigger="PFI0"):
+        pass
+
+    def MeasureSweep(self, writingTask, readingTask, values, samplesPerValue,
+                     callback=None, startTrigger="PFI0"):
+        waveform = self.Write_Waveform_36V6A(values, samplesPerValue)
+        steps = len(values)
+        data = np.zeros((steps, readingTask.number_of_channels,
+                         samplesPerValue), dtype=np.float64)
+        rate = setup.params['LaserRate']
+
+        setup.wait(setup.params['TaskStart'])
+        first = setup.nextShot()
+        for idx in range(steps):
+            setup.writeMagnet(waveform[idx * samplesPerValue] * 0.6070497802,
+                              (first + idx * samplesPerValue) / rate)
+        for idx in range(steps):
+            start = first + idx * samplesPerValue
+            setup.waitForShots(start, samplesPerValue)
+            data[idx] = self.read(readingTask, start, samplesPerValue)
+            if callback:
+                callback(idx, data[idx])
+        setup.wait(setup.params['TaskStart'])
+
+        return data.transpose(1, 0, 2)
+
+    def MeasureFlyScan(self, readingTask, samples, startMotion):
+        setup.wait(setup.params['TaskStart'])
+        first = setup.nextShot()
+        startMotion()
+        offset = max(0, setup.nextShot() - first)
+        setup.waitForShots(first, samples)
+        data = self.read(readingTask, first, samples)
+        setup.wait(setup.params['TaskStart'])
+        return data, offset
+
+    def isOnDemand(self, task):
+        return task.bOnDemand
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 6) Simulated Shutter ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+class MECard_Simulation:
+    """
+    Shutter of the pump laser on the simulated MERedLab card.
+    """
+
+    def setDigValue(self, value):
+        """
+        Set Digital value.
+        :param value: 0,1 (1: shutter closed)
+        :return: 0
+        """
+
+        setup.wait(setup.params['ShutterLatency'])
+        setup.shutterClosed = bool(value)
+        return 0
+
+
+setup = SimulatedSetup()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+# ~~~ 7) Main Entry Point ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+def main():
+    """
+    main entry point. This gets called when it is not imported as a module.
+    Measures a transient with MokeExperiment on the simulated setup
+    (bSimulation needs to be True in mokeExperiment.py) and prints the
+    throughput of the scan.
+    """
+
+    import mokeExperiment
+
+    if not mokeExperiment.bSimulation:
+        print('Set bSimulation = True in mokeExperiment.py')
+        return
+
+    params = mokeExperiment.MokeParameters()
+    params.bSave = False
+    params.StageParams_ps = {'StartPoint': 0., 'EndPoint': 10.,
+                             'StepWidth': 0.5}
+    experiment = mokeExperiment.MokeExperiment(params)
+    experiment.prepare()
+    start = t.time()
+    experiment.run()
+    duration = t.time() - start
+    experiment.close()
+
+    points = 2 * params.LoopParams['Loops'] * len(experiment.stageVector_mm)
+    shots = points * params.LoopParams['MeasurementPoints']
+    print('Delays measured: ' + str(points) + ' in ' +
+          str(round(duration, 2)) + ' s (' +
+          str(round(points / duration, 1)) + ' per s)')
+    print('Duty cycle of the laser: ' + str(round(
+        100 * shots / setup.params['LaserRate'] /
+        (duration / setup.params['TimeScale']), 1)) + ' %')
+
+
+"""
+call the main() entry point only, if this script is the
+main script called, not imported.
+"""
+
+if __name__ == '__main__':
+    main()
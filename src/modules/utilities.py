@@ -212,6 +212,140 @@ def sortAfterChopper(toSort, chopper):
     return ChopEntry, UnChopEntry
 
 
+def sortAfterChopperAllChannels(data, chopperChannel, threshold=2.):
+    """
+    Sort the values of all channels after the chopper in one vectorized step
+    and return the averaged chopped and unchopped values for every channel.
+    The mask of the Chopper Diode (returned from the Thorlabs Chopper Trigger
+    Out) is only calculated once: values below the threshold are chopped,
+    values above are unchopped.
+
+    data can also hold several blocks (channels x blocks x samples), then the
+    values of each block are averaged separately.
+
+    The returned Sanity is 1 (measurement should be repeated) if one of the
+    groups is empty or the number of chopped and unchopped values is not equal.
+
+    :param data: array (channels x samples) as returned from ReadValues_ai
+    :param chopperChannel: index of the chopper channel in data
+    :param threshold: chopper voltage separating chopped and unchopped
+    :return: ChopperStats, Sanity
+        ChopperStats: dictionary with one array entry per channel
+        'Chop', 'UnChop': averaged values
+        'ChopError', 'UnChopError': standard error of the average
+        'ChopCount', 'UnChopCount': number of values
+    """
+
+    data = np.asarray(data, dtype=np.float64)
+    chopper = data[chopperChannel]
+    masks = {'Chop': chopper < threshold, 'UnChop': chopper > threshold}
+
+    ChopperStats = {}
+    for name, mask in masks.items():
+        count = np.count_nonzero(mask, axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (data * mask).sum(axis=-1) / count
+            residual = (data - mean[..., np.newaxis]) * mask
+            variance = (residual * residual).sum(axis=-1) / (count - 1)
+            ChopperStats[name] = mean
+            ChopperStats[name + 'Error'] = np.sqrt(variance / count)
+        ChopperStats[name + 'Count'] = count
+
+    Sanity = int(np.any(ChopperStats['ChopCount'] == 0) or
+                 np.any(ChopperStats['ChopCount'] !=
+                        ChopperStats['UnChopCount']))
+    return ChopperStats, Sanity
+
+
+def mergeChopperStats(first, second):
+    """
+    Combine the ChopperStats of two blocks of the same channels into the
+    ChopperStats of all values of both blocks, without sorting the values
+    again (parallel variance algorithm: the sum of squared deviations M2 of
+    each block follows from its standard error and count).
+
+    :param first, second: ChopperStats from sortAfterChopperAllChannels
+    :return: ChopperStats of both blocks
+    """
+
+    ChopperStats = {}
+    for name in ('Chop', 'UnChop'):
+        n1 = first[name + 'Count']
+        n2 = second[name + 'Count']
+        count = n1 + n2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            M2 = first[name + 'Error'] ** 2 * n1 * (n1 - 1) + \
+                second[name + 'Error'] ** 2 * n2 * (n2 - 1)
+            delta = second[name] - first[name]
+            ChopperStats[name] = first[name] + delta * n2 / count
+            M2 = M2 + delta ** 2 * n1 * n2 / count
+            ChopperStats[name + 'Error'] = np.sqrt(M2 / (count - 1) / count)
+        ChopperStats[name + 'Count'] = count
+    return ChopperStats
+
+
+def binEdges(centers):
+    """
+    Calculate the edges of bins around sorted center values (f.e. the delays
+    of a fly scan). The edges lie in the middle between two centers, the
+    outer bins are symmetric around the first and last center.
+    :param centers: sorted array of bin centers
+    :return: edges (length of centers + 1)
+    """
+
+    centers = np.asarray(centers, dtype=np.float64)
+    middle = (centers[1:] + centers[:-1])/2
+    first = centers[0] - (middle[0] - centers[0])
+    last = centers[-1] + (centers[-1] - middle[-1])
+    return np.concatenate(([first], middle, [last]))
+
+
+def binFlyScan(data, positions, offset, edges, chopperChannel, threshold=2.):
+    """
+    Assign every laser shot of a fly scan to the bin of the stage position
+    it was measured at and sort the values of each bin after the chopper.
+    Shot offset + i of data belongs to positions[i], shots outside of the
+    edges are discarded.
+
+    :param data: array (channels x shots) read during the fly scan
+    :param positions: stage position for every gathered shot
+    :param offset: index of the shot in data belonging to positions[0]
+    :param edges: sorted bin edges (same unit as positions)
+    :param chopperChannel: index of the chopper channel in data
+    :param threshold: chopper voltage separating chopped and unchopped
+    :return: ChopperStats: dictionary with one array (channels x bins) per
+        entry, same entries as returned by sortAfterChopperAllChannels
+    """
+
+    data = np.asarray(data, dtype=np.float64)
+    n = min(len(positions), data.shape[1] - offset)
+    shots = data[:, offset:offset + n]
+    bins = len(edges) - 1
+    binIdx = np.digitize(positions[:n], edges) - 1
+    valid = (binIdx >= 0) & (binIdx < bins)
+    chopper = shots[chopperChannel]
+    masks = {'Chop': valid & (chopper < threshold),
+             'UnChop': valid & (chopper > threshold)}
+
+    ChopperStats = {}
+    for name, mask in masks.items():
+        idx = binIdx[mask]
+        count = np.bincount(idx, minlength=bins)
+        sums = np.array([np.bincount(idx, weights=channel[mask],
+                                     minlength=bins) for channel in shots])
+        squares = np.array([np.bincount(idx, weights=channel[mask]**2,
+                                        minlength=bins) for channel in shots])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / count
+            variance = (squares - count*mean**2) / (count - 1)
+            ChopperStats[name] = mean
+            ChopperStats[name + 'Error'] = \
+                np.sqrt(np.clip(variance, 0, None) / count)
+        ChopperStats[name + 'Count'] = np.broadcast_to(count, mean.shape)
+
+    return ChopperStats
+
+
 def averageListEntry(datalist):
     """
     Return the average value of a Python List